@@ -0,0 +1,180 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# api_server.py
+import os
+import json
+import time
+import signal
+import socket
+import logging
+from input_codec import InputCodec
+
+logger = logging.getLogger(__name__)
+
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+API_MAX_BATCH_ROWS = int(os.getenv("API_MAX_BATCH_ROWS", "10000"))
+
+INPUT_CODEC = InputCodec()
+
+def row_from_instance(instance):
+    """Satu instance JSON (dict nama fitur -> nilai, atau list 13 angka) menjadi baris float32 tervalidasi."""
+    return INPUT_CODEC.encode_instance(instance)
+
+def wants_explanation(request, payload):
+    """Atribusi fitur diminta lewat "explain": true di body atau ?explain=1."""
+    if isinstance(payload, dict) and payload.get("explain"):
+        return True
+    return request.query_params.get("explain", "").lower() in ("1", "true")
+
+def create_api_app(predict_one, predict_many, readiness):
+    """
+    Membuat aplikasi ASGI (Starlette) headless. Fungsi prediksi dan status disediakan oleh app.py:
+    - predict_one(row, explain) -> coroutine yang menghasilkan dict hasil satu baris (lewat micro-batcher)
+    - predict_many(rows, explain) -> list dict hasil (dipanggil di threadpool)
+    - readiness() -> (siap: bool, detail: dict)
+    """
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def read_json(request):
+        try:
+            return await request.json()
+        except json.JSONDecodeError:
+            raise ValueError("Body bukan JSON yang valid.")
+
+    async def healthz(request):
+        # Liveness: proses hidup dan event loop merespons, terlepas dari status model
+        return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+    async def readyz(request):
+        ready, detail = readiness()
+        return JSONResponse({"status": "ready" if ready else "not_ready", **detail}, status_code=200 if ready else 503)
+
+    async def predict(request):
+        """
+        Body: {"features": {...}} atau {"features": [13 angka]}; dapat juga langsung objek fiturnya.
+        "explain": true (atau ?explain=1) menambahkan atribusi fitur di field "explanation".
+        """
+        try:
+            payload = await read_json(request)
+            instance = payload.get("features", payload) if isinstance(payload, dict) else payload
+            row = row_from_instance(instance)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=422)
+        ready, _ = readiness()
+        if not ready:
+            return JSONResponse({"error": "Model tidak siap. Coba lagi nanti."}, status_code=503)
+        try:
+            return JSONResponse(await predict_one(row, wants_explanation(request, payload)))
+        except Exception as e:
+            logger.error(f"Prediksi API gagal: {e}")
+            return JSONResponse({"error": "Preprocessing gagal."}, status_code=500)
+
+    async def predict_batch(request):
+        """Body: {"instances": [...]} dengan setiap instance berupa objek fitur atau list 13 angka (opsional "explain")."""
+        try:
+            payload = await read_json(request)
+            instances = payload.get("instances") if isinstance(payload, dict) else payload
+            if not isinstance(instances, list) or not instances:
+                raise ValueError("Body harus berisi 'instances' berupa list yang tidak kosong.")
+            if len(instances) > API_MAX_BATCH_ROWS:
+                raise ValueError(f"Maksimal {API_MAX_BATCH_ROWS} baris per request.")
+            rows = [row_from_instance(instance) for instance in instances]
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=422)
+        ready, _ = readiness()
+        if not ready:
+            return JSONResponse({"error": "Model tidak siap. Coba lagi nanti."}, status_code=503)
+        return JSONResponse({"predictions": await run_in_threadpool(predict_many, rows,
+                                                                    wants_explanation(request, payload))})
+
+    return Starlette(routes=[
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+    ])
+
+def run_prefork(asgi_app, host="0.0.0.0", port=API_PORT, workers=API_WORKERS, on_worker_start=None,
+                on_worker_stop=None, on_worker_exit=None, on_started=None):
+    """
+    Menjalankan `workers` proses uvicorn yang di-fork dari proses ini. Model sudah dimuat sebelum
+    fork, sehingga semua worker berbagi halaman memori model secara copy-on-write. Socket dibuat
+    sekali di parent dan diwarisi setiap worker. Worker yang mati dijalankan ulang. Fungsi ini
+    tidak kembali sampai parent menerima SIGTERM/SIGINT.
+
+    Hook: on_worker_start/on_worker_stop dijalankan di dalam worker, on_worker_exit(pid) di parent
+    setelah worker berhenti, on_started() di parent sekali setelah semua worker pertama di-fork
+    (thread milik parent sebaiknya dibuat di sini, bukan sebelum fork).
+    """
+    import uvicorn
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Diwarisi socket hasil accept; tanpa ini header dan body respons terpisah terkena Nagle + delayed ACK (~40 ms)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Proses worker: thread latar belakang baru boleh dibuat setelah fork.
+            # Uvicorn menangkap SIGTERM/SIGINT untuk shutdown graceful lalu memicu ulang sinyal itu ke handler
+            # sebelumnya; handler kosong membuat worker tetap hidup sampai on_worker_stop selesai.
+            signal.signal(signal.SIGTERM, lambda signum, frame: None)
+            signal.signal(signal.SIGINT, lambda signum, frame: None)
+            exit_code = 1
+            try:
+                if on_worker_start is not None:
+                    on_worker_start()
+                server = uvicorn.Server(uvicorn.Config(asgi_app, log_level="warning", access_log=False))
+                server.run(sockets=[sock])
+                if on_worker_stop is not None:
+                    on_worker_stop()
+                exit_code = 0
+            except Exception:
+                logger.exception("Worker API berhenti karena error.")
+            finally:
+                os._exit(exit_code)
+        return pid
+
+    children = {spawn() for _ in range(workers)}
+    logger.info(f"API headless berjalan di http://{host}:{port} dengan {workers} worker (pid {sorted(children)}).")
+    if on_started is not None:
+        on_started()
+
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if on_worker_exit is not None:
+            on_worker_exit(pid)
+        if not stopping:
+            logger.warning(f"Worker {pid} berhenti (status {status}); menjalankan worker pengganti.")
+            time.sleep(1.0)
+            children.add(spawn())
+    sock.close()
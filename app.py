@@ -3,191 +3,432 @@
 # 225150200111005_3 NARENDRA ATHA ABHINAYA_3
 # 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
 
+import time
+_IMPORT_START = time.perf_counter() # Awal startup: waktu import dan time-to-ready dihitung dari sini
+import numpy as np
 import pandas as pd
-import gradio as gr
-import mlflow.pyfunc
-import joblib
 import os
 import sys
-import time
 import threading
+import atexit
 import logging
-from flask import Flask, Response
-from prometheus_client import Gauge, generate_latest, REGISTRY
-from scipy.stats import wasserstein_distance, ks_2samp # Import untuk perhitungan drift
+import json
+import hmac
+import random
+import asyncio
+import argparse
+import tempfile
+from flask import Flask, Response, request
+from prometheus_client import Gauge, Histogram, Counter, CollectorRegistry, generate_latest, multiprocess, REGISTRY
+from inference import (FEATURE_NAMES, DEFAULT_CHUNK_SIZE, BASE_VALUE_COLUMN, CONTRIBUTION_COLUMNS, read_batch_body,
+                       iter_batch_predictions)
+from batching import MicroBatcher, InflightCoalescer
+from input_codec import InputCodec, UI_CHOICES, SLIDER_BOUNDS
+from prediction_cache import PredictionCache
+from prediction_log import PredictionLogWriter, read_recent_rows
+from drift import StreamingDriftMonitor, FEATURES_TO_MONITOR
+from model_cache import ArtifactCache, MODEL_NAME, MODEL_STAGE
+from model_bundle import ModelBundle, warm_up_and_compare
+from model_events import ModelEventWatcher, publish_promotion_event, MODEL_EVENT_FILE, MODEL_RELOAD_TOKEN
+from dataset_store import DatasetStore, DATASET_DIR
+from dataset_format import is_typed_dataset, load_dataframe, TYPED_DATASET_DIR
+from api_server import create_api_app, run_prefork, API_PORT, API_WORKERS
+from shared_bundle import SharedModelStore, SharedBundleWatcher, memory_usage
+# gradio (hanya untuk UI), mlflow (hanya saat memuat model) dan scipy (hanya untuk p-value drift) diimpor saat dibutuhkan
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # --- 1. SETUP PROMETHEUS METRICS ---
 PREDICTION_GAUGE = Gauge('prediction_feature_value', 'Last value of a feature for prediction', ['feature_name'])
+# Metrik untuk micro-batching request prediksi
+BATCH_SIZE_HISTOGRAM = Histogram('prediction_batch_size', 'Number of requests grouped into one model pass',
+                                 buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+QUEUE_DEPTH_GAUGE = Gauge('prediction_queue_depth', 'Number of prediction requests waiting in the batching queue')
+QUEUE_WAIT_HISTOGRAM = Histogram('prediction_queue_wait_seconds', 'Time a request waits in the batching queue',
+                                 buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1))
 # Metrik baru untuk data drift
 DATA_DRIFT_GAUGE = Gauge('data_drift_score', 'Data drift score for a feature', ['feature_name', 'metric_type'])
+# Metrik pergantian model (hot-swap)
+MODEL_SWAP_HISTOGRAM = Histogram('model_swap_duration_seconds', 'Time from loading a new model bundle to promoting it',
+                                 buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+WARMUP_LATENCY_HISTOGRAM = Histogram('model_warmup_latency_seconds', 'Latency of replayed requests while warming up a new bundle',
+                                     buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+MODEL_SWAP_COUNTER = Counter('model_swaps_total', 'Model swap attempts by result', ['result'])
+PROMOTION_TO_SERVING_HISTOGRAM = Histogram('model_promotion_to_serving_seconds', 'Time from model promotion to serving it',
+                                          ['source'], buckets=(0.5, 1, 2, 5, 10, 30, 60, 300, 900, 1800))
+# Waktu pemuatan model awal, dibedakan antara cache hangat (warm) dan dingin (cold)
+MODEL_STARTUP_GAUGE = Gauge('model_startup_seconds', 'Time to load the initial model at startup', ['cache'])
+# Cache hasil prediksi untuk vektor fitur yang berulang
+PREDICTION_CACHE_HITS = Counter('prediction_cache_hits_total', 'Predictions served from the result cache')
+PREDICTION_CACHE_MISSES = Counter('prediction_cache_misses_total', 'Predictions not found in the result cache')
+PREDICTION_CACHE_EVICTIONS = Counter('prediction_cache_evictions_total', 'Entries removed from the result cache', ['reason'])
+# Latensi jalur request: end-to-end dan per tahap (label bernilai tetap agar kardinalitas rendah)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PREDICTION_LATENCY_HISTOGRAM = Histogram('prediction_request_duration_seconds', 'End-to-end latency of a single prediction request',
+                                         buckets=LATENCY_BUCKETS)
+PREDICTION_STAGE_HISTOGRAM = Histogram('prediction_stage_duration_seconds', 'Latency of each stage of the prediction path',
+                                       ['stage'], buckets=LATENCY_BUCKETS)
+# Distribusi probabilitas mentah dan skor risiko terkalibrasi (drift skor terlihat walau kelas prediksi stabil)
+PREDICTION_PROBABILITY_HISTOGRAM = Histogram('prediction_probability', 'Predicted probability of heart disease per prediction',
+                                             ['kind'], buckets=tuple(round(0.1 * i, 1) for i in range(1, 11)))
+PREDICTIONS_COUNTER = Counter('predictions_total', 'Predictions served by outcome and model version', ['outcome', 'model_version'])
+PREDICTION_ERRORS_COUNTER = Counter('prediction_errors_total', 'Failed prediction requests by reason', ['reason'])
+# Child metrik di-resolve sekali di sini; .labels() per request lebih mahal daripada observe() itu sendiri
+STAGE_METRICS = {stage: PREDICTION_STAGE_HISTOGRAM.labels(stage=stage)
+                 for stage in ("map", "impute", "scale", "transform", "predict", "explain", "log")}
+PREDICTIONS_COUNTER_CHILDREN = {} # (outcome, model_version) -> child counter
+ERROR_MODEL_NOT_READY = PREDICTION_ERRORS_COUNTER.labels(reason="model_not_ready")
+ERROR_PREPROCESSING = PREDICTION_ERRORS_COUNTER.labels(reason="preprocessing_failed")
+ERROR_INVALID_INPUT = PREDICTION_ERRORS_COUNTER.labels(reason="invalid_input")
+FEATURE_GAUGES = [PREDICTION_GAUGE.labels(feature_name=feature) for feature in FEATURE_NAMES]
+PROBABILITY_RAW = PREDICTION_PROBABILITY_HISTOGRAM.labels(kind="raw")
+PROBABILITY_RISK_SCORE = PREDICTION_PROBABILITY_HISTOGRAM.labels(kind="risk_score")
+# Request identik yang menumpang hasil request lain yang masih diproses
+PREDICTION_COALESCED_COUNTER = Counter('prediction_coalesced_total', 'Predictions that shared an identical in-flight request')
+# Baris log prediksi yang terbuang karena ring buffer writer penuh (disk lambat atau thread writer macet)
+PREDICTION_LOG_DROPPED_COUNTER = Counter('prediction_log_dropped_rows_total',
+                                         'Prediction log rows discarded because the in-memory buffer was full')
+# Startup bertahap: durasi setiap tahap (import, import_mlflow, model_load, import_gradio, ui_build, ...) dan total sampai siap
+STARTUP_PHASE_GAUGE = Gauge('app_startup_phase_seconds', 'Duration of each startup phase', ['phase'], multiprocess_mode='max')
+TIME_TO_READY_GAUGE = Gauge('app_time_to_ready_seconds', 'Time from the start of app import until the model bundle is ready',
+                            multiprocess_mode='max')
+# Mode MODEL_LOADER=shared: memori setiap proses (label pid dari mode multiprocess 'all') dan generasi bundle bersama
+PROCESS_MEMORY_GAUGE = Gauge('process_memory_bytes', 'Memory of a serving process by kind (rss, pss, shared, private)',
+                             ['kind'], multiprocess_mode='all')
+SHARED_GENERATION_GAUGE = Gauge('shared_model_generation', 'Shared model bundle generation attached by this process',
+                                multiprocess_mode='all')
 print("Metrik Prometheus didefinisikan.")
 
 flask_app = Flask(__name__)
 @flask_app.route("/metrics")
 def get_metrics():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Mode API multi-worker: metrik setiap proses worker digabung dari direktori multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype="text/plain")
     return Response(generate_latest(REGISTRY), mimetype="text/plain")
 
-# Variabel global untuk model, preprocessor, dan data referensi
-model = None
-scaler = None
-imputer = None
-REFERENCE_DATA = None # Akan diisi dengan data training awal
-
-def load_model_and_preprocessors():
-    """
-    Fungsi ini memuat model "Production" terbaru dan preprocessor-nya dari MLflow/DagsHub.
-    """
-    global model, scaler, imputer   
-    try:
-        MODEL_NAME = "HeartDiseaseClassifier"
-        MODEL_STAGE = "Production"
-        model_uri = f"models:/{MODEL_NAME}/{MODEL_STAGE}"
-        
-        logger.info(f"Memuat model dari: {model_uri}")
-        new_model = mlflow.pyfunc.load_model(model_uri) # Muat ke variabel lokal dulu
+@flask_app.route("/healthz")
+def healthz():
+    # Liveness: tersedia sejak tahap pertama startup, sebelum model dimuat
+    return Response(json.dumps({"status": "ok"}), mimetype="application/json")
 
-        client = mlflow.tracking.MlflowClient()
-        # Menggunakan get_latest_versions yang akan deprecated, tapi masih berfungsi
-        latest_version = client.get_latest_versions(name=MODEL_NAME, stages=[MODEL_STAGE])[0]
-        run_id = latest_version.run_id
-        
-        logger.info(f"Mengunduh preprocessor dari run ID: {run_id}")
-        # Mengunduh ke lokasi sementara atau dalam memori jika memungkinkan
-        # Untuk kesederhanaan, kita tetap unduh ke root dir
-        client.download_artifacts(run_id=run_id, path="scaler.joblib", dst_path=".")
-        client.download_artifacts(run_id=run_id, path="imputer.joblib", dst_path=".")
-
-        new_scaler = joblib.load("scaler.joblib")
-        new_imputer = joblib.load("imputer.joblib")
-        
-        # Hanya ganti model dan preprocessor global jika berhasil semua
-        model = new_model
-        scaler = new_scaler
-        imputer = new_imputer
+@flask_app.route("/readyz")
+def readyz():
+    # Readiness: hanya 200 setelah bundle model selesai dimuat
+    ready, detail = api_readiness()
+    return Response(json.dumps({"status": "ready" if ready else "not_ready", **detail}),
+                    status=200 if ready else 503, mimetype="application/json")
 
-        logger.info("Model dan preprocessor berhasil dimuat.")
-        return True, f"Model version {latest_version.version} loaded successfully."
+# Variabel global untuk model, preprocessor, dan data referensi
+# Model + scaler + imputer selalu diganti bersamaan lewat satu referensi ACTIVE_BUNDLE
+ACTIVE_BUNDLE = None
+PREVIOUS_BUNDLE = None # Disimpan agar bisa dikembalikan dengan rollback_model()
+REJECTED_RUN_IDS = set() # Kandidat yang gagal warm-up tidak dicoba ulang setiap polling
+SWAP_LOCK = threading.Lock()
+# Mode API multi-worker: event reload diteruskan lewat file ini ke semua worker (proses ini tidak melayani prediksi)
+RELOAD_EVENT_FILE = None
+DRIFT_MONITOR = None # Histogram referensi + jendela geser, dibangun dari baseline drift bundle aktif
+DRIFT_MONITOR_SOURCE = None # run_id asal baseline, atau "reference_data" untuk fallback data lokal
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "1000"))
+DRIFT_WINDOW_SECONDS = int(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+# "inline": jendela drift diisi setiap request dan skor dihitung thread di proses ini;
+# "external": drift dihitung drift_worker.py dari segmen log, proses serving hanya menulis log
+DRIFT_MODE = os.getenv("DRIFT_MODE", "inline")
+
+# Cache hasil prediksi per (run_id, fitur); dikosongkan setiap kali bundle aktif berganti
+PREDICTION_CACHE = PredictionCache(
+    max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "600")),
+    hit_metric=PREDICTION_CACHE_HITS,
+    miss_metric=PREDICTION_CACHE_MISSES,
+    eviction_metric=PREDICTION_CACHE_EVICTIONS)
+
+# Mode inferensi: "sklearn" (estimator dari model MLflow + joblib) atau "compiled" (array NumPy dari compiled_model.npz)
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "sklearn")
+
+# Cache artefak lokal (model + preprocessor) per run_id, agar startup tidak bergantung pada registry
+MODEL_CACHE = ArtifactCache()
+
+# "worker": setiap worker API memuat ulang model sendiri saat ada versi baru (salinan privat per worker);
+# "shared": supervisor memuat sekali dan menerbitkan array model di memori bersama, worker hanya menempel (mmap)
+MODEL_LOADER = os.getenv("MODEL_LOADER", "worker")
+SHARED_MODEL_STORE = None
+SHARED_GENERATION = None # Generasi bundle bersama yang sedang dilayani proses ini
+REFERENCE_BASELINE = None # Baseline drift dari data referensi lokal, dibangun sekali untuk run tanpa baseline
+
+# Ambang batas promosi model baru setelah warm-up bayangan (shadow)
+SWAP_REPLAY_REQUESTS = int(os.getenv("SWAP_REPLAY_REQUESTS", "200"))
+SWAP_MAX_P99_MS = float(os.getenv("SWAP_MAX_P99_MS", "100"))
+SWAP_MAX_DISAGREEMENT = float(os.getenv("SWAP_MAX_DISAGREEMENT", "0.3"))
+# Saat startup belum ada bundle pembanding, jadi replay hanya untuk menghangatkan jalur kode; cukup beberapa baris
+STARTUP_WARMUP_REQUESTS = int(os.getenv("STARTUP_WARMUP_REQUESTS", "10"))
+# Baris cadangan untuk warm-up jika belum ada request yang tercatat (nilai default UI Gradio)
+DEFAULT_WARMUP_ROW = [54, 1, 3, 131, 249, 0, 1, 149, 0, 1.0, 2, 0, 3]
+
+def is_model_ready():
+    """Model siap jika bundle aktif sudah dimuat lengkap."""
+    bundle = ACTIVE_BUNDLE
+    return bundle is not None and bundle.is_ready()
+
+def get_replay_rows(n):
+    """Request terbaru untuk warm-up: dari memori proses ini, lalu dari segmen log di disk."""
+    rows = PREDICTION_LOG_WRITER.recent_rows(n)
+    if len(rows) < n:
+        rows = read_recent_rows(n - len(rows)) + rows
+    return rows or [DEFAULT_WARMUP_ROW]
+
+def load_reference_data():
+    """Fallback untuk run lama tanpa baseline drift: kolom yang dipantau dari dataset lokal."""
+    data_dir = 'data'
+    old_file = os.path.join(data_dir, 'old_data.csv')
+    combined_file = os.path.join(data_dir, 'combined_data.csv')
 
-    except Exception as e:
-        error_message = f"Error saat memuat model atau preprocessor: {e}"
-        logger.error(error_message)
-        return False, error_message
+    dataset_store = DatasetStore(DATASET_DIR)
+    if is_typed_dataset(TYPED_DATASET_DIR):
+        # Dataset bertipe di-mmap; hanya kolom yang dipantau yang disentuh
+        reference_data = load_dataframe(TYPED_DATASET_DIR, columns=FEATURES_TO_MONITOR)
+        source = TYPED_DATASET_DIR
+    elif dataset_store.exists():
+        # Hanya kolom yang dipantau yang dibaca dari partisi dataset store
+        reference_data = dataset_store.read(columns=FEATURES_TO_MONITOR)
+        source = dataset_store.root
+    elif os.path.exists(combined_file):
+        reference_data = pd.read_csv(combined_file, usecols=FEATURES_TO_MONITOR)
+        source = combined_file
+    elif os.path.exists(old_file):
+        reference_data = pd.read_csv(old_file, usecols=FEATURES_TO_MONITOR)
+        source = old_file
+    else:
+        logger.error("Tidak dapat menemukan data referensi (combined_data.csv atau old_data.csv). Drift detection mungkin tidak berfungsi.")
+        return pd.DataFrame()
+    logger.info(f"Memuat data referensi dari {source}. Jumlah baris: {len(reference_data)}")
+    return reference_data
 
-# --- FUNGSI BARU: Pengecekan Model Berkala ---
-def check_for_model_updates(interval_seconds=600): # Cek setiap 10 menit
-    global model, scaler, imputer
-    MODEL_NAME = "HeartDiseaseClassifier"
-    MODEL_STAGE = "Production"
+def activate_drift_monitor(bundle):
+    """
+    Mengganti DRIFT_MONITOR sesuai bundle yang baru aktif, sehingga skor drift selalu dibandingkan
+    dengan data training versi model yang sedang melayani. Jendela geser dimulai ulang karena bin
+    histogram referensi bisa berbeda antar versi.
+    """
+    global DRIFT_MONITOR, DRIFT_MONITOR_SOURCE
+    if DRIFT_MODE == "external":
+        return
+    window_kwargs = {"window_size": DRIFT_WINDOW_SIZE, "window_seconds": DRIFT_WINDOW_SECONDS}
+    if bundle.drift_baseline is not None:
+        DRIFT_MONITOR = StreamingDriftMonitor.from_baseline(bundle.drift_baseline, **window_kwargs)
+        DRIFT_MONITOR_SOURCE = bundle.run_id
+        logger.info(f"Baseline drift model versi {bundle.version} dimuat ({len(DRIFT_MONITOR.references)} fitur).")
+    elif DRIFT_MONITOR_SOURCE != "reference_data":
+        reference_data = load_reference_data()
+        if not reference_data.empty:
+            DRIFT_MONITOR = StreamingDriftMonitor.from_dataframe(reference_data, FEATURES_TO_MONITOR, **window_kwargs)
+            DRIFT_MONITOR_SOURCE = "reference_data"
+
+def load_model_and_preprocessors(run_id=None, version=None):
+    """
+    Fungsi ini memuat model "Production" dan preprocessor-nya sebagai ModelBundle baru,
+    menghangatkannya dengan replay request terbaru, lalu menukarnya secara atomik.
+    Artefak diambil dari cache lokal (MODEL_CACHE) dan hanya diunduh jika belum ada.
+    Jika run_id tidak diberikan, versi Production terbaru ditanyakan ke registry.
+    """
+    global ACTIVE_BUNDLE, PREVIOUS_BUNDLE
+    with SWAP_LOCK:
+        try:
+            swap_start = time.perf_counter()
+            if run_id is None:
+                # Menggunakan get_latest_versions yang akan deprecated, tapi masih berfungsi
+                latest_version = get_mlflow_client().get_latest_versions(name=MODEL_NAME, stages=[MODEL_STAGE])[0]
+                run_id, version = latest_version.run_id, latest_version.version
+
+            # Registry/mlflow hanya disentuh jika artefak belum ada di cache lokal
+            _, cache_hit = MODEL_CACHE.ensure(get_mlflow_client, run_id, version)
+            entry_dir = MODEL_CACHE.entry_dir(run_id)
+            logger.info(f"Memuat artefak run {run_id} dari cache {'(hit)' if cache_hit else '(baru diunduh)'}: {entry_dir}")
+            candidate = ModelBundle.load(entry_dir, run_id, version, INFERENCE_MODE) # Muat ke variabel lokal dulu
+
+            # Warm-up bayangan: kandidat belum melayani trafik sampai lolos ambang batas
+            current = ACTIVE_BUNDLE
+            n_replay = SWAP_REPLAY_REQUESTS if current is not None else STARTUP_WARMUP_REQUESTS
+            report = warm_up_and_compare(candidate, current, get_replay_rows(n_replay),
+                                         latency_metric=WARMUP_LATENCY_HISTOGRAM)
+            logger.info(f"Warm-up model versi {version}: {report}")
+            if current is not None and (report["p99_ms"] > SWAP_MAX_P99_MS or report["disagreement"] > SWAP_MAX_DISAGREEMENT):
+                REJECTED_RUN_IDS.add(run_id)
+                MODEL_SWAP_COUNTER.labels(result="rolled_back").inc()
+                return False, (f"Model version {version} ditolak (rollback): p99 {report['p99_ms']:.2f} ms "
+                               f"(maks {SWAP_MAX_P99_MS}), disagreement {report['disagreement']:.3f} (maks {SWAP_MAX_DISAGREEMENT}).")
+
+            # Hanya ganti bundle global jika berhasil semua; satu assignment = swap atomik
+            PREVIOUS_BUNDLE, ACTIVE_BUNDLE = current, candidate
+            activate_drift_monitor(candidate)
+            PREDICTION_CACHE.clear()
+            MODEL_CACHE.set_production(run_id, version)
+            publish_shared_bundle(candidate)
+            MODEL_SWAP_COUNTER.labels(result="promoted").inc()
+            MODEL_SWAP_HISTOGRAM.observe(time.perf_counter() - swap_start)
+
+            logger.info("Model dan preprocessor berhasil dimuat.")
+            return True, f"Model version {version} loaded successfully."
 
+        except Exception as e:
+            error_message = f"Error saat memuat model atau preprocessor: {e}"
+            logger.error(error_message)
+            return False, error_message
+
+def reference_baseline():
+    """Baseline drift dari data referensi lokal untuk run tanpa artefak baseline (dibangun sekali di supervisor)."""
+    global REFERENCE_BASELINE
+    if REFERENCE_BASELINE is None and DRIFT_MODE != "external":
+        from drift import build_drift_baseline
+        reference_data = load_reference_data()
+        if not reference_data.empty:
+            REFERENCE_BASELINE = build_drift_baseline(reference_data)
+    return REFERENCE_BASELINE
+
+def publish_shared_bundle(bundle):
+    """
+    Supervisor mode MODEL_LOADER=shared: menerbitkan bundle yang baru aktif sebagai generasi baru,
+    sehingga semua worker berpindah tanpa memuat ulang model sendiri. Tidak melakukan apa pun di mode lain.
+    """
+    global SHARED_GENERATION
+    if SHARED_MODEL_STORE is None or not SHARED_MODEL_STORE.is_owner():
+        return None
+    drift_baseline = reference_baseline() if bundle.drift_baseline is None else None
+    generation = SHARED_MODEL_STORE.publish(bundle, drift_baseline)
+    if generation is None:
+        logger.error(f"Model versi {bundle.version} ({type(bundle.model).__name__}) tidak bisa dibagikan (hanya RandomForest); "
+                     f"worker tetap melayani generasi {SHARED_GENERATION}.")
+        return None
+    SHARED_GENERATION = generation
+    SHARED_GENERATION_GAUGE.set(generation)
+    logger.info(f"Bundle model versi {bundle.version} diterbitkan sebagai generasi {generation} di {SHARED_MODEL_STORE.root}.")
+    return generation
+
+def report_process_memory():
+    usage = memory_usage()
+    for kind, value in usage.items():
+        PROCESS_MEMORY_GAUGE.labels(kind=kind).set(value)
+    return usage
+
+def activate_shared_bundle(bundle, generation):
+    """
+    Worker mode MODEL_LOADER=shared: bundle mmap dari supervisor langsung menjadi bundle aktif. Warm-up dan
+    keputusan promosi/rollback sudah dilakukan supervisor; SWAP_LOCK tidak dipakai karena worker yang di-fork
+    ulang bisa mewarisi lock itu dalam keadaan terkunci.
+    """
+    global ACTIVE_BUNDLE, PREVIOUS_BUNDLE, SHARED_GENERATION
+    before = memory_usage()
+    # Bundle lama (termasuk salinan copy-on-write dari supervisor) dilepas; rollback dikelola supervisor
+    ACTIVE_BUNDLE, PREVIOUS_BUNDLE = bundle, None
+    SHARED_GENERATION = generation
+    activate_drift_monitor(bundle)
+    PREDICTION_CACHE.clear()
+    SHARED_GENERATION_GAUGE.set(generation)
+    after = report_process_memory()
+    if before and after:
+        logger.info(f"Worker {os.getpid()} menempel ke generasi {generation} (model versi {bundle.version}): "
+                    f"RSS {before['rss'] / 1024 ** 2:.1f} -> {after['rss'] / 1024 ** 2:.1f} MB, "
+                    f"PSS {before['pss'] / 1024 ** 2:.1f} -> {after['pss'] / 1024 ** 2:.1f} MB")
+
+def rollback_model():
+    """Mengembalikan bundle sebelumnya sebagai bundle aktif (mis. jika model baru bermasalah di produksi)."""
+    global ACTIVE_BUNDLE, PREVIOUS_BUNDLE
+    with SWAP_LOCK:
+        if PREVIOUS_BUNDLE is None:
+            return False, "Tidak ada model sebelumnya untuk rollback."
+        REJECTED_RUN_IDS.add(ACTIVE_BUNDLE.run_id)
+        ACTIVE_BUNDLE, PREVIOUS_BUNDLE = PREVIOUS_BUNDLE, ACTIVE_BUNDLE
+        activate_drift_monitor(ACTIVE_BUNDLE)
+        PREDICTION_CACHE.clear()
+        MODEL_CACHE.set_production(ACTIVE_BUNDLE.run_id, ACTIVE_BUNDLE.version)
+        publish_shared_bundle(ACTIVE_BUNDLE)
+        MODEL_SWAP_COUNTER.labels(result="rolled_back").inc()
+        return True, f"Rollback ke model version {ACTIVE_BUNDLE.version}."
+
+def apply_model_update(run_id, version, promoted_at=None, source="poll"):
+    """
+    Memuat versi Production baru jika berbeda dari bundle aktif. Dipakai bersama oleh
+    endpoint reload, watcher file event, dan polling cadangan.
+    """
+    current_run_id = ACTIVE_BUNDLE.run_id if ACTIVE_BUNDLE is not None else None
+    if run_id == current_run_id:
+        logger.info(f"Model saat ini sudah yang terbaru. Versi: {version}")
+        return True, "Model sudah yang terbaru."
+    if run_id in REJECTED_RUN_IDS:
+        logger.info(f"Versi {version} sebelumnya ditolak saat warm-up. Tetap memakai {current_run_id}.")
+        return False, f"Model version {version} sebelumnya ditolak."
+
+    logger.info(f"Model baru terdeteksi ({source})! Versi saat ini: {current_run_id}, Versi terbaru: {run_id}")
+    success, message = load_model_and_preprocessors(run_id, version)
+    if success:
+        logger.info(f"Berhasil memuat model versi terbaru: {version}")
+        if promoted_at is not None:
+            PROMOTION_TO_SERVING_HISTOGRAM.labels(source=source).observe(max(0.0, time.time() - float(promoted_at)))
+    else:
+        logger.error(f"Gagal memuat model terbaru: {message}")
+    return success, message
+
+def handle_promotion_event(event, source):
+    """Memproses event promosi dari promote_model.py (webhook atau file event)."""
+    run_id, version = event.get("run_id"), event.get("version")
+    if not run_id:
+        # Event tanpa run_id: tanyakan versi Production ke registry
+        latest = get_mlflow_client().get_latest_versions(name=MODEL_NAME, stages=[MODEL_STAGE])[0]
+        run_id, version = latest.run_id, latest.version
+    return apply_model_update(run_id, version, event.get("promoted_at"), source)
+
+@flask_app.route("/admin/reload", methods=["POST"])
+def reload_endpoint():
+    """
+    Endpoint reload terautentikasi (Authorization: Bearer <MODEL_RELOAD_TOKEN>).
+    Model dimuat di thread terpisah, sehingga promote_model.py tidak menunggu warm-up selesai.
+    """
+    if not MODEL_RELOAD_TOKEN:
+        return Response(json.dumps({"error": "Reload endpoint dinonaktifkan (MODEL_RELOAD_TOKEN kosong)."}), status=503, mimetype="application/json")
+    provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(provided, MODEL_RELOAD_TOKEN):
+        return Response(json.dumps({"error": "Unauthorized"}), status=401, mimetype="application/json")
+
+    event = request.get_json(silent=True) or {}
+    if RELOAD_EVENT_FILE:
+        publish_promotion_event(event, event_file=RELOAD_EVENT_FILE, reload_urls=[])
+        return Response(json.dumps({"status": "accepted", "version": event.get("version")}), status=202, mimetype="application/json")
+    threading.Thread(target=handle_promotion_event, args=(event, "webhook"), daemon=True).start()
+    return Response(json.dumps({"status": "accepted", "version": event.get("version")}), status=202, mimetype="application/json")
+
+# --- FUNGSI BARU: Pengecekan Model Berkala (cadangan jika event promosi terlewat) ---
+def check_for_model_updates(interval_seconds=1800, max_backoff_seconds=7200):
+    failures = 0
     while True:
         try:
-            client = mlflow.tracking.MlflowClient()
+            client = get_mlflow_client()
             latest_prod_version_in_registry = client.get_latest_versions(name=MODEL_NAME, stages=[MODEL_STAGE])[0]
-
-            current_run_id = getattr(model, '_run_id', None) 
-            
-            if current_run_id != latest_prod_version_in_registry.run_id:
-                logger.info(f"Model baru terdeteksi di Dagshub! Versi saat ini: {current_run_id}, Versi terbaru: {latest_prod_version_in_registry.run_id}")
-                success, message = load_model_and_preprocessors()
-                if success:
-                    # Perbarui atribut run_id pada model yang baru dimuat
-                    model._run_id = latest_prod_version_in_registry.run_id
-                    logger.info(f"Berhasil memuat model versi terbaru: {latest_prod_version_in_registry.version}")
-                else:
-                    logger.error(f"Gagal memuat model terbaru: {message}")
-            else:
-                logger.info(f"Model saat ini sudah yang terbaru. Versi: {latest_prod_version_in_registry.version}")
-
+            apply_model_update(latest_prod_version_in_registry.run_id, latest_prod_version_in_registry.version, source="poll")
+            failures = 0
         except Exception as e:
+            failures += 1
             logger.error(f"Error saat mengecek update model: {e}")
         
-        time.sleep(interval_seconds)
+        # Jitter agar replika tidak menghantam registry bersamaan; backoff eksponensial saat registry error
+        delay = min(interval_seconds * (2 ** failures), max_backoff_seconds)
+        time.sleep(delay * random.uniform(0.8, 1.2))
 
-# --- FUNGSI BARU: Perhitungan Data Drift ---
-def calculate_data_drift(reference_df, current_df, feature_names_to_monitor):
+# --- FUNGSI BARU: Pengecekan Data Drift Berkala ---
+def check_for_data_drift(interval_seconds=15):
     """
-    Menghitung metrik data drift (Wasserstein Distance dan KS Statistic p-value)
-    untuk fitur-fitur tertentu dan mengirimkannya ke Prometheus.
+    Memperbarui DATA_DRIFT_GAUGE dari DRIFT_MONITOR. Jendela drift diisi langsung oleh setiap
+    prediksi, sehingga tick ini tidak membaca ulang log maupun data referensi dan biayanya konstan.
     """
-    logger.info("Memulai perhitungan data drift...")
-    for feature in feature_names_to_monitor:
-        if feature in reference_df.columns and feature in current_df.columns:
-            # Pastikan data numerik dan handle non-numerik jika ada
-            ref_data = pd.to_numeric(reference_df[feature], errors='coerce').dropna()
-            curr_data = pd.to_numeric(current_df[feature], errors='coerce').dropna()
-
-            if not ref_data.empty and not curr_data.empty:
-                try:
-                    # Wasserstein Distance
-                    wd = wasserstein_distance(ref_data, curr_data)
-                    DATA_DRIFT_GAUGE.labels(feature_name=feature, metric_type='wasserstein_distance').set(wd)
-                    logger.info(f"Drift untuk {feature} (Wasserstein): {wd:.4f}")
-
-                    # Kolmogorov-Smirnov Test (p-value)
-                    # ks_2samp membutuhkan setidaknya 2 sampel di setiap array
-                    if len(ref_data) >= 2 and len(curr_data) >= 2:
-                        ks_stat, p_value = ks_2samp(ref_data, curr_data)
-                        DATA_DRIFT_GAUGE.labels(feature_name=feature, metric_type='ks_p_value').set(p_value)
-                        # Catatan: p-value rendah (<0.05) menunjukkan perbedaan distribusi yang signifikan (drift)
-                        logger.info(f"Drift untuk {feature} (KS p-value): {p_value:.4f}")
-                    else:
-                        logger.warning(f"Tidak cukup sampel untuk KS test pada fitur {feature}. Min 2 sampel diperlukan.")
-
-                except Exception as e:
-                    logger.warning(f"Gagal menghitung drift untuk fitur {feature}: {e}")
-            else:
-                logger.warning(f"Data referensi atau saat ini kosong untuk fitur {feature}. Tidak dapat menghitung drift.")
-        else:
-            logger.warning(f"Fitur '{feature}' tidak ditemukan di data referensi atau data saat ini.")
-    logger.info("Perhitungan data drift selesai.")
-
-# --- FUNGSI BARU: Pengecekan Data Drift Berkala ---
-def check_for_data_drift(interval_seconds=180): # Cek setiap 3 menit
-    global REFERENCE_DATA
-    data_dir = 'data'
-    logs_file = os.path.join(data_dir, 'new_logs.csv')
-    
-    # Fitur-fitur yang ingin dimonitor drift-nya (sesuaikan dengan dataset Anda)
-    # Ini adalah fitur-fitur numerik yang paling mungkin mengalami drift
-    # Pastikan nama-nama ini sesuai dengan kolom di old_data.csv / combined_data.csv
-    features_to_monitor = ['Age', 'BP', 'Cholesterol', 'Max HR', 'ST depression'] 
-
     while True:
         try:
-            if REFERENCE_DATA is None or REFERENCE_DATA.empty:
-                logger.warning("REFERENCE_DATA belum dimuat atau kosong. Melewatkan pengecekan drift.")
-                time.sleep(interval_seconds)
-                continue
-
-            if os.path.exists(logs_file) and os.path.getsize(logs_file) > 0:
-                logger.info(f"Mendeteksi data baru di {logs_file} untuk perhitungan drift.")
-                new_logs_df = pd.read_csv(logs_file)
-                
-                # Pastikan kolom-kolom yang relevan ada di new_logs_df sebelum memilih
-                # Jika ada kolom yang tidak ada, ini akan menyebabkan KeyError
-                missing_cols = [col for col in features_to_monitor if col not in new_logs_df.columns]
-                if missing_cols:
-                    logger.error(f"Kolom yang dimonitor tidak ditemukan di new_logs.csv: {missing_cols}. Melewatkan perhitungan drift.")
-                    time.sleep(interval_seconds)
-                    continue
-
-                current_data_for_drift = new_logs_df[features_to_monitor]
-                
-                calculate_data_drift(REFERENCE_DATA, current_data_for_drift, features_to_monitor)
-                
-                # Setelah diproses, hapus file new_logs.csv
-                os.remove(logs_file) 
-                logger.info(f"File {logs_file} telah diproses dan dihapus.")
+            if DRIFT_MONITOR is None:
+                logger.warning("Distribusi referensi drift belum dibangun. Melewatkan pengecekan drift.")
             else:
-                logger.info(f"Tidak ada data baru di {logs_file}. Melewatkan perhitungan drift.")
-        except pd.errors.EmptyDataError:
-            logger.warning(f"File {logs_file} kosong. Menghapus file kosong.")
-            # Hapus file kosong agar tidak terus-menerus dicek dan menyebabkan EmptyDataError
-            if os.path.exists(logs_file):
-                os.remove(logs_file)
+                for feature, metric_type, value in DRIFT_MONITOR.compute():
+                    DATA_DRIFT_GAUGE.labels(feature_name=feature, metric_type=metric_type).set(value)
         except Exception as e:
             logger.error(f"Error saat mengecek atau menghitung data drift: {e}")
         
@@ -196,6 +437,7 @@ def check_for_data_drift(interval_seconds=180): # Cek setiap 3 menit
 
 # --- 2. KONFIGURASI DAN PEMUATAN MODEL ---
 def setup_mlflow_tracking():
+    import mlflow
     MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
     logger.info(f"Menggunakan MLflow Tracking URI: {MLFLOW_TRACKING_URI}")
     
@@ -211,75 +453,330 @@ def setup_mlflow_tracking():
         logger.info("Menggunakan MLflow Tracking Server lokal...")
         mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 
-setup_mlflow_tracking()
-
-def log_prediction_data(feature_dict):
-    """Mencatat data prediksi baru ke file log."""
-    log_file = 'data/new_logs.csv'
-    df_new = pd.DataFrame([feature_dict])
-    
-    # Jika file sudah ada, tambahkan tanpa header. Jika tidak, buat baru dengan header.
-    if os.path.exists(log_file):
-        df_new.to_csv(log_file, mode='a', header=False, index=False)
-    else:
-        df_new.to_csv(log_file, index=False)
+_MLFLOW_READY = False
+def get_mlflow_client():
+    """MlflowClient; mlflow baru diimpor dan tracking URI diatur pada pemanggilan pertama."""
+    global _MLFLOW_READY
+    if not _MLFLOW_READY:
+        import_start = time.perf_counter()
+        setup_mlflow_tracking()
+        STARTUP_PHASE_GAUGE.labels(phase="import_mlflow").set(time.perf_counter() - import_start)
+        _MLFLOW_READY = True
+    import mlflow
+    return mlflow.tracking.MlflowClient()
+
+# Log prediksi ditulis asinkron: request hanya mengisi buffer di memori
+PREDICTION_LOG_WRITER = PredictionLogWriter(
+    flush_rows=int(os.getenv("LOG_FLUSH_ROWS", "1000")),
+    flush_interval_seconds=float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "5")),
+    segment_max_rows=int(os.getenv("LOG_SEGMENT_MAX_ROWS", "50000")),
+    segment_max_age_seconds=float(os.getenv("LOG_SEGMENT_MAX_AGE_SECONDS", "60")),
+    dropped_metric=PREDICTION_LOG_DROPPED_COUNTER)
+atexit.register(PREDICTION_LOG_WRITER.close) # Pastikan sisa buffer tertulis saat aplikasi berhenti
+
+def log_prediction_data(values, prediction_label):
+    """Mencatat data prediksi baru (nilai berurutan FEATURE_NAMES) ke buffer log dan jendela drift."""
+    PREDICTION_LOG_WRITER.append_values(values, prediction_label)
+    if DRIFT_MONITOR is not None:
+        DRIFT_MONITOR.update(dict(zip(FEATURE_NAMES, values)))
+
+def log_prediction_batch(df_new):
+    """Mencatat banyak baris prediksi sekaligus ke buffer log dan jendela drift."""
+    PREDICTION_LOG_WRITER.append_batch(df_new)
+    if DRIFT_MONITOR is not None:
+        DRIFT_MONITOR.update_batch(df_new)
+
+# --- FUNGSI BARU: Prediksi Batch ---
+def predict_batch_stream(features_df, chunk_size=DEFAULT_CHUNK_SIZE, bundle=None, explain=False):
+    """
+    Memprediksi seluruh DataFrame per chunk dan menghasilkan hasilnya secara bertahap.
+    Setiap chunk dicatat ke log drift dengan satu kali tulis. Dengan explain=True (dan model yang punya
+    explainer), chunk ikut berisi kolom base value dan kontribusi per fitur dari traversal yang sama.
+    """
+    bundle = bundle or ACTIVE_BUNDLE # Seluruh stream memakai satu versi model walaupun terjadi swap di tengah jalan
+    if bundle is None or not bundle.is_ready():
+        raise RuntimeError("Model atau preprocessor belum dimuat. Tidak dapat melakukan prediksi.")
+
+    explainer = bundle.explainer if explain else None
+    for result in iter_batch_predictions(bundle.model, bundle.imputer, bundle.scaler, features_df, chunk_size,
+                                         explainer=explainer):
+        # Skor risiko dari probabilitas chunk yang sama (tanpa evaluasi model tambahan)
+        result['Risk score'] = bundle.risk_scores(result['Probability'].to_numpy())
+        log_prediction_batch(result)
+        for outcome, count in result['Prediction'].value_counts().items():
+            _predictions_counter(outcome, bundle.version).inc(count)
+        _observe_probabilities(result['Probability'], result['Risk score'])
+        yield result
+
+@flask_app.route("/predict/batch", methods=["POST"])
+def predict_batch_endpoint():
+    """
+    Endpoint prediksi batch. Body berupa CSV (text/csv) atau JSON array dengan 13 kolom fitur.
+    Hasil dikirim bertahap sebagai NDJSON (satu objek JSON per baris); ?explain=1 menambahkan atribusi fitur.
+    """
+    explain = request.args.get("explain", "").lower() in ("1", "true")
+    try:
+        chunk_size = int(request.args.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        if chunk_size <= 0:
+            # Dicek sebelum Response streaming dibuat; error di dalam generator tidak bisa lagi menjadi 400
+            raise ValueError("chunk_size harus lebih besar dari 0.")
+        features_df = read_batch_body(request.get_data(), content_type=request.content_type or "text/csv")
+    except ValueError as e:
+        return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+
+    if not is_model_ready():
+        return Response(json.dumps({"error": "Model tidak siap. Coba lagi nanti."}), status=503, mimetype="application/json")
+
+    def generate():
+        row_index = 0
+        for result in predict_batch_stream(features_df, chunk_size, explain=explain):
+            explanations = _chunk_explanations(result, explain)
+            for i, (prediction, probability, risk_score) in enumerate(
+                    zip(result['Prediction'], result['Probability'], result['Risk score'])):
+                response = {"row": row_index, "prediction": prediction, "probability": _optional_float(probability),
+                            "risk_score": _optional_float(risk_score)}
+                if explain:
+                    response["explanation"] = explanations[i]
+                yield json.dumps(response) + "\n"
+                row_index += 1
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 # --- 3. FUNGSI PREDIKSI (DENGAN LOGGING METRIK) ---
-def predict_heart_disease(Age, Sex, Chest_pain_type, BP, Cholesterol, FBS_over_120, EKG_results, Max_HR, Exercise_angina, ST_depression, Slope_of_ST, Number_of_vessels_fluro, Thallium):
-    global model, scaler, imputer # Pastikan variabel global digunakan
-
-    feature_names = ['Age', 'Sex', 'Chest pain type', 'BP', 'Cholesterol', 'FBS over 120', 
-                     'EKG results', 'Max HR', 'Exercise angina', 'ST depression', 'Slope of ST', 
-                     'Number of vessels fluro', 'Thallium']
-    
-    input_values = [Age, Sex, Chest_pain_type, BP, Cholesterol, FBS_over_120, EKG_results, 
-                    Max_HR, Exercise_angina, ST_depression, Slope_of_ST, 
-                    Number_of_vessels_fluro, Thallium]
-    
+def _predict_rows(rows):
+    """Satu kali imputer -> scaler -> model untuk sekumpulan baris dari micro-batcher."""
+    bundle = ACTIVE_BUNDLE # Ambil referensi sekali agar satu batch tidak mencampur versi model
+    predictions, probabilities = bundle.predict_batch(bundle.make_input(rows), STAGE_METRICS)
+    # Kelas dan skor risiko diturunkan dari satu predict_proba; kalibrasi hanya interpolasi atas seluruh batch
+    risk_scores = bundle.risk_scores(probabilities)
+    # Bundle ikut dikembalikan agar hasil disimpan di cache atas nama versi yang benar-benar menghitungnya
+    return [(prediction, probability, risk_score, bundle)
+            for prediction, probability, risk_score in zip(predictions, probabilities, risk_scores)]
+
+def _explain_rows(rows):
+    """Seperti _predict_rows, ditambah atribusi fitur per baris dari traversal forest yang sama."""
+    bundle = ACTIVE_BUNDLE
+    if bundle.explainer is None:
+        # Model tanpa explainer (bukan RandomForest): prediksi biasa, penjelasan kosong
+        return [(*result, None) for result in _predict_rows(rows)]
+    predictions, probabilities, base_value, contributions = bundle.explain_batch(bundle.make_input(rows), STAGE_METRICS)
+    risk_scores = bundle.risk_scores(probabilities)
+    return [(prediction, probability, risk_score, bundle, _explanation(base_value, row_contributions))
+            for prediction, probability, risk_score, row_contributions
+            in zip(predictions, probabilities, risk_scores, contributions)]
+
+def _explanation(base_value, contributions):
+    """Atribusi satu baris: probabilitas mentah = base_value + jumlah kontribusi."""
+    return {"base_value": float(base_value),
+            "contributions": {name: float(value) for name, value in zip(FEATURE_NAMES, contributions)}}
+
+def _chunk_explanations(result, explain):
+    """Atribusi per baris dari kolom kontribusi chunk batch; None per baris jika model tidak punya explainer."""
+    if not explain:
+        return None
+    if BASE_VALUE_COLUMN not in result:
+        return [None] * len(result)
+    return [_explanation(base_value, contributions) for base_value, contributions
+            in zip(result[BASE_VALUE_COLUMN], result[CONTRIBUTION_COLUMNS].to_numpy())]
+
+PREDICTION_BATCHER = MicroBatcher(
+    _predict_rows,
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "64")),
+    max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "5")),
+    batch_size_metric=BATCH_SIZE_HISTOGRAM,
+    queue_depth_metric=QUEUE_DEPTH_GAUGE,
+    queue_wait_metric=QUEUE_WAIT_HISTOGRAM)
+# Request dengan penjelasan dikumpulkan di batcher sendiri agar request biasa tidak ikut membayar overhead atribusi
+EXPLANATION_BATCHER = MicroBatcher(
+    _explain_rows,
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "64")),
+    max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "5")))
+
+# Label UI / payload API -> baris float32 tervalidasi; request identik yang bersamaan berbagi satu perhitungan
+INPUT_CODEC = InputCodec()
+PREDICTION_COALESCER = InflightCoalescer(coalesced_metric=PREDICTION_COALESCED_COUNTER)
+
+def _optional_float(value):
+    return None if pd.isna(value) else float(value)
+
+def _observe_probabilities(probabilities, risk_scores):
+    """Histogram probabilitas mentah dan skor risiko; NaN (model tanpa predict_proba) dilewati."""
+    for histogram, values in ((PROBABILITY_RAW, probabilities), (PROBABILITY_RISK_SCORE, risk_scores)):
+        for value in values:
+            if not pd.isna(value):
+                histogram.observe(value)
+
+def _predictions_counter(outcome, version):
+    counter = PREDICTIONS_COUNTER_CHILDREN.get((outcome, version))
+    if counter is None:
+        counter = PREDICTIONS_COUNTER_CHILDREN[(outcome, version)] = \
+            PREDICTIONS_COUNTER.labels(outcome=outcome, model_version=str(version))
+    return counter
+
+def _start_prediction(row, explain=False):
+    """
+    Bagian awal jalur prediksi satu baris (float32 dari INPUT_CODEC): gauge fitur, cek kesiapan model,
+    cache, lalu penggabungan request identik yang sedang diproses.
+    Mengembalikan (nilai_fitur, hasil_dari_cache, None) atau (nilai_fitur, None, Future dari micro-batcher).
+    Dengan explain=True cache dilewati dan hasil Future berisi penjelasan sebagai elemen kelima.
+    """
+    input_values = row.tolist()
     # Kirim nilai fitur mentah ke Prometheus sebelum diproses
-    for feature, value in zip(feature_names, input_values):
-        PREDICTION_GAUGE.labels(feature_name=feature).set(value)
-    
-    input_data = pd.DataFrame([input_values], columns=feature_names)
-    
-    # Preprocessing
+    for gauge, value in zip(FEATURE_GAUGES, input_values):
+        gauge.set(value)
+
     # Pastikan imputer dan scaler sudah dimuat
-    if imputer is None or scaler is None or model is None:
+    if not is_model_ready():
         logger.error("Model atau preprocessor belum dimuat. Tidak dapat melakukan prediksi.")
-        return "Error: Model tidak siap. Coba lagi nanti."
-
-    # Periksa dan konversi kolom kategorikal jika perlu, sebelum imputasi/scaling
-    # Asumsi: input_data sudah dalam format yang benar untuk imputer/scaler
-    # Jika ada kolom non-numerik, mereka harus di-handle sebelum imputasi/scaling
-    # Contoh: mengonversi string ke numerik sesuai mapping
-    
-    # Contoh sederhana untuk memastikan semua kolom numerik sebelum imputasi/scaling
-    # Anda mungkin perlu logika yang lebih kompleks jika ada banyak kolom kategorikal
-    # yang perlu di-encode sebelum scaling.
-    # Untuk contoh ini, kita asumsikan input_data sudah siap untuk imputer/scaler
-    
-    try:
-        input_imputed = imputer.transform(input_data)
-        input_scaled = scaler.transform(input_imputed)
-        input_processed = pd.DataFrame(input_scaled, columns=feature_names)
-    except Exception as e:
-        logger.error(f"Error during preprocessing: {e}")
-        return "Error: Preprocessing gagal."
-    
-    # Prediksi
-    prediction = model.predict(input_processed)[0]
-    
+        ERROR_MODEL_NOT_READY.inc()
+        raise RuntimeError("Model tidak siap. Coba lagi nanti.")
+
+    if explain:
+        future, _ = PREDICTION_COALESCER.submit(b"explain:" + row.tobytes(), lambda: EXPLANATION_BATCHER.submit(row))
+        return input_values, None, future
+    # Vektor fitur yang sama untuk model yang sama tidak dihitung ulang
+    cached = PREDICTION_CACHE.get(ACTIVE_BUNDLE.run_id, input_values)
+    if cached is not None:
+        return input_values, cached, None
+    # Preprocessing dan prediksi dijalankan bersama request lain dalam satu batch;
+    # duplikat yang datang sebelum hasilnya keluar menumpang hasil batch yang sama (lewat Future masing-masing)
+    future, _ = PREDICTION_COALESCER.submit(row.tobytes(), lambda: PREDICTION_BATCHER.submit(row))
+    return input_values, None, future
+
+def _finish_prediction(input_values, batch_result, request_start):
+    """Menyimpan hasil batcher ke cache, mencatat log/metrik, dan mengembalikan (prediksi, probabilitas, skor risiko, versi)."""
+    prediction, probability, risk_score, computed_by = batch_result[:4]
+    result = (prediction, probability, risk_score, computed_by.version)
+    PREDICTION_CACHE.put(computed_by.run_id, input_values, result)
+    return _record_prediction(input_values, result, request_start)
+
+def _record_prediction(input_values, result, request_start):
+    prediction, probability, risk_score, version = result
     # --- BAGIAN INI UNTUK MENCATAT LOG PREDIKSI ---
+    # Jawaban dari cache tetap dicatat agar jendela drift mencerminkan trafik sebenarnya
     prediction_result = "Presence" if prediction == 1 else "Absence"
-    log_entry = dict(zip(feature_names, input_values))
-    log_entry['Prediction'] = prediction_result 
-    log_prediction_data(log_entry)
-    # --------------------------------------------------------    
-    
-    return "Berisiko Tinggi (Presence)" if prediction == 1 else "Berisiko Rendah (Absence)"
+    stage_start = time.perf_counter()
+    log_prediction_data(input_values, prediction_result)
+    request_end = time.perf_counter()
+    STAGE_METRICS["log"].observe(request_end - stage_start)
+    # --------------------------------------------------------
+
+    _predictions_counter(prediction_result, version).inc()
+    _observe_probabilities((probability,), (risk_score,))
+    PREDICTION_LATENCY_HISTOGRAM.observe(request_end - request_start)
+    return result
+
+def _predict_row_label(row, request_start, explain=False):
+    """
+    Jalur prediksi satu baris untuk UI: mengembalikan status dari kelas prediksi (sama dengan log, metrik, dan
+    label REST) beserta skor risiko terkalibrasi jika ada. Dengan explain=True mengembalikan (status, penjelasan).
+    """
+    label, explanation = _label_and_explanation(row, request_start, explain)
+    return (label, explanation) if explain else label
+
+def _label_and_explanation(row, request_start, explain):
+    try:
+        input_values, cached, future = _start_prediction(row, explain)
+    except RuntimeError:
+        return "Error: Model tidak siap. Coba lagi nanti.", None
+    explanation = None
+    if cached is not None:
+        prediction, _, risk_score, _ = _record_prediction(input_values, cached, request_start)
+    else:
+        try:
+            batch_result = future.result()
+        except Exception as e:
+            logger.error(f"Error during preprocessing: {e}")
+            ERROR_PREPROCESSING.inc()
+            return "Error: Preprocessing gagal.", None
+        prediction, _, risk_score, _ = _finish_prediction(input_values, batch_result, request_start)
+        explanation = batch_result[4] if explain else None
+    status = "Berisiko Tinggi (Presence)" if prediction == 1 else "Berisiko Rendah (Absence)"
+    if pd.isna(risk_score):
+        return status, explanation
+    # Skor risiko hanya ditampilkan; keputusan tetap argmax mentah agar UI tidak berbeda dari log prediksi
+    return f"{status} · skor risiko {float(risk_score):.1%}", explanation
+
+def predict_heart_disease(Age, Sex, Chest_pain_type, BP, Cholesterol, FBS_over_120, EKG_results, Max_HR, Exercise_angina, ST_depression, Slope_of_ST, Number_of_vessels_fluro, Thallium, explain=False):
+    request_start = time.perf_counter()
+    try:
+        row = INPUT_CODEC.encode_values((Age, Sex, Chest_pain_type, BP, Cholesterol, FBS_over_120, EKG_results,
+                                         Max_HR, Exercise_angina, ST_depression, Slope_of_ST,
+                                         Number_of_vessels_fluro, Thallium))
+    except ValueError as e:
+        ERROR_INVALID_INPUT.inc()
+        return (f"Error: Input tidak valid. {e}", None) if explain else f"Error: Input tidak valid. {e}"
+    return _predict_row_label(row, request_start, explain)
+
+def predict_from_ui(*ui_args, explain=False):
+    """Argumen komponen Gradio (label teks) -> status risiko untuk gr.Label, lewat tabel lookup INPUT_CODEC."""
+    request_start = time.perf_counter()
+    try:
+        row = INPUT_CODEC.encode_ui(ui_args)
+    except ValueError as e:
+        ERROR_INVALID_INPUT.inc()
+        return (f"Error: Input tidak valid. {e}", None) if explain else f"Error: Input tidak valid. {e}"
+    STAGE_METRICS["map"].observe(time.perf_counter() - request_start)
+    return _predict_row_label(row, request_start, explain)
+
+def explanation_table(explanation):
+    """Penjelasan -> baris tabel UI (fitur, kontribusi) diurutkan dari pengaruh terbesar, diawali base value."""
+    if explanation is None:
+        return None
+    contributions = sorted(explanation["contributions"].items(), key=lambda item: abs(item[1]), reverse=True)
+    return pd.DataFrame([("Base value", explanation["base_value"]), *contributions],
+                        columns=["Fitur", "Kontribusi"]).round(4)
+
+def _prediction_response(result, explain=False, explanation=None):
+    prediction, probability, risk_score, version = result
+    response = {"prediction": int(prediction), "label": "Presence" if prediction == 1 else "Absence",
+                "probability": _optional_float(probability), "risk_score": _optional_float(risk_score),
+                "model_version": str(version)}
+    if explain:
+        # Atribusi menjelaskan probability (mentah), bukan risk_score terkalibrasi; None jika model tidak mendukung
+        response["explanation"] = explanation
+    return response
+
+async def predict_features_async(row, explain=False):
+    """Versi async untuk API headless: event loop tidak diblokir selama menunggu batch dari micro-batcher."""
+    request_start = time.perf_counter()
+    input_values, cached, future = _start_prediction(row, explain)
+    if cached is not None:
+        return _prediction_response(_record_prediction(input_values, cached, request_start))
+    try:
+        # shield: request yang dibatalkan (klien putus, shutdown, timeout) tidak ikut membatalkan Future batcher
+        batch_result = await asyncio.shield(asyncio.wrap_future(future))
+    except Exception:
+        ERROR_PREPROCESSING.inc()
+        raise
+    return _prediction_response(_finish_prediction(input_values, batch_result, request_start), explain,
+                                batch_result[4] if explain else None)
+
+def predict_features_batch(rows, explain=False):
+    """Prediksi banyak baris kode numerik sekaligus (tanpa micro-batcher dan cache) untuk API headless."""
+    features_df = pd.DataFrame(np.vstack(rows), columns=FEATURE_NAMES)
+    bundle = ACTIVE_BUNDLE
+    responses = []
+    for result in predict_batch_stream(features_df, bundle=bundle, explain=explain):
+        explanations = _chunk_explanations(result, explain)
+        for i, (prediction, probability, risk_score) in enumerate(
+                zip(result['Prediction'], result['Probability'], result['Risk score'])):
+            responses.append(_prediction_response((1 if prediction == "Presence" else 0, probability, risk_score,
+                                                   bundle.version), explain, explanations[i] if explain else None))
+    return responses
+
+def api_readiness():
+    bundle = ACTIVE_BUNDLE
+    ready = bundle is not None and bundle.is_ready()
+    detail = {"model_version": str(bundle.version) if bundle is not None else None,
+              "inference_mode": bundle.mode if bundle is not None else INFERENCE_MODE, "pid": os.getpid()}
+    if SHARED_GENERATION is not None:
+        detail["model_generation"] = SHARED_GENERATION
+    return ready, detail
 
 # --- 4. ANTARMUKA GRADIO ---
 def create_gradio_interface():
+    import gradio as gr # Import gradio ~1,5 detik; tidak dibutuhkan di mode headless
     examples_list = [
         [35, "Wanita", "Typical Angina", 120, 190, "Tidak", "Normal", 170, "Tidak", 0.5, "Upsloping", 0, "Normal"],
         [42, "Pria", "Non-anginal Pain", 130, 210, "Tidak", "Normal", 165, "Tidak", 0.0, "Upsloping", 0, "Normal"],
@@ -293,108 +790,189 @@ def create_gradio_interface():
 
         with gr.Row():
             with gr.Column():
-                age_input = gr.Slider(label="Usia", minimum=29, maximum=77, step=1, value=54)
-                sex_input = gr.Radio(label="Jenis Kelamin", choices=["Wanita", "Pria"], value="Pria")
-                cp_input = gr.Dropdown(label="Jenis Nyeri Dada", choices=["Typical Angina", "Atypical Angina", "Non-anginal Pain", "Asymptomatic"], value="Non-anginal Pain")
+                age_input = gr.Slider(label="Usia", minimum=SLIDER_BOUNDS["Age"][0], maximum=SLIDER_BOUNDS["Age"][1], step=1, value=54)
+                sex_input = gr.Radio(label="Jenis Kelamin", choices=list(UI_CHOICES["Sex"]), value="Pria")
+                cp_input = gr.Dropdown(label="Jenis Nyeri Dada", choices=list(UI_CHOICES["Chest pain type"]), value="Non-anginal Pain")
             with gr.Column():
-                bp_input = gr.Slider(label="Tekanan Darah", minimum=94, maximum=200, step=1, value=131)
-                chol_input = gr.Slider(label="Kolesterol", minimum=126, maximum=564, step=1, value=249)
-                max_hr_input = gr.Slider(label="Detak Jantung Maks", minimum=71, maximum=202, step=1, value=149)
+                bp_input = gr.Slider(label="Tekanan Darah", minimum=SLIDER_BOUNDS["BP"][0], maximum=SLIDER_BOUNDS["BP"][1], step=1, value=131)
+                chol_input = gr.Slider(label="Kolesterol", minimum=SLIDER_BOUNDS["Cholesterol"][0], maximum=SLIDER_BOUNDS["Cholesterol"][1], step=1, value=249)
+                max_hr_input = gr.Slider(label="Detak Jantung Maks", minimum=SLIDER_BOUNDS["Max HR"][0], maximum=SLIDER_BOUNDS["Max HR"][1], step=1, value=149)
         with gr.Row():
             with gr.Column():
-                fbs_input = gr.Radio(label="Gula Darah > 120", choices=["Tidak", "Ya"], value="Tidak")
-                ekg_input = gr.Dropdown(label="Hasil EKG", choices=["Normal", "Abnormalitas ST-T", "Hipertrofi Ventrikel Kiri"], value="Abnormalitas ST-T")
-                exang_input = gr.Radio(label="Angina Saat Olahraga", choices=["Tidak", "Ya"], value="Tidak")
-                st_depression_input = gr.Slider(label="ST Depression", minimum=0.0, maximum=6.2, step=0.1, value=1.0)
-                slope_input = gr.Dropdown(label="Slope ST", choices=["Upsloping", "Flat", "Downsloping"], value="Flat")
+                fbs_input = gr.Radio(label="Gula Darah > 120", choices=list(UI_CHOICES["FBS over 120"]), value="Tidak")
+                ekg_input = gr.Dropdown(label="Hasil EKG", choices=list(UI_CHOICES["EKG results"]), value="Abnormalitas ST-T")
+                exang_input = gr.Radio(label="Angina Saat Olahraga", choices=list(UI_CHOICES["Exercise angina"]), value="Tidak")
+                st_depression_input = gr.Slider(label="ST Depression", minimum=SLIDER_BOUNDS["ST depression"][0], maximum=SLIDER_BOUNDS["ST depression"][1], step=0.1, value=1.0)
+                slope_input = gr.Dropdown(label="Slope ST", choices=list(UI_CHOICES["Slope of ST"]), value="Flat")
                 vessels_input = gr.Dropdown(label="Jumlah Pembuluh Terlihat", choices=[0,1,2,3], value=0)
-                thallium_input = gr.Dropdown(label="Thallium", choices=["Normal", "Fixed Defect", "Reversible Defect"], value="Normal")
+                thallium_input = gr.Dropdown(label="Thallium", choices=list(UI_CHOICES["Thallium"]), value="Normal")
             with gr.Column():
+                explain_input = gr.Checkbox(label="Tampilkan kontribusi fitur", value=False)
                 predict_btn = gr.Button("🔮 Lakukan Prediksi", variant="primary")
                 output_label = gr.Label(label="Status Risiko")
+                output_explanation = gr.Dataframe(label="Kontribusi fitur terhadap probabilitas", interactive=False)
+
+        # Wrapper untuk input teks dari UI/Examples; tabel lookup dibangun sekali di INPUT_CODEC
+        def wrapped_predict(Age, Sex_str, cp_str, BP, Chol, FBS_str, ekg_str, Max_HR, exang_str, ST_dep, slope_str, vessel, thallium_str, explain=False):
+            result = predict_from_ui(Age, Sex_str, cp_str, BP, Chol, FBS_str, ekg_str, Max_HR,
+                                     exang_str, ST_dep, slope_str, vessel, thallium_str, explain=bool(explain))
+            label, explanation = result if explain else (result, None)
+            return label, explanation_table(explanation)
 
-        # Fungsi wrapper untuk mapping input teks dari UI/Examples ke angka
-        def wrapped_predict(Age, Sex_str, cp_str, BP, Chol, FBS_str, ekg_str, Max_HR, exang_str, ST_dep, slope_str, vessel, thallium_str):
-            mapping = {
-                "cp": {"Typical Angina": 1, "Atypical Angina": 2, "Non-anginal Pain": 3, "Asymptomatic": 4},
-                "ekg": {"Normal": 0, "Abnormalitas ST-T": 1, "Hipertrofi Ventrikel Kiri": 2},
-                "slope": {"Upsloping": 1, "Flat": 2, "Downsloping": 3},
-                "thallium": {"Normal": 3, "Fixed Defect": 6, "Reversible Defect": 7}
-            }
-            Sex = 0 if Sex_str == "Wanita" else 1
-            FBS = 0 if FBS_str == "Tidak" else 1
-            exang = 0 if exang_str == "Tidak" else 1
-            return predict_heart_disease(
-                Age, Sex, mapping["cp"][cp_str], BP, Chol, FBS, mapping["ekg"][ekg_str], Max_HR, 
-                exang, ST_dep, mapping["slope"][slope_str], vessel, mapping["thallium"][thallium_str])
-        
         inputs_list = [
             age_input, sex_input, cp_input, bp_input, chol_input, fbs_input, 
             ekg_input, max_hr_input, exang_input, st_depression_input, slope_input, 
             vessels_input, thallium_input]
         
-        predict_btn.click(fn=wrapped_predict, inputs=inputs_list, outputs=output_label)
+        # Izinkan klik paralel agar micro-batcher dapat menggabungkan request yang bersamaan
+        predict_btn.click(fn=wrapped_predict, inputs=inputs_list + [explain_input],
+                          outputs=[output_label, output_explanation],
+                          concurrency_limit=int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "64")))
 
         gr.Examples(
             examples=examples_list,
             inputs=inputs_list,
-            outputs=output_label,
+            outputs=[output_label, output_explanation],
             fn=wrapped_predict,
             cache_examples=False) # Set cache_examples to False to avoid potential caching issues during development
     return demo
 
-# --- BLOK EKSEKUSI UTAMA (RESTRUKTURISASI) ---
-if __name__ == "__main__":
-    logger.info("Memulai aplikasi...")
-
-    # 1. Pemuatan Model Awal
-    logger.info("Melakukan pemuatan model awal...")
-    initial_load_success, message = load_model_and_preprocessors()
-    if not initial_load_success:
-        logger.error(f"Gagal memuat model saat startup: {message}. Aplikasi akan berhenti.")
-        sys.exit(1)
-    else:
-        # PENTING: Setelah pemuatan model awal, simpan run_id model yang dimuat
-        client = mlflow.tracking.MlflowClient()
-        latest_version = client.get_latest_versions(name="HeartDiseaseClassifier", stages=["Production"])[0]
-        # Pastikan 'model' tidak None di sini sebelum menambahkan atribut
-        if model:
-            model._run_id = latest_version.run_id
-            logger.info(f"Model awal berhasil dimuat: versi {latest_version.version}, run_id {latest_version.run_id}")
-
-    # 2. Pemuatan Data Referensi untuk Drift Detection
-    data_dir = 'data'
-    old_file = os.path.join(data_dir, 'old_data.csv')
-    combined_file = os.path.join(data_dir, 'combined_data.csv')
-
-    if os.path.exists(combined_file):
-        REFERENCE_DATA = pd.read_csv(combined_file)
-        logger.info(f"Memuat data referensi dari {combined_file}. Jumlah baris: {len(REFERENCE_DATA)}")
-    elif os.path.exists(old_file):
-        REFERENCE_DATA = pd.read_csv(old_file)
-        logger.info(f"Memuat data referensi dari {old_file}. Jumlah baris: {len(REFERENCE_DATA)}")
-    else:
-        logger.error("Tidak dapat menemukan data referensi (combined_data.csv atau old_data.csv). Drift detection mungkin tidak berfungsi.")
-        REFERENCE_DATA = pd.DataFrame() # Inisialisasi kosong agar tidak error lebih lanjut
-
-    # 3. Inisialisasi dan Jalankan Threads
+# --- 5. THREAD LATAR BELAKANG DAN MODE SERVING ---
+def start_metrics_server():
     # Flask server untuk Prometheus
     flask_thread = threading.Thread(target=lambda: flask_app.run(host='0.0.0.0', port=8000), daemon=True)
     flask_thread.start()
     logger.info("Flask server untuk Prometheus berjalan di port 8000.")
 
+def start_model_update_threads(event_file=MODEL_EVENT_FILE):
     # Thread untuk pengecekan update model
-    model_update_thread = threading.Thread(target=check_for_model_updates, args=(600,), daemon=True) # Cek setiap 10 menit
+    # Event promosi (webhook /admin/reload atau file event) adalah jalur utama; polling hanya cadangan lambat
+    if event_file:
+        ModelEventWatcher(event_file, lambda event: handle_promotion_event(event, "file")).start()
+        logger.info(f"Watcher event model memantau {event_file}.")
+    model_update_thread = threading.Thread(target=check_for_model_updates,
+                                           args=(int(os.getenv("MODEL_POLL_INTERVAL_SECONDS", "1800")),), daemon=True)
     model_update_thread.start()
     logger.info("Thread pengecekan update model berjalan.")
 
+def start_drift_thread():
     # Thread untuk pengecekan data drift
-    data_drift_thread = threading.Thread(target=check_for_data_drift, args=(180,), daemon=True) # Cek setiap 3 menit
+    if DRIFT_MODE == "external":
+        logger.info("DRIFT_MODE=external: data drift dihitung oleh drift_worker.py.")
+        return
+    data_drift_thread = threading.Thread(target=check_for_data_drift, args=(int(os.getenv("DRIFT_INTERVAL_SECONDS", "15")),), daemon=True)
     data_drift_thread.start()
     logger.info("Thread pengecekan data drift berjalan.")
 
-    # 4. Menjalankan aplikasi Gradio
+def start_background_threads(event_file=MODEL_EVENT_FILE):
+    start_model_update_threads(event_file)
+    start_drift_thread()
+
+def start_shared_worker():
+    """Worker mode MODEL_LOADER=shared: menempel ke generasi terbaru sebelum melayani, lalu mengikuti penghitung generasi."""
+    watcher = SharedBundleWatcher(SHARED_MODEL_STORE, activate_shared_bundle)
+    watcher.check()
+    watcher.start()
+    start_drift_thread()
+
+def create_prediction_api():
+    return create_api_app(predict_features_async, predict_features_batch, api_readiness)
+
+def serve_api(workers, port):
+    """
+    Mode headless: `workers` proses uvicorn di-fork setelah model dimuat sehingga berbagi memori model
+    (copy-on-write). Setiap worker menjalankan micro-batcher, log prediksi, dan thread latar belakangnya
+    sendiri; proses induk hanya mengawasi worker dan melayani /metrics, probe, serta /admin/reload di port 8000
+    (server itu sudah berjalan sejak tahap pertama startup). Dengan MODEL_LOADER=shared proses induk menjadi
+    supervisor yang juga memuat versi baru dan menerbitkannya di memori bersama untuk semua worker.
+    """
+    global RELOAD_EVENT_FILE, SHARED_MODEL_STORE
+    if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        logger.warning("PROMETHEUS_MULTIPROC_DIR tidak diset: /metrics hanya berisi metrik proses induk, bukan worker.")
+
+    def on_worker_exit(pid):
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            multiprocess.mark_process_dead(pid)
+
+    if MODEL_LOADER == "shared":
+        # Supervisor (proses ini) memegang model dan menangani reload; worker hanya menempel ke generasi terbaru
+        SHARED_MODEL_STORE = SharedModelStore()
+        if publish_shared_bundle(ACTIVE_BUNDLE) is None:
+            SHARED_MODEL_STORE.close()
+            SHARED_MODEL_STORE = None
+            logger.warning("MODEL_LOADER=shared tidak bisa dipakai untuk model ini; kembali ke mode worker.")
+        else:
+            atexit.register(SHARED_MODEL_STORE.close)
+            report_process_memory()
+            run_prefork(create_prediction_api(), port=port, workers=workers,
+                        on_worker_start=start_shared_worker,
+                        on_worker_stop=PREDICTION_LOG_WRITER.close,
+                        on_worker_exit=on_worker_exit,
+                        on_started=start_model_update_threads)
+            return
+
+    # Webhook reload diterima proses induk lalu disebarkan ke semua worker lewat file event
+    RELOAD_EVENT_FILE = MODEL_EVENT_FILE or os.path.join(tempfile.gettempdir(), f"model-event-{os.getpid()}.json")
+    run_prefork(create_prediction_api(), port=port, workers=workers,
+                on_worker_start=lambda: start_background_threads(RELOAD_EVENT_FILE),
+                on_worker_stop=PREDICTION_LOG_WRITER.close, # os._exit di worker melewati atexit
+                on_worker_exit=on_worker_exit)
+
+# --- BLOK EKSEKUSI UTAMA (RESTRUKTURISASI) ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", choices=["ui", "api", "both"], default=os.getenv("SERVE_MODE", "ui"),
+                        help="ui: Gradio (port 7860); api: REST headless multi-worker; both: API + Gradio di /ui dalam satu proses")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Jumlah proses worker untuk --serve api")
+    parser.add_argument("--api-port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    import_seconds = time.perf_counter() - _IMPORT_START
+    STARTUP_PHASE_GAUGE.labels(phase="import").set(import_seconds)
+    logger.info(f"Memulai aplikasi (mode {args.serve}, import {import_seconds:.2f} detik)...")
+
+    # 1. Server metrik + health probe lebih dulu, agar orkestrator melihat proses hidup (readyz 503 sampai model siap)
+    start_metrics_server()
+
+    # 2. Pemuatan Model Awal
+    # Jika cache lokal berisi model Production terakhir, langsung pakai tanpa menunggu registry.
+    # Thread pengecekan update model akan bertanya ke registry di latar belakang.
+    logger.info("Melakukan pemuatan model awal...")
+    startup_start = time.perf_counter()
+    initial_load_success = False
+    production = MODEL_CACHE.get_production()
+    if production and os.path.isdir(MODEL_CACHE.entry_dir(production["run_id"])):
+        cache_state = "warm"
+        initial_load_success, message = load_model_and_preprocessors(production["run_id"], production["version"])
+    if not initial_load_success:
+        cache_state = "cold"
+        initial_load_success, message = load_model_and_preprocessors()
+    if not initial_load_success:
+        logger.error(f"Gagal memuat model saat startup: {message}. Aplikasi akan berhenti.")
+        sys.exit(1)
+    startup_seconds = time.perf_counter() - startup_start
+    MODEL_STARTUP_GAUGE.labels(cache=cache_state).set(startup_seconds)
+    STARTUP_PHASE_GAUGE.labels(phase="model_load").set(startup_seconds)
+    # Sejak titik ini /readyz bernilai 200
+    time_to_ready = time.perf_counter() - _IMPORT_START
+    TIME_TO_READY_GAUGE.set(time_to_ready)
+    logger.info(f"Model awal berhasil dimuat (cache {cache_state}, {startup_seconds:.2f} detik, siap {time_to_ready:.2f} detik "
+                f"sejak import): {message}")
+
+    # 3. Menjalankan mode serving yang dipilih
+    if args.serve == "api":
+        serve_api(args.workers, args.api_port)
+        sys.exit(0)
+
+    start_background_threads()
     logger.info("Menjalankan aplikasi Gradio...")
+    ui_start = time.perf_counter()
     demo = create_gradio_interface()
-    demo.launch(server_name="0.0.0.0", server_port=7860)
-
+    STARTUP_PHASE_GAUGE.labels(phase="ui_build").set(time.perf_counter() - ui_start)
+    if args.serve == "both":
+        # Satu proses: API JSON dan UI Gradio (di /ui) berbagi model, micro-batcher, dan cache yang sama
+        import uvicorn
+        import gradio as gr
+        api = gr.mount_gradio_app(create_prediction_api(), demo, path="/ui")
+        uvicorn.run(api, host="0.0.0.0", port=args.api_port, log_level="warning")
+    else:
+        demo.launch(server_name="0.0.0.0", server_port=7860)
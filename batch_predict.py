@@ -0,0 +1,48 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# batch_predict.py
+import argparse
+import sys
+import time
+import app
+from inference import DEFAULT_CHUNK_SIZE, read_batch_input
+
+def run_batch_prediction(input_path, output_path, chunk_size, explain=False):
+    """
+    Memprediksi seluruh isi file input dan menulis hasilnya per chunk ke file output (atau stdout).
+    Dengan explain=True output ikut berisi kolom base value dan kontribusi per fitur.
+    """
+    features_df = read_batch_input(input_path)
+    print(f"Memuat {len(features_df)} baris dari {input_path}.", file=sys.stderr)
+
+    start = time.perf_counter()
+    out = open(output_path, "w", newline="") if output_path != "-" else sys.stdout
+    try:
+        total_rows = 0
+        for i, result in enumerate(app.predict_batch_stream(features_df, chunk_size, explain=explain)):
+            result.to_csv(out, header=(i == 0), index=False)
+            total_rows += len(result)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Selesai memprediksi {total_rows} baris dalam {elapsed:.2f} detik.", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediksi batch untuk file CSV/JSON dengan 13 kolom fitur.")
+    parser.add_argument("--input", type=str, required=True)
+    parser.add_argument("--output", type=str, default="-")
+    parser.add_argument("--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--explain", action="store_true", help="Tambahkan kolom atribusi fitur (base value + kontribusi)")
+    args = parser.parse_args()
+
+    success, message = app.load_model_and_preprocessors()
+    if not success:
+        print(f"Gagal memuat model: {message}", file=sys.stderr)
+        sys.exit(1)
+
+    run_batch_prediction(args.input, args.output, args.chunk_size, args.explain)
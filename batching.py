@@ -0,0 +1,162 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# batching.py
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import CancelledError, Future
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Penjadwal micro-batching: request satu baris dimasukkan ke antrean, lalu thread
+    worker mengelompokkannya menjadi batch yang dibatasi ukuran maksimum dan waktu tunggu
+    maksimum. `predict_fn` menerima list baris dan mengembalikan list hasil dengan urutan sama.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0, max_queue_size=4096,
+                 batch_size_metric=None, queue_depth_metric=None, queue_wait_metric=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._batch_size_metric = batch_size_metric
+        self._queue_depth_metric = queue_depth_metric
+        self._queue_wait_metric = queue_wait_metric
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Menjalankan thread worker (hanya sekali)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, row, timeout=None):
+        """Memasukkan satu baris ke antrean dan mengembalikan Future untuk hasilnya."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        future = Future()
+        self._queue.put((row, future, time.perf_counter()), timeout=timeout)
+        if self._queue_depth_metric is not None:
+            self._queue_depth_metric.set(self._queue.qsize())
+        return future
+
+    def predict(self, row, timeout=None):
+        """Versi blocking dari submit: menunggu sampai hasil batch tersedia."""
+        return self.submit(row, timeout=timeout).result(timeout=timeout)
+
+    def _collect_batch(self):
+        # Tunggu item pertama tanpa batas waktu, lalu kumpulkan sisanya sampai batas ukuran/waktu
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                # Thread worker tidak boleh mati karena satu batch; Future yang belum selesai diberi error
+                logger.exception("Micro-batcher gagal memproses batch.")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process_batch(self, batch):
+        started = time.perf_counter()
+
+        if self._batch_size_metric is not None:
+            self._batch_size_metric.observe(len(batch))
+        if self._queue_depth_metric is not None:
+            self._queue_depth_metric.set(self._queue.qsize())
+        if self._queue_wait_metric is not None:
+            for _, _, enqueued_at in batch:
+                self._queue_wait_metric.observe(started - enqueued_at)
+
+        # Future yang sudah dibatalkan pemanggilnya dibuang; sisanya tidak bisa dibatalkan lagi
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        rows = [row for row, _, _ in batch]
+        try:
+            results = self.predict_fn(rows)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Satu baris bermasalah tidak boleh menggagalkan seluruh batch: ulangi per baris
+            logger.warning(f"Prediksi batch gagal ({e}), mengulang per baris.")
+            for row, future, _ in batch:
+                try:
+                    future.set_result(self.predict_fn([row])[0])
+                except Exception as row_error:
+                    future.set_exception(row_error)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+class InflightCoalescer:
+    """
+    Menggabungkan request identik yang sedang diproses bersamaan: request pertama untuk sebuah kunci
+    memanggil `submit_fn` dan hasil Future-nya dibagikan ke request berikutnya dengan kunci yang sama sampai
+    Future itu selesai. Berbeda dari cache hasil, tidak ada yang disimpan setelah hasil keluar.
+    Setiap pemanggil mendapat Future sendiri, sehingga membatalkan satu pemanggil tidak membatalkan yang lain.
+    """
+
+    def __init__(self, coalesced_metric=None):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._coalesced_metric = coalesced_metric
+
+    def submit(self, key, submit_fn):
+        """Mengembalikan (Future milik pemanggil, True jika menumpang Future request lain)."""
+        with self._lock:
+            shared = self._inflight.get(key)
+            coalesced = shared is not None
+            if coalesced:
+                if self._coalesced_metric is not None:
+                    self._coalesced_metric.inc()
+            else:
+                shared = self._inflight[key] = submit_fn()
+        if not coalesced:
+            # Jika Future sudah selesai, callback langsung dijalankan di sini
+            shared.add_done_callback(lambda done: self._release(key, done))
+        future = Future()
+        shared.add_done_callback(lambda done: _copy_outcome(done, future))
+        return future, coalesced
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def __len__(self):
+        return len(self._inflight)
+
+def _copy_outcome(source, target):
+    """Menyalin hasil/error Future bersama ke Future satu pemanggil (dilewati jika pemanggil sudah membatalkannya)."""
+    if not target.set_running_or_notify_cancel():
+        return
+    if source.cancelled():
+        target.set_exception(CancelledError())
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,61 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_compiled_inference.py
+# Membandingkan pipeline sklearn (imputer -> scaler -> RandomForest) dengan CompiledForest:
+# hasil harus identik pada seluruh dataset, lalu latensi diukur pada batch 1, 64, dan 10k.
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from train import load_data, preprocess_data
+from fast_inference import CompiledForest, export_compiled_model
+from inference import FEATURE_NAMES
+
+def sklearn_predict_proba(model, imputer, scaler, X):
+    X_scaled = scaler.transform(imputer.transform(pd.DataFrame(X, columns=FEATURE_NAMES)))
+    return model.predict_proba(pd.DataFrame(X_scaled, columns=FEATURE_NAMES))
+
+def measure(fn, X, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=str, default="data/combined_data.csv")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    raw_df = load_data(args.dataset)
+    X_train, _, y_train, _, scaler, imputer = preprocess_data(raw_df)
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        compiled = CompiledForest.load(export_compiled_model(model, imputer, scaler, os.path.join(tmp_dir, "compiled_model.npz")))
+
+    X_all = raw_df[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    expected = sklearn_predict_proba(model, imputer, scaler, X_all)
+    actual = compiled.predict_proba(X_all)
+    assert np.array_equal(expected, actual), "Probabilitas CompiledForest berbeda dari pipeline sklearn!"
+    assert np.array_equal(model.classes_.take(expected.argmax(axis=1)), compiled.predict(X_all))
+    print(f"Hasil identik dengan pipeline sklearn untuk {len(X_all)} baris {args.dataset}.")
+
+    rng = np.random.default_rng(42)
+    print(f"{'batch':>8} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>8}")
+    for batch_size in (1, 64, 10_000):
+        X_batch = X_all[rng.integers(0, len(X_all), batch_size)]
+        sklearn_ms = measure(lambda X: sklearn_predict_proba(model, imputer, scaler, X), X_batch, args.repeats)
+        compiled_ms = measure(compiled.predict_proba, X_batch, args.repeats)
+        print(f"{batch_size:>8} {sklearn_ms:>14.3f} {compiled_ms:>14.3f} {sklearn_ms / compiled_ms:>7.1f}x")
@@ -0,0 +1,94 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_dataset_load.py
+# Membandingkan pemuatan dataset lewat CSV (pd.read_csv + mapping label, seperti train.load_data lama)
+# dengan dataset bertipe (.npy int8/float32 + mmap). Setiap pengukuran dijalankan di proses baru
+# agar memori residen (RSS) tidak tercampur antar mode.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset_format import ingest, load_dataframe, CONTINUOUS_FEATURES
+from drift import FEATURES_TO_MONITOR
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def make_scaled_csv(dataset, scale, path, seed=42):
+    """Memperbesar dataset dengan sampling ulang + perturbasi kecil pada fitur kontinu (agar tidak terhapus dedup)."""
+    df = pd.read_csv(dataset)
+    rng = np.random.default_rng(seed)
+    scaled = df.sample(n=len(df) * scale, replace=True, random_state=seed).reset_index(drop=True)
+    for name in ['BP', 'Cholesterol', 'Max HR']:
+        scaled[name] += rng.integers(-3, 4, len(scaled))
+    scaled['ST depression'] = (scaled['ST depression'] + rng.integers(-2, 3, len(scaled)) / 10).clip(lower=0).round(1)
+    scaled.to_csv(path, index=False)
+    return len(scaled)
+
+def child(mode, path):
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    if mode == "csv":
+        df = pd.read_csv(path)
+        df['Heart Disease'] = df['Heart Disease'].map({'Presence': 1, 'Absence': 0})
+    elif mode == "typed":
+        df = load_dataframe(path)
+    else:
+        # Yang dipakai app.py: hanya kolom yang dipantau drift
+        df = load_dataframe(path, columns=FEATURES_TO_MONITOR)
+    elapsed = time.perf_counter() - start
+    # Semua nilai disentuh agar halaman mmap benar-benar dibaca
+    checksum = float(np.nansum(df[CONTINUOUS_FEATURES[0]].to_numpy(dtype=np.float64)))
+    print(json.dumps({"mode": mode, "rows": len(df), "seconds": elapsed,
+                      "rss_delta_mb": rss_mb() - rss_before, "checksum": checksum}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=str, default="data/combined_data.csv")
+    parser.add_argument("--scale", type=int, default=100, help="Kelipatan jumlah baris dataset")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "scaled.csv")
+        typed_dir = os.path.join(tmp_dir, "typed")
+        n_rows = make_scaled_csv(args.dataset, args.scale, csv_path)
+
+        start = time.perf_counter()
+        schema = ingest(csv_path, typed_dir)
+        ingest_seconds = time.perf_counter() - start
+        csv_mb = os.path.getsize(csv_path) / 1024 ** 2
+        typed_mb = sum(os.path.getsize(os.path.join(typed_dir, c["file"])) for c in schema["columns"]) / 1024 ** 2
+        print(f"Dataset: {n_rows} baris CSV ({csv_mb:.1f} MB) -> {schema['n_rows']} baris bertipe ({typed_mb:.1f} MB), "
+              f"duplikat {schema['rows_duplicate']}, ingest {ingest_seconds:.2f} detik (sekali saja)")
+
+        print(f"{'mode':<16}{'baris':>10}{'waktu (ms)':>14}{'RSS +MB':>10}")
+        for mode, path in [("csv", csv_path), ("typed", typed_dir), ("typed-monitored", typed_dir)]:
+            runs = []
+            for _ in range(args.repeats):
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                        check=True, capture_output=True, text=True, cwd=ROOT).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            seconds = np.median([r["seconds"] for r in runs])
+            rss = np.median([r["rss_delta_mb"] for r in runs])
+            print(f"{mode:<16}{runs[0]['rows']:>10}{seconds * 1000:>14.1f}{rss:>10.1f}")
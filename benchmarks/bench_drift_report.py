@@ -0,0 +1,84 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_drift_report.py
+# Skalabilitas laporan drift offline (drift_report.py) terhadap jumlah proses: data saat ini sintetis
+# 1 juta baris (sampling ulang data referensi + pergeseran pada sebagian fitur), dipecah per jendela
+# baris, lalu compute_drift_report dijalankan dengan 1, 2, 4, ... proses. Statistik referensi diukur
+# terpisah untuk cache dingin (dibangun dari CSV) dan hangat.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from drift_report import load_reference_stats, read_current, make_windows, compute_drift_report, BLOCK_ROWS
+
+def make_current(reference, n_rows, seed=42):
+    """Sampling ulang referensi dengan pergeseran pada paruh kedua data (drift yang muncul di jendela akhir)."""
+    rng = np.random.default_rng(seed)
+    current = reference.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    half = n_rows // 2
+    current.loc[half:, 'Cholesterol'] += 25
+    current.loc[half:, 'Max HR'] -= rng.integers(0, 15, n_rows - half)
+    current.loc[half:, 'Thallium'] = rng.choice([3, 6, 7], n_rows - half, p=[0.2, 0.3, 0.5])
+    return current.astype(np.float32)
+
+def default_worker_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reference", type=str, default=os.path.join(ROOT, "data", "old_data.csv"))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--window_rows", type=int, default=100_000)
+    parser.add_argument("--block_rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        baseline, _ = load_reference_stats(args.reference, cache_dir)
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        load_reference_stats(args.reference, cache_dir)
+        warm_seconds = time.perf_counter() - start
+
+    current = make_current(read_current(args.reference)[0], args.rows)
+    windows = make_windows(len(current), args.window_rows)
+    # Satu run tanpa diukur: import scipy.stats (~0,3 detik) di proses induk tidak ikut ke hasil 1 proses
+    compute_drift_report(baseline, current, windows, workers=1, block_rows=args.block_rows)
+    results = {}
+    for workers in args.workers or default_worker_counts():
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            report = compute_drift_report(baseline, current, windows, workers=workers, block_rows=args.block_rows)
+            timings.append(time.perf_counter() - start)
+        results[workers] = {"median_seconds": float(np.median(timings)), "min_seconds": min(timings)}
+    drifted = sorted(feature for feature, stats in report.items() if stats["drifted"])
+
+    base = results[min(results)]["median_seconds"]
+    print(f"{args.rows} baris, {len(windows)} jendela, {len(report)} fitur, {os.cpu_count()} core")
+    print(f"Statistik referensi: cache dingin {cold_seconds * 1000:.1f} ms, cache hangat {warm_seconds * 1000:.1f} ms")
+    print(f"{'proses':>6} {'median (s)':>11} {'speedup':>8}")
+    for workers, result in results.items():
+        print(f"{workers:>6} {result['median_seconds']:11.3f} {base / result['median_seconds']:8.2f}")
+    print(f"Fitur drift: {', '.join(drifted) or '-'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "windows": len(windows), "cpu_count": os.cpu_count(),
+                       "reference_cold_seconds": cold_seconds, "reference_warm_seconds": warm_seconds,
+                       "results": results, "drifted_features": drifted}, f, indent=2)
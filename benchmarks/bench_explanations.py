@@ -0,0 +1,104 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_explanations.py
+# Overhead atribusi fitur (Saabas dari kontribusi node yang dihitung saat training) terhadap prediksi biasa:
+#   1. Model dilatih dengan train.py ke MLflow store berbasis file lalu dipromosikan ke Production (bench_inference).
+#   2. Latensi satu baris di tingkat model (bundle.predict_batch vs bundle.explain_batch) dan request penuh
+#      predict_heart_disease dengan/tanpa explain=True, lalu waktu per batch untuk beberapa ukuran batch.
+#   3. Sanity check: base_value + jumlah kontribusi = probabilitas dan prediksi sama dengan jalur biasa.
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_inference import ROOT, bench_env, make_requests, percentiles_ms, prepare_model
+
+def time_single(fn, rows):
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        timings.append(time.perf_counter() - start)
+    return percentiles_ms(timings)
+
+def time_batch(fn, features, repeats):
+    fn(features)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(features)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=str, default=os.path.join(ROOT, "data", "combined_data.csv"))
+    parser.add_argument("--inference_mode", choices=["sklearn", "compiled"], default="sklearn")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[64, 1000, 10000])
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--workdir", type=str, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="heart-explain-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        prepare_model(workdir, args.dataset)
+        # app membaca konfigurasi dari environment saat import, jadi diset sebelum import
+        os.environ.update(bench_env(workdir, args.inference_mode))
+        os.chdir(workdir)
+        import app
+        success, message = app.load_model_and_preprocessors()
+        if not success:
+            raise RuntimeError(message)
+        bundle = app.ACTIVE_BUNDLE
+        rows = make_requests(args.dataset, max(args.requests, max(args.batch_sizes)))
+        single = rows[:args.requests]
+
+        results = {"single_row_model": {
+            "predict": time_single(lambda row: bundle.predict_batch(bundle.make_input([row])), single),
+            "explain": time_single(lambda row: bundle.explain_batch(bundle.make_input([row])), single)}}
+        results["single_row_request"] = {
+            "predict": time_single(lambda row: app.predict_heart_disease(*row), single),
+            "explain": time_single(lambda row: app.predict_heart_disease(*row, explain=True), single)}
+        results["batch"] = {}
+        for batch_size in args.batch_sizes:
+            features = bundle.make_input(rows[:batch_size])
+            repeats = max(3, min(200, 20_000 // batch_size))
+            results["batch"][str(batch_size)] = {
+                "predict_ms": time_batch(bundle.predict_batch, features, repeats),
+                "explain_ms": time_batch(bundle.explain_batch, features, repeats)}
+
+        features = bundle.make_input(rows)
+        predictions, probabilities = bundle.predict_batch(features)
+        explained, explained_probabilities, base_value, contributions = bundle.explain_batch(features)
+        results["check"] = {
+            "max_additivity_error": float(np.max(np.abs(base_value + contributions.sum(axis=1) - explained_probabilities))),
+            "max_probability_difference": float(np.max(np.abs(explained_probabilities - probabilities))),
+            "prediction_mismatches": int(np.sum(explained != predictions))}
+        app.PREDICTION_LOG_WRITER.close()
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"INFERENCE_MODE={args.inference_mode}, {args.requests} request satu baris")
+    print(f"{'jalur':<20} {'p50 biasa':>10} {'p50 explain':>12} {'p99 biasa':>10} {'p99 explain':>12}")
+    for name in ("single_row_model", "single_row_request"):
+        plain, explain = results[name]["predict"], results[name]["explain"]
+        print(f"{name:<20} {plain['p50_ms']:10.3f} {explain['p50_ms']:12.3f} {plain['p99_ms']:10.3f} {explain['p99_ms']:12.3f}")
+    print(f"{'batch':>8} {'biasa (ms)':>11} {'explain (ms)':>13} {'overhead':>9}")
+    for batch_size, result in results["batch"].items():
+        print(f"{batch_size:>8} {result['predict_ms']:11.2f} {result['explain_ms']:13.2f} "
+              f"{result['explain_ms'] / result['predict_ms'] - 1:9.1%}")
+    print(f"Cek: {results['check']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"inference_mode": args.inference_mode, **results}, f, indent=2)
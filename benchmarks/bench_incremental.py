@@ -0,0 +1,100 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_incremental.py
+# Retraining inkremental (incremental.py) vs retrain penuh untuk riwayat yang makin besar dengan jumlah
+# data baru tetap: waktu setiap cara dan metrik pada holdout data baru maupun holdout riwayat.
+# Riwayat = old_data.csv yang disampling ulang dengan perturbasi; data baru = sampel synthetic_data.csv.
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset_format import normalize_target
+from drift import build_drift_baseline
+from incremental import incremental_update
+
+def load_xy(path):
+    df = pd.read_csv(path)
+    y = pd.Series(normalize_target(df.pop('Heart Disease')))
+    keep = (y >= 0).to_numpy()
+    return df[keep].reset_index(drop=True).astype(np.float64), y[keep].reset_index(drop=True).astype(int)
+
+def scale_history(X, y, n_rows, seed=42):
+    """Sampling ulang + perturbasi kecil pada fitur kontinu (seperti bench_dataset_load.make_scaled_csv)."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(X), n_rows)
+    X_scaled, y_scaled = X.iloc[idx].reset_index(drop=True).copy(), y.iloc[idx].reset_index(drop=True)
+    for name in ['BP', 'Cholesterol', 'Max HR']:
+        X_scaled[name] += rng.integers(-3, 4, n_rows)
+    return X_scaled, y_scaled
+
+def fit_full(X_raw, y, n_trees):
+    imputer = SimpleImputer(strategy='median')
+    scaler = StandardScaler()
+    X = pd.DataFrame(scaler.fit_transform(imputer.fit_transform(X_raw)), columns=X_raw.columns)
+    return RandomForestClassifier(n_estimators=n_trees, random_state=42).fit(X, y), imputer, scaler
+
+def f1(model, imputer, scaler, X_raw, y):
+    return float(f1_score(y, model.predict(pd.DataFrame(scaler.transform(imputer.transform(X_raw)), columns=X_raw.columns))))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history_rows", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--new_rows", type=int, default=500)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--new_trees", type=int, default=None, help="Default: sebanding porsi data baru")
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    X_old, y_old = load_xy(os.path.join(ROOT, "data", "old_data.csv"))
+    X_syn, y_syn = load_xy(os.path.join(ROOT, "data", "synthetic_data.csv"))
+    X_new, X_new_test, y_new, y_new_test = train_test_split(X_syn, y_syn, train_size=args.new_rows, random_state=0,
+                                                            stratify=y_syn)
+    results = []
+    for n_history in args.history_rows:
+        X_hist, y_hist = scale_history(X_old, y_old, n_history)
+        X_hist, X_hist_test, y_hist, y_hist_test = train_test_split(X_hist, y_hist, test_size=0.2, random_state=0)
+        base, imputer, scaler = fit_full(X_hist, y_hist, args.trees)
+        baseline = build_drift_baseline(X_hist)
+
+        start = time.perf_counter()
+        update = incremental_update(base, imputer, scaler, baseline, X_new, y_new, args.new_trees, args.trees, random_state=1)
+        incremental_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        full = fit_full(pd.concat([X_hist, X_new], ignore_index=True), pd.concat([y_hist, y_new], ignore_index=True),
+                        args.trees)
+        full_seconds = time.perf_counter() - start
+
+        inc = (update["model"], update["imputer"], update["scaler"])
+        results.append({
+            "history_rows": len(X_hist), "new_rows": len(X_new), "n_trees_added": update["summary"]["n_trees_added"],
+            "incremental_seconds": incremental_seconds, "full_seconds": full_seconds,
+            "incremental_f1_new": f1(*inc, X_new_test, y_new_test), "full_f1_new": f1(*full, X_new_test, y_new_test),
+            "base_f1_new": f1(base, imputer, scaler, X_new_test, y_new_test),
+            "incremental_f1_history": f1(*inc, X_hist_test, y_hist_test), "full_f1_history": f1(*full, X_hist_test, y_hist_test),
+        })
+
+    print(f"{args.new_rows} baris baru, anggaran {args.trees} pohon")
+    print(f"{'riwayat':>8} {'+pohon':>6} {'inkr (s)':>9} {'penuh (s)':>10} {'speedup':>8} "
+          f"{'F1 baru lama/inkr/penuh':>24} {'F1 riwayat inkr/penuh':>22}")
+    for r in results:
+        print(f"{r['history_rows']:>8} {r['n_trees_added']:>6} {r['incremental_seconds']:9.2f} {r['full_seconds']:10.2f} "
+              f"{r['full_seconds'] / r['incremental_seconds']:8.1f} "
+              f"{r['base_f1_new']:8.3f}/{r['incremental_f1_new']:.3f}/{r['full_f1_new']:.3f} "
+              f"{r['incremental_f1_history']:15.3f}/{r['full_f1_history']:.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,323 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_inference.py
+# Benchmark jalur inferensi yang sepenuhnya offline dan dapat direproduksi:
+#   1. Model dilatih dengan train.py ke MLflow store berbasis file di direktori kerja, lalu dipromosikan ke Production.
+#   2. Request dibangkitkan dari distribusi setiap kolom data/combined_data.csv (seed tetap).
+#   3. Setiap pengukuran berjalan di proses baru (cold start, single-row, batch, konkurensi thread/proses, memori).
+# Hasil ditulis sebagai JSON; --compare menampilkan selisih terhadap hasil commit lain.
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from inference import FEATURE_NAMES
+from input_codec import SLIDER_BOUNDS
+
+MODEL_NAME = "HeartDiseaseClassifier"
+
+# --- Beban kerja ---
+def make_requests(dataset, n, seed=42):
+    """n baris fitur, setiap kolom diambil dari distribusi empiris kolom itu di dataset (nilai hilang dilewati)."""
+    df = pd.read_csv(dataset, usecols=FEATURE_NAMES)
+    rng = np.random.default_rng(seed)
+    columns = [rng.choice(df[name].dropna().to_numpy(dtype=np.float64), size=n) for name in FEATURE_NAMES]
+    # Jalur request menolak nilai di luar batas slider UI; dataset sedikit lebih lebar dari batas itu
+    columns = [np.clip(column, *SLIDER_BOUNDS[name]) if name in SLIDER_BOUNDS else column
+               for name, column in zip(FEATURE_NAMES, columns)]
+    return np.column_stack(columns).tolist()
+
+def rss_mb():
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                usage[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return usage.get("VmRSS", float("nan")), usage.get("VmHWM", float("nan"))
+
+def percentiles_ms(seconds):
+    values = np.asarray(seconds) * 1000
+    return {"p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95)),
+            "p99_ms": float(np.percentile(values, 99)), "mean_ms": float(values.mean())}
+
+# --- Persiapan: model lokal di MLflow store berbasis file ---
+def prepare_model(workdir, dataset):
+    env = bench_env(workdir, "sklearn")
+    subprocess.run([sys.executable, os.path.join(ROOT, "train.py"), "--dataset", os.path.abspath(dataset),
+                    "--experiment_name", "benchmark", "--run_name", "BenchmarkRun"],
+                   cwd=workdir, env=env, check=True, capture_output=True, text=True)
+    import mlflow
+    client = mlflow.tracking.MlflowClient(tracking_uri=env["MLFLOW_TRACKING_URI"])
+    version = max(client.search_model_versions(f"name='{MODEL_NAME}'"), key=lambda v: int(v.version))
+    client.transition_model_version_stage(MODEL_NAME, version.version, "Production", archive_existing_versions=True)
+    return version.run_id, version.version
+
+def bench_env(workdir, inference_mode):
+    env = dict(os.environ)
+    env.pop("DAGSHUB_TOKEN", None)
+    env.update({
+        "MLFLOW_TRACKING_URI": f"file://{os.path.join(workdir, 'mlruns')}",
+        "MODEL_CACHE_DIR": os.path.join(workdir, "cache"),
+        "INFERENCE_MODE": inference_mode,
+        "PREDICTION_CACHE_SIZE": "0", # Yang diukur jalur model, bukan cache hasil
+        "PYTHONPATH": ROOT,
+    })
+    return env
+
+def run_child(workdir, inference_mode, command, args):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", command, "--workdir", workdir] + args,
+                            cwd=workdir, env=bench_env(workdir, inference_mode), check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+# --- Pengukuran (dijalankan di proses anak, cwd = direktori kerja) ---
+def child_cold_start():
+    start = time.perf_counter()
+    import app
+    import_seconds = time.perf_counter() - start
+    rss_after_import, _ = rss_mb()
+    start = time.perf_counter()
+    success, message = app.load_model_and_preprocessors()
+    if not success:
+        raise RuntimeError(message)
+    load_seconds = time.perf_counter() - start
+    rss_after_load, _ = rss_mb()
+    return {"import_seconds": import_seconds, "load_seconds": load_seconds,
+            "rss_after_import_mb": rss_after_import, "rss_after_load_mb": rss_after_load}
+
+def _load_app():
+    import app
+    success, message = app.load_model_and_preprocessors()
+    if not success:
+        raise RuntimeError(message)
+    return app
+
+def child_inference(dataset, n_requests, batch_sizes, threads):
+    app = _load_app()
+    rss_loaded, _ = rss_mb()
+    rows = make_requests(dataset, max(n_requests, max(batch_sizes)))
+    bundle = app.ACTIVE_BUNDLE
+    results = {}
+
+    # Latensi satu baris: model saja (tanpa antrean), lalu jalur request penuh predict_heart_disease
+    timings = []
+    for row in rows[:n_requests]:
+        start = time.perf_counter()
+        bundle.predict_batch(bundle.make_input([row]))
+        timings.append(time.perf_counter() - start)
+    results["single_row_model"] = percentiles_ms(timings)
+    timings = []
+    for row in rows[:n_requests]:
+        start = time.perf_counter()
+        app.predict_heart_disease(*row)
+        timings.append(time.perf_counter() - start)
+    results["single_row_request"] = percentiles_ms(timings)
+
+    # Throughput batch: satu kali imputer -> scaler -> model per batch
+    results["batch"] = {}
+    for batch_size in batch_sizes:
+        features = bundle.make_input(rows[:batch_size])
+        repeats = max(3, min(200, 20_000 // batch_size))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            bundle.predict_batch(features)
+            timings.append(time.perf_counter() - start)
+        median = float(np.median(timings))
+        results["batch"][str(batch_size)] = {"median_ms": median * 1000, "rows_per_second": batch_size / median}
+
+    # Skalabilitas thread: request bersamaan digabung micro-batcher
+    results["threads"] = {}
+    for n_threads in threads:
+        shards = [rows[i:n_requests:n_threads] for i in range(n_threads)]
+        latencies = []
+        def worker(shard):
+            local = []
+            for row in shard:
+                start = time.perf_counter()
+                app.predict_heart_disease(*row)
+                local.append(time.perf_counter() - start)
+            latencies.extend(local)
+        workers = [threading.Thread(target=worker, args=(shard,)) for shard in shards]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        results["threads"][str(n_threads)] = {"requests_per_second": len(latencies) / elapsed, **percentiles_ms(latencies)}
+
+    results["request_allocations"] = request_allocations(app, rows[:min(n_requests, 500)])
+
+    rss_after, peak = rss_mb()
+    results["memory"] = {"rss_after_load_mb": rss_loaded, "rss_after_run_mb": rss_after, "peak_rss_mb": peak}
+    app.PREDICTION_LOG_WRITER.close()
+    return results
+
+def request_allocations(app, rows):
+    """
+    Alokasi per request predict_heart_disease dengan tracemalloc (semua thread, termasuk micro-batcher):
+    puncak memori sementara di atas memori sebelum request, dan memori yang masih tertahan setelah semua request.
+    """
+    import tracemalloc
+    for row in rows[:20]:
+        app.predict_heart_disease(*row)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    peaks = []
+    for row in rows:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        app.predict_heart_disease(*row)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"requests": len(rows), "peak_kib_mean": float(np.mean(peaks)) / 1024,
+            "peak_kib_p99": float(np.percentile(peaks, 99)) / 1024,
+            "retained_bytes_per_request": (retained - baseline) / max(1, len(rows))}
+
+def _process_worker(app, rows, barrier, queue):
+    barrier.wait()
+    start = time.perf_counter()
+    latencies = []
+    for row in rows:
+        t0 = time.perf_counter()
+        app.predict_heart_disease(*row)
+        latencies.append(time.perf_counter() - t0)
+    queue.put((start, time.perf_counter(), latencies))
+    app.PREDICTION_LOG_WRITER.close()
+
+def child_processes(dataset, n_requests, processes):
+    """Model dimuat sekali lalu proses di-fork (seperti --serve api); setiap proses menjalankan micro-batcher sendiri."""
+    app = _load_app()
+    rows = make_requests(dataset, n_requests)
+    ctx = multiprocessing.get_context("fork")
+    results = {}
+    for n_processes in processes:
+        barrier, queue = ctx.Barrier(n_processes), ctx.Queue()
+        procs = [ctx.Process(target=_process_worker, args=(app, rows[i::n_processes], barrier, queue))
+                 for i in range(n_processes)]
+        for proc in procs:
+            proc.start()
+        outputs = [queue.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        latencies = [t for _, _, timings in outputs for t in timings]
+        elapsed = max(end for _, end, _ in outputs) - min(start for start, _, _ in outputs)
+        results[str(n_processes)] = {"requests_per_second": len(latencies) / elapsed, **percentiles_ms(latencies)}
+    return results
+
+# --- Laporan ---
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+def compare(baseline_path, results):
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f)["results"])
+    current = flatten(results)
+    print(f"{'metrik':<58}{'baseline':>12}{'sekarang':>12}{'selisih':>10}")
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name], current[name]
+        change = (after - before) / before * 100 if before else float("nan")
+        print(f"{name:<58}{before:>12.3f}{after:>12.3f}{change:>9.1f}%")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=str, default=os.path.join(ROOT, "data", "combined_data.csv"))
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    parser.add_argument("--workdir", type=str, default=None, help="Direktori kerja (MLflow store, cache model); default sementara")
+    parser.add_argument("--inference_modes", nargs="+", default=["sklearn", "compiled"])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 16, 64, 256, 1024, 10_000])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--compare", type=str, default=None, help="File JSON hasil benchmark sebelumnya")
+    parser.add_argument("--child", choices=["cold_start", "inference", "processes"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child == "cold_start":
+            result = child_cold_start()
+        elif args.child == "inference":
+            result = child_inference(args.dataset, args.requests, args.batch_sizes, args.threads)
+        else:
+            result = child_processes(args.dataset, args.requests, args.processes)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="heart-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        run_id, version = prepare_model(workdir, args.dataset)
+        print(f"Model benchmark dilatih dan dipromosikan (versi {version}, {time.perf_counter() - start:.1f} detik).")
+
+        child_args = ["--dataset", os.path.abspath(args.dataset), "--requests", str(args.requests),
+                      "--batch_sizes", *map(str, args.batch_sizes), "--threads", *map(str, args.threads),
+                      "--processes", *map(str, args.processes)]
+        results = {}
+        for mode in args.inference_modes:
+            # Cold start pertama tanpa cache artefak lokal (unduh dari store), kedua dengan cache hangat
+            shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)
+            cold = run_child(workdir, mode, "cold_start", child_args)
+            warm = run_child(workdir, mode, "cold_start", child_args)
+            results[mode] = {
+                "cold_start": {"cold_cache": cold, "warm_cache": warm},
+                **run_child(workdir, mode, "inference", child_args),
+                "processes": run_child(workdir, mode, "processes", child_args),
+            }
+            r = results[mode]
+            print(f"[{mode}] load dingin {cold['load_seconds']:.2f}s / hangat {warm['load_seconds']:.2f}s, "
+                  f"single-row model p50 {r['single_row_model']['p50_ms']:.2f} ms, request p50 {r['single_row_request']['p50_ms']:.2f} ms, "
+                  f"batch {args.batch_sizes[-1]} {r['batch'][str(args.batch_sizes[-1])]['rows_per_second']:.0f} baris/detik, "
+                  f"RSS {r['memory']['rss_after_run_mb']:.0f} MB")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": __import__("sklearn").__version__,
+            "dataset": os.path.abspath(args.dataset),
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "compare")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil benchmark ditulis ke {args.output}")
+    if args.compare:
+        compare(args.compare, results)
@@ -0,0 +1,170 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/bench_shared_memory.py
+# Memori per worker API headless untuk kedua mode loader (MODEL_LOADER=worker dan shared):
+#   1. Dua versi model dilatih ke MLflow store berbasis file; versi 1 menjadi Production saat server dijalankan.
+#   2. `app.py --serve api --workers N` dijalankan dan diberi trafik, lalu RSS/PSS/private setiap worker diukur.
+#   3. Versi 2 dipromosikan lewat /admin/reload; setelah semua worker melayani versi 2, trafik diulang dan memori diukur lagi.
+# PSS membagi halaman bersama secara rata antar proses, jadi jumlah PSS = memori fisik yang benar-benar dipakai.
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_inference import ROOT, MODEL_NAME, bench_env, make_requests
+from shared_bundle import memory_usage
+
+METRICS_PORT = 8000 # Port tetap server metrik/admin app.py
+RELOAD_TOKEN = "bench-shared-memory"
+
+def train_version(workdir, dataset, run_name):
+    env = bench_env(workdir, "sklearn")
+    subprocess.run([sys.executable, os.path.join(ROOT, "train.py"), "--dataset", os.path.abspath(dataset),
+                    "--experiment_name", "benchmark", "--run_name", run_name],
+                   cwd=workdir, env=env, check=True, capture_output=True, text=True)
+    import mlflow
+    client = mlflow.tracking.MlflowClient(tracking_uri=env["MLFLOW_TRACKING_URI"])
+    version = max(client.search_model_versions(f"name='{MODEL_NAME}'"), key=lambda v: int(v.version))
+    return client, version.run_id, version.version
+
+def http_json(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request(method, path, body=None if body is None else json.dumps(body).encode("utf-8"), headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
+
+def wait_until(predicate, timeout, interval=0.2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if predicate():
+                return True
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(interval)
+    return False
+
+def worker_pids(parent_pid):
+    with open(f"/proc/{parent_pid}/task/{parent_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+def send_traffic(port, rows):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    versions = set()
+    for row in rows:
+        conn.request("POST", "/predict", body=json.dumps({"features": row}).encode("utf-8"),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status == 200:
+            versions.add(payload["model_version"])
+    conn.close()
+    return versions
+
+def measure(parent_pid):
+    to_mb = lambda usage: {kind: value / 1024 ** 2 for kind, value in usage.items()}
+    workers = {pid: to_mb(memory_usage(pid)) for pid in worker_pids(parent_pid)}
+    supervisor = to_mb(memory_usage(parent_pid))
+    return {
+        "supervisor": supervisor,
+        "workers": {str(pid): usage for pid, usage in workers.items()},
+        "mean_worker_rss_mb": sum(u["rss"] for u in workers.values()) / len(workers),
+        "mean_worker_pss_mb": sum(u["pss"] for u in workers.values()) / len(workers),
+        "mean_worker_private_mb": sum(u["private"] for u in workers.values()) / len(workers),
+        "total_pss_mb": supervisor["pss"] + sum(u["pss"] for u in workers.values()),
+    }
+
+def count_log_lines(log_path, text):
+    with open(log_path, errors="replace") as f:
+        return sum(text in line for line in f)
+
+# Baris log yang ditulis setiap worker saat sudah melayani versi baru (pemilihan worker oleh kernel saat accept
+# tidak merata, jadi sampling /readyz bisa butuh puluhan detik untuk melihat semua worker)
+SWITCHED_LOG_LINE = {"worker": "Berhasil memuat model versi terbaru: {version}",
+                     "shared": "(model versi {version})"}
+
+def run_loader(workdir, loader, args, client, v1, v2, rows):
+    # Versi 1 Production saat start; versi 2 baru dipromosikan di tengah benchmark
+    client.transition_model_version_stage(MODEL_NAME, v1[1], "Production", archive_existing_versions=True)
+    # Cache artefak dan log dikosongkan agar startup tidak memakai pointer Production dari mode sebelumnya
+    for path in ("cache", os.path.join("data", "prediction_logs")):
+        shutil.rmtree(os.path.join(workdir, path), ignore_errors=True)
+    env = bench_env(workdir, args.inference_mode)
+    env.update({"MODEL_LOADER": loader, "MODEL_RELOAD_TOKEN": RELOAD_TOKEN, "MODEL_POLL_INTERVAL_SECONDS": "86400",
+                "SWAP_MAX_DISAGREEMENT": "1.0"})
+    log_path = os.path.join(workdir, f"app_{loader}.log")
+    with open(log_path, "w") as log:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py"), "--serve", "api",
+                                   "--workers", str(args.workers), "--api-port", str(args.port)],
+                                  cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not wait_until(lambda: http_json(args.port, "GET", "/readyz")[0] == 200
+                          and len(worker_pids(server.pid)) == args.workers, timeout=120):
+            raise RuntimeError(f"Server mode {loader} tidak siap; lihat {log_path}")
+        send_traffic(args.port, rows)
+        before = measure(server.pid)
+
+        client.transition_model_version_stage(MODEL_NAME, v2[1], "Production", archive_existing_versions=True)
+        reload_start = time.perf_counter()
+        status, _ = http_json(METRICS_PORT, "POST", "/admin/reload", {"run_id": v2[0], "version": v2[1]},
+                              headers={"Authorization": f"Bearer {RELOAD_TOKEN}", "Content-Type": "application/json"})
+        switched_line = SWITCHED_LOG_LINE[loader].format(version=v2[1])
+        if status != 202 or not wait_until(lambda: count_log_lines(log_path, switched_line) >= args.workers,
+                                           timeout=120, interval=0.02):
+            raise RuntimeError(f"Reload ke versi {v2[1]} gagal (mode {loader}); lihat {log_path}")
+        switch_seconds = time.perf_counter() - reload_start
+        versions = send_traffic(args.port, rows)
+        after = measure(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    return {"before_reload": before, "after_reload": after, "switch_seconds": switch_seconds,
+            "versions_after_reload": sorted(versions)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=str, default=os.path.join(ROOT, "data", "combined_data.csv"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500, help="Jumlah request sebelum setiap pengukuran")
+    parser.add_argument("--inference_mode", choices=["sklearn", "compiled"], default="sklearn")
+    parser.add_argument("--loaders", nargs="+", choices=["worker", "shared"], default=["worker", "shared"])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--workdir", type=str, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="heart-shm-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        client, *v1 = train_version(workdir, args.dataset, "SharedMemoryV1")
+        _, *v2 = train_version(workdir, args.dataset, "SharedMemoryV2")
+        rows = make_requests(args.dataset, args.requests)
+        results = {loader: run_loader(workdir, loader, args, client, v1, v2, rows) for loader in args.loaders}
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.workers} worker, INFERENCE_MODE={args.inference_mode} (MB per worker rata-rata; total PSS termasuk supervisor)")
+    print(f"{'loader':<8} {'fase':<14} {'RSS':>8} {'PSS':>8} {'private':>8} {'total PSS':>10}")
+    for loader, result in results.items():
+        for phase in ("before_reload", "after_reload"):
+            m = result[phase]
+            print(f"{loader:<8} {phase:<14} {m['mean_worker_rss_mb']:8.1f} {m['mean_worker_pss_mb']:8.1f} "
+                  f"{m['mean_worker_private_mb']:8.1f} {m['total_pss_mb']:10.1f}")
+        print(f"{loader:<8} semua worker pindah ke versi baru dalam {result['switch_seconds']:.2f} detik")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"workers": args.workers, "inference_mode": args.inference_mode, "results": results}, f, indent=2)
@@ -0,0 +1,121 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# benchmarks/load_test.py
+# Uji beban untuk kedua mode serving dengan beban kerja yang sama:
+#   --mode api : POST /predict ke API headless (python app.py --serve api), koneksi keep-alive per thread
+#   --mode ui  : endpoint Gradio /wrapped_predict lewat gradio_client (python app.py --serve ui)
+# Melaporkan request/detik dan persentil latensi (p50/p95/p99) dari sisi klien.
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+import numpy as np
+
+# Pilihan UI (wrapped_predict) dan kode numerik padanannya (predict_heart_disease / API)
+CHOICES = {
+    "sex": [("Wanita", 0), ("Pria", 1)],
+    "cp": [("Typical Angina", 1), ("Atypical Angina", 2), ("Non-anginal Pain", 3), ("Asymptomatic", 4)],
+    "fbs": [("Tidak", 0), ("Ya", 1)],
+    "ekg": [("Normal", 0), ("Abnormalitas ST-T", 1), ("Hipertrofi Ventrikel Kiri", 2)],
+    "exang": [("Tidak", 0), ("Ya", 1)],
+    "slope": [("Upsloping", 1), ("Flat", 2), ("Downsloping", 3)],
+    "thallium": [("Normal", 3), ("Fixed Defect", 6), ("Reversible Defect", 7)],
+}
+
+def make_workload(n, unique, seed=42):
+    """n request (pasangan argumen UI, baris numerik) diambil dari `unique` vektor fitur berbeda dalam rentang slider UI."""
+    rng = np.random.default_rng(seed)
+    pool = []
+    for _ in range(unique):
+        pick = {name: options[rng.integers(len(options))] for name, options in CHOICES.items()}
+        age, bp, chol, max_hr = int(rng.integers(29, 78)), int(rng.integers(94, 201)), int(rng.integers(126, 565)), int(rng.integers(71, 203))
+        st_dep, vessels = round(float(rng.uniform(0, 6.2)), 1), int(rng.integers(0, 4))
+        ui_args = [age, pick["sex"][0], pick["cp"][0], bp, chol, pick["fbs"][0], pick["ekg"][0], max_hr,
+                   pick["exang"][0], st_dep, pick["slope"][0], vessels, pick["thallium"][0]]
+        row = [age, pick["sex"][1], pick["cp"][1], bp, chol, pick["fbs"][1], pick["ekg"][1], max_hr,
+               pick["exang"][1], st_dep, pick["slope"][1], vessels, pick["thallium"][1]]
+        pool.append((ui_args, row))
+    return [pool[i] for i in rng.integers(0, unique, n)]
+
+def api_worker(url, jobs, latencies, errors):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    for _, row in jobs:
+        body = json.dumps({"features": row}).encode("utf-8") # bytes: header + body dalam satu send() (hindari Nagle/delayed ACK)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+    conn.close()
+
+def ui_worker(url, jobs, latencies, errors):
+    from gradio_client import Client
+    client = Client(url, verbose=False)
+    for ui_args, _ in jobs:
+        start = time.perf_counter()
+        try:
+            client.predict(*ui_args, api_name="/wrapped_predict")
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors.append(1)
+
+def run(mode, url, concurrency, n_requests, unique, warmup):
+    target = api_worker if mode == "api" else ui_worker
+    if warmup:
+        target(url, make_workload(warmup, unique, seed=7), [], [])
+
+    workload = make_workload(n_requests, unique)
+    shards = [workload[i::concurrency] for i in range(concurrency)]
+    latencies, errors = [], []
+    threads = [threading.Thread(target=target, args=(url, shard, latencies, errors)) for shard in shards]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "mode": mode, "url": url, "concurrency": concurrency, "requests": n_requests, "errors": len(errors),
+        "seconds": round(elapsed, 3), "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2) if len(latencies_ms) else None,
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2) if len(latencies_ms) else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2) if len(latencies_ms) else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["api", "ui"], default="api")
+    parser.add_argument("--url", type=str, default=None, help="Default: http://localhost:8080 (api) atau http://localhost:7860 (ui)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--unique", type=int, default=500, help="Jumlah vektor fitur berbeda (mempengaruhi hit rate cache)")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    url = args.url or ("http://localhost:8080" if args.mode == "api" else "http://localhost:7860")
+    results = [run(args.mode, url, c, args.requests, args.unique, args.warmup) for c in args.concurrency]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'mode':<6}{'konkurensi':>12}{'req/detik':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'error':>8}")
+        for r in results:
+            print(f"{r['mode']:<6}{r['concurrency']:>12}{r['requests_per_second']:>12}{r['p50_ms']:>10}"
+                  f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
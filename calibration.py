@@ -0,0 +1,69 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# calibration.py
+# Kalibrasi probabilitas kelas 1 (isotonic atau Platt) yang di-fit di train.py dan dikirim sebagai artefak JSON.
+# Saat serving pemetaannya hanya np.interp / sigmoid atas probabilitas yang sudah dihitung, tanpa sklearn
+# dan tanpa evaluasi forest tambahan.
+import json
+import numpy as np
+
+CALIBRATION_FILE = "calibration.json"
+CALIBRATION_METHODS = ("isotonic", "platt")
+
+class ProbabilityCalibrator:
+    """
+    Pemetaan probabilitas mentah (rata-rata suara pohon) -> skor risiko terkalibrasi.
+    isotonic: interpolasi linear antar titik ambang hasil IsotonicRegression (di luar rentang dipotong);
+    platt: sigmoid(a * p + b). NaN (model tanpa predict_proba) diteruskan apa adanya.
+    """
+
+    def __init__(self, method, params):
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"Metode kalibrasi tidak dikenal: {method}")
+        self.method = method
+        self.params = params
+        if method == "isotonic":
+            self._x = np.asarray(params["x"], dtype=np.float64)
+            self._y = np.asarray(params["y"], dtype=np.float64)
+
+    @classmethod
+    def fit(cls, scores, y, method="isotonic"):
+        """Fit dari probabilitas out-of-sample (OOB atau cross-validation) dan label 0/1."""
+        scores = np.asarray(scores, dtype=np.float64)
+        y = np.asarray(y).astype(int)
+        if method == "isotonic":
+            from sklearn.isotonic import IsotonicRegression
+            iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(scores, y)
+            return cls(method, {"x": iso.X_thresholds_.tolist(), "y": iso.y_thresholds_.tolist()})
+        if method == "platt":
+            from sklearn.linear_model import LogisticRegression
+            lr = LogisticRegression(C=1e6).fit(scores.reshape(-1, 1), y)
+            return cls(method, {"a": float(lr.coef_[0, 0]), "b": float(lr.intercept_[0])})
+        raise ValueError(f"Metode kalibrasi tidak dikenal: {method}")
+
+    def transform(self, probabilities):
+        p = np.asarray(probabilities, dtype=np.float64)
+        if self.method == "isotonic":
+            calibrated = np.interp(p, self._x, self._y)
+        else:
+            calibrated = 1.0 / (1.0 + np.exp(-(self.params["a"] * p + self.params["b"])))
+        return np.where(np.isnan(p), np.nan, calibrated)
+
+    def to_dict(self):
+        return {"format_version": 1, "method": self.method, "params": self.params}
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(payload["method"], payload["params"])
+
+def save_calibration(calibrator, path=CALIBRATION_FILE):
+    with open(path, "w") as f:
+        json.dump(calibrator.to_dict(), f, separators=(",", ":"))
+    return path
+
+def load_calibration(path):
+    with open(path) as f:
+        return ProbabilityCalibrator.from_dict(json.load(f))
@@ -3,62 +3,96 @@
 # 225150200111005_3 NARENDRA ATHA ABHINAYA_3
 # 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
 
-import pandas as pd
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset
-import mlflow
+# check_drift.py
+# Laporan drift offline antara data referensi dan data saat ini (lihat drift_report.py). Statistik referensi
+# di-cache antar run, histogram data saat ini dihitung paralel per fitur/jendela di process pool, ringkasan
+# JSON dicatat ke MLflow, dan HTML hanya dibuat dengan --html.
 import os
+import sys
+import time
+import argparse
+import numpy as np
+from drift_report import (DRIFT_REPORT_FILE, DRIFT_REPORT_HTML_FILE, REFERENCE_CACHE_DIR, BLOCK_ROWS,
+                          load_reference_stats, read_current, make_windows, compute_drift_report,
+                          summarize, save_summary, render_html)
 
-# Muat data referensi
-try:
-    reference_data = pd.read_csv('data/old_data.csv')
-    reference_data.dropna(subset=['Heart Disease'], inplace=True)
-    print("Data referensi (old_data.csv) berhasil dimuat.")
-except FileNotFoundError:
-    print("Error: Pastikan file 'data/old_data.csv' ada.")
-    exit()
+def _metric_name(feature):
+    return feature.lower().replace(' ', '_')
 
-# Muat data saat ini
-try:
-    current_data = pd.read_csv('data/synthetic_data.csv')
-    current_data.dropna(subset=['Heart Disease'], inplace=True)
-    print("Data saat ini (synthetic_data.csv) berhasil dimuat.")
-except FileNotFoundError:
-    print("Error: Pastikan file 'data/synthetic_data.csv' ada.")
-    exit()
-
-# Buat laporan drift data
-print("Membuat laporan data drift...")
-data_drift_report = Report(metrics=[
-    DataDriftPreset(),
-])
+def log_to_mlflow(summary, summary_path, html_path=None, run_name="Pengecekan Drift Data Sintetis"):
+    """Mencatat ringkasan (dan HTML jika ada) sebagai artefak, plus metrik PSI/drift per fitur."""
+    import mlflow
+    from train import setup_mlflow_tracking
+    setup_mlflow_tracking()
+    mlflow.set_experiment("Analisis Drift")
+    with mlflow.start_run(run_name=run_name):
+        mlflow.log_params({"reference": summary["reference"]["source"], "current": summary["current"]["source"],
+                           "n_windows": len(summary["windows"])})
+        metrics = {"share_drifted_features": summary["share_drifted_features"],
+                   "n_drifted_features": summary["n_drifted_features"]}
+        for feature, stats in summary["features"].items():
+            if "psi" in stats:
+                metrics[f"psi_{_metric_name(feature)}"] = stats["psi"]
+                metrics[f"drifted_{_metric_name(feature)}"] = float(stats["drifted"])
+        mlflow.log_metrics(metrics)
+        mlflow.log_artifact(summary_path)
+        if html_path:
+            mlflow.log_artifact(html_path)
 
-# Jalankan perbandingan
-data_drift_report.run(reference_data=reference_data, current_data=current_data)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reference", type=str, default=os.path.join('data', 'old_data.csv'),
+                        help="CSV/parquet/dataset bertipe, atau drift_baseline.json dari run model")
+    parser.add_argument("--current", type=str, default=os.path.join('data', 'synthetic_data.csv'),
+                        help="CSV, file/direktori parquet (mis. data/prediction_logs), atau dataset bertipe")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: semua core)")
+    parser.add_argument("--window_rows", type=int, default=None, help="Jendela per N baris berurutan")
+    parser.add_argument("--window_seconds", type=float, default=None,
+                        help="Jendela waktu berdasarkan kolom Timestamp (log prediksi)")
+    parser.add_argument("--block_rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--output", type=str, default=DRIFT_REPORT_FILE)
+    parser.add_argument("--html", action="store_true", help=f"Ikut membuat {DRIFT_REPORT_HTML_FILE}")
+    parser.add_argument("--cache_dir", type=str, default=REFERENCE_CACHE_DIR)
+    parser.add_argument("--no_mlflow", action="store_true")
+    args = parser.parse_args()
 
-# Simpan laporan sebagai file HTML
-report_path = 'data_drift_report.html'
-data_drift_report.save_html(report_path)
+    timings = {}
+    for path in (args.reference, args.current):
+        if not os.path.exists(path):
+            print(f"Error: Pastikan '{path}' ada.")
+            sys.exit(1)
 
-print(f"\n✅ Laporan data drift berhasil dibuat!")
-print(f"Buka file '{report_path}' di browser Anda untuk melihat hasilnya.")
+    start = time.perf_counter()
+    baseline, cache_hit = load_reference_stats(args.reference, args.cache_dir)
+    timings["reference"] = time.perf_counter() - start
+    print(f"Statistik referensi ({args.reference}) dimuat{' dari cache' if cache_hit else ''}.")
 
-# --- Integrasi dengan MLflow ---
-try:
-    if os.getenv("DAGSHUB_TOKEN"):
-        DAGSHUB_USER = "NalendraMarchelo"
-        DAGSHUB_REPO = "HeartDiseaseDetection"
-        os.environ['MLFLOW_TRACKING_USERNAME'] = DAGSHUB_USER
-        os.environ['MLFLOW_TRACKING_PASSWORD'] = os.getenv("DAGSHUB_TOKEN")
-        mlflow.set_tracking_uri(f"https://dagshub.com/{DAGSHUB_USER}/{DAGSHUB_REPO}.mlflow")
-    else:
-        mlflow.set_tracking_uri("http://localhost:5000")
+    start = time.perf_counter()
+    current, timestamps = read_current(args.current)
+    if timestamps is not None and args.window_seconds and np.any(np.diff(timestamps) < 0):
+        order = np.argsort(timestamps, kind="stable")
+        current, timestamps = current.iloc[order].reset_index(drop=True), timestamps[order]
+    timings["load_current"] = time.perf_counter() - start
+    print(f"Data saat ini ({args.current}) dimuat: {len(current)} baris.")
 
-    mlflow.set_experiment("Analisis Drift")
+    windows = make_windows(len(current), args.window_rows, timestamps, args.window_seconds)
+    start = time.perf_counter()
+    report = compute_drift_report(baseline, current, windows, workers=args.workers, block_rows=args.block_rows)
+    timings["compute"] = time.perf_counter() - start
 
-    with mlflow.start_run(run_name="Pengecekan Drift Data Sintetis"):
-        mlflow.log_artifact(report_path)
-        print("Laporan drift berhasil dicatat sebagai artefak di MLflow.")
+    summary = summarize(report,
+                        {"source": args.reference, "n_rows": baseline.get("n_rows"), "cache_hit": cache_hit},
+                        {"source": args.current, "n_rows": len(current)}, windows, timings)
+    summary_path = save_summary(summary, args.output)
+    html_path = render_html(summary) if args.html else None
+    print(f"{summary['n_drifted_features']} dari {summary['n_features']} fitur drift: "
+          f"{', '.join(summary['drifted_features']) or '-'} (dataset drift: {summary['dataset_drift']})")
+    print(f"\n✅ Ringkasan drift disimpan di '{summary_path}'" + (f" dan laporan HTML di '{html_path}'." if html_path else "."))
 
-except Exception as e:
-    print(f"\nTidak dapat terhubung ke MLflow, melewati pencatatan artefak. Error: {e}")
\ No newline at end of file
+    # --- Integrasi dengan MLflow ---
+    if not args.no_mlflow:
+        try:
+            log_to_mlflow(summary, summary_path, html_path)
+            print("Ringkasan drift berhasil dicatat sebagai artefak di MLflow.")
+        except Exception as e:
+            print(f"\nTidak dapat terhubung ke MLflow, melewati pencatatan artefak. Error: {e}")
@@ -3,28 +3,30 @@
 # 225150200111005_3 NARENDRA ATHA ABHINAYA_3
 # 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
 
-import pandas as pd
 import os
+from dataset_store import DatasetStore, DATASET_DIR
 
 data_dir = 'data'
 old_data_path = os.path.join(data_dir, 'old_data.csv')
 synthetic_data_path = os.path.join(data_dir, 'synthetic_data.csv')
-combined_data_path = os.path.join(data_dir, 'combined_data.csv')
 
 try:
-    old_data = pd.read_csv(old_data_path)
-    synthetic_data = pd.read_csv(synthetic_data_path)
-    print("Berhasil memuat data lama dan data sintetis.")
+    store = DatasetStore(DATASET_DIR)
 
-    # Gabungkan kedua dataset
-    combined_data = pd.concat([old_data, synthetic_data], ignore_index=True)
-    print(f"Data berhasil digabungkan. Total baris data gabungan: {len(combined_data)}")
+    # Setiap file sumber menjadi satu partisi; file yang sudah pernah diimpor dilewati
+    for path in [old_data_path, synthetic_data_path]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        if store.has_source(os.path.basename(path)):
+            print(f"{path} sudah ada di dataset store, dilewati.")
+            continue
+        partition = store.append_csv(path)
+        print(f"Berhasil mengimpor {path} ({partition['rows']} baris).")
 
-    # Simpan dataset gabungan ke file CSV baru
-    combined_data.to_csv(combined_data_path, index=False)
-    print(f"Data gabungan berhasil disimpan di: {combined_data_path}")
+    print(f"Data berhasil digabungkan. Total baris data gabungan: {store.manifest()['total_rows']}")
+    print(f"Data gabungan berhasil disimpan di: {store.root}")
 
 except FileNotFoundError as e:
     print(f"Error: File tidak ditemukan. Pastikan path file sudah benar. Detail: {e}")
 except Exception as e:
-    print(f"Terjadi error: {e}")
\ No newline at end of file
+    print(f"Terjadi error: {e}")
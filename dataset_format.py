@@ -0,0 +1,179 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# dataset_format.py
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from inference import FEATURE_NAMES
+
+TYPED_DATASET_DIR = os.getenv("TYPED_DATASET_DIR", os.path.join('data', 'typed'))
+SCHEMA_FILE = "schema.json"
+TARGET_COLUMN = 'Heart Disease'
+
+# Skema kanonik: kode kategorikal kecil sebagai int8 (-1 = hilang), fitur kontinu sebagai float32 (NaN = hilang)
+CATEGORICAL_FEATURES = ['Sex', 'Chest pain type', 'FBS over 120', 'EKG results', 'Exercise angina',
+                        'Slope of ST', 'Number of vessels fluro', 'Thallium']
+CONTINUOUS_FEATURES = ['Age', 'BP', 'Cholesterol', 'Max HR', 'ST depression']
+CATEGORICAL_MISSING = -1
+
+# Label dari berbagai sumber (CSV asli, data sintetis, hasil pd.read_csv bertipe int/float) -> 0/1
+TARGET_VALUES = {'presence': 1, 'absence': 0, '1': 1, '0': 0, '1.0': 1, '0.0': 0}
+
+def normalize_target(values):
+    """Menormalkan label ke int8 0/1; label kosong atau tidak dikenal menjadi -1."""
+    keys = pd.Series(values, dtype=object).map(lambda v: str(v).strip().lower() if v is not None else None)
+    return keys.map(TARGET_VALUES).fillna(-1).to_numpy(dtype=np.int8)
+
+def _column_file(name):
+    return name.lower().replace(' ', '_') + ".npy"
+
+def _encode_chunk(df):
+    """Mengubah satu chunk DataFrame menjadi dict kolom bertipe sesuai skema, plus jumlah nilai yang ditolak."""
+    columns, rejected = {}, {}
+    for name in CATEGORICAL_FEATURES:
+        raw = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64) if name in df.columns \
+            else np.full(len(df), np.nan)
+        # Kode kategorikal harus bilangan bulat dalam rentang int8; selain itu dianggap hilang
+        valid = np.isfinite(raw) & (raw == np.round(raw)) & (raw >= 0) & (raw <= np.iinfo(np.int8).max)
+        rejected[name] = int((~valid & ~np.isnan(raw)).sum())
+        columns[name] = np.where(valid, raw, CATEGORICAL_MISSING).astype(np.int8)
+    for name in CONTINUOUS_FEATURES:
+        raw = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64) if name in df.columns \
+            else np.full(len(df), np.nan)
+        rejected[name] = int(np.isinf(raw).sum())
+        columns[name] = np.where(np.isfinite(raw), raw, np.nan).astype(np.float32)
+    columns[TARGET_COLUMN] = normalize_target(df[TARGET_COLUMN]) if TARGET_COLUMN in df.columns \
+        else np.full(len(df), -1, dtype=np.int8)
+    return columns, rejected
+
+def _iter_source_chunks(source, chunk_size=100_000):
+    """Chunk DataFrame dari dataset store (direktori) atau satu/lebih file CSV."""
+    if os.path.isdir(source):
+        from dataset_store import DatasetStore
+        yield from DatasetStore(source).scan(columns=FEATURE_NAMES + [TARGET_COLUMN], batch_size=chunk_size)
+    else:
+        for path in source.split(","):
+            yield from pd.read_csv(path, chunksize=chunk_size)
+
+def ingest(source, output_dir=TYPED_DATASET_DIR, chunk_size=100_000):
+    """
+    Menulis dataset bertipe sekali dari sumber mentah: kolom divalidasi dan dikonversi per chunk,
+    baris tanpa label yang valid dibuang, lalu baris duplikat persis dihapus (kemunculan pertama
+    dipertahankan). Hasilnya satu file .npy per kolom + schema.json, ditulis atomik.
+    """
+    chunks, rejected_values = [], {name: 0 for name in FEATURE_NAMES}
+    rows_read = 0
+    for df in _iter_source_chunks(source, chunk_size):
+        columns, rejected = _encode_chunk(df)
+        rows_read += len(df)
+        for name, count in rejected.items():
+            rejected_values[name] += count
+        chunks.append(columns)
+
+    names = FEATURE_NAMES + [TARGET_COLUMN]
+    data = {name: np.concatenate([c[name] for c in chunks]) if chunks else
+            np.empty(0, dtype=np.float32 if name in CONTINUOUS_FEATURES else np.int8) for name in names}
+
+    labeled = data[TARGET_COLUMN] >= 0
+    data = {name: values[labeled] for name, values in data.items()}
+
+    # Deduplikasi: setiap baris dipandang sebagai satu blok byte (29 byte) lalu dicari kemunculan pertamanya
+    records = np.empty(len(data[TARGET_COLUMN]), dtype=[(f"f{i}", data[name].dtype) for i, name in enumerate(names)])
+    for i, name in enumerate(names):
+        records[f"f{i}"] = data[name]
+    _, first_index = np.unique(records.view(np.dtype((np.void, records.dtype.itemsize))), return_index=True)
+    keep = np.sort(first_index)
+    data = {name: np.ascontiguousarray(values[keep]) for name, values in data.items()}
+
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    digest = hashlib.sha256()
+    schema_columns = []
+    for name in names:
+        np.save(os.path.join(tmp_dir, _column_file(name)), data[name])
+        digest.update(data[name].tobytes())
+        kind = "target" if name == TARGET_COLUMN else ("categorical" if name in CATEGORICAL_FEATURES else "continuous")
+        schema_columns.append({"name": name, "file": _column_file(name), "dtype": str(data[name].dtype), "kind": kind,
+                               "missing": "nan" if kind == "continuous" else CATEGORICAL_MISSING})
+    schema = {
+        "format_version": 1,
+        "columns": schema_columns,
+        "n_rows": int(len(data[TARGET_COLUMN])),
+        "source": source,
+        "rows_read": rows_read,
+        "rows_unlabeled": int((~labeled).sum()),
+        "rows_duplicate": int(labeled.sum() - len(keep)),
+        "rejected_values": rejected_values,
+        "content_sha256": digest.hexdigest(),
+        "created_at": time.time(),
+    }
+    with open(os.path.join(tmp_dir, SCHEMA_FILE), "w") as f:
+        json.dump(schema, f, indent=2)
+
+    # Direktori lama diganti seluruhnya; pembaca tidak pernah melihat campuran file lama dan baru
+    old_dir = f"{output_dir.rstrip(os.sep)}.old-{os.getpid()}"
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return schema
+
+def is_typed_dataset(path):
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+def read_schema(path=TYPED_DATASET_DIR):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+def load_columns(path=TYPED_DATASET_DIR, columns=None, mmap=True):
+    """Kolom bertipe apa adanya (int8/float32) sebagai array; dengan mmap halaman baru dibaca saat dipakai."""
+    schema = read_schema(path)
+    wanted = set(columns) if columns is not None else None
+    return {col["name"]: np.load(os.path.join(path, col["file"]), mmap_mode="r" if mmap else None)
+            for col in schema["columns"] if wanted is None or col["name"] in wanted}
+
+def load_dataframe(path=TYPED_DATASET_DIR, columns=None):
+    """
+    DataFrame siap pakai untuk training/referensi: fitur sebagai float32 dengan kode hilang menjadi NaN
+    (agar ditangani imputer) dan target int8 0/1.
+    """
+    arrays = load_columns(path, columns)
+    frame = {}
+    for name in (columns or FEATURE_NAMES + [TARGET_COLUMN]):
+        values = arrays[name]
+        if name in CATEGORICAL_FEATURES:
+            values = np.where(values == CATEGORICAL_MISSING, np.nan, values).astype(np.float32)
+        frame[name] = values
+    return pd.DataFrame(frame)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["ingest", "info"])
+    parser.add_argument("--source", type=str, default=None,
+                        help="Direktori dataset store atau CSV (boleh dipisah koma)")
+    parser.add_argument("--output", type=str, default=TYPED_DATASET_DIR)
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(json.dumps(read_schema(args.output), indent=2))
+        sys.exit(0)
+
+    source = args.source
+    if source is None:
+        # Urutan sumber default: dataset store -> combined_data.csv -> old_data.csv
+        from dataset_store import DatasetStore, DATASET_DIR
+        candidates = [os.path.join('data', 'combined_data.csv'), os.path.join('data', 'old_data.csv')]
+        source = DATASET_DIR if DatasetStore(DATASET_DIR).exists() else next(p for p in candidates if os.path.exists(p))
+    schema = ingest(source, args.output)
+    print(f"Dataset bertipe ditulis ke {args.output}: {schema['n_rows']} baris dari {schema['rows_read']} "
+          f"(tanpa label: {schema['rows_unlabeled']}, duplikat: {schema['rows_duplicate']}).")
@@ -0,0 +1,245 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# dataset_store.py
+import os
+import sys
+import json
+import time
+import uuid
+import fcntl
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from inference import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = os.getenv("DATASET_DIR", os.path.join('data', 'dataset'))
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+TARGET_COLUMN = 'Heart Disease'
+
+# Skema tetap dataset training. Label disimpan apa adanya sebagai string ('Presence'/'Absence'/'0'/'1');
+# 'Prediction' berasal dari log prediksi (bukan label sebenarnya) dan dibiarkan kosong untuk data CSV.
+DATASET_SCHEMA = pa.schema([(name, pa.float64()) for name in FEATURE_NAMES] +
+                           [(TARGET_COLUMN, pa.string()), ('Prediction', pa.string())])
+
+def _conform(table):
+    """Menyesuaikan tabel/batch ke DATASET_SCHEMA: kolom hilang diisi null, kolom lain (mis. Timestamp) dibuang."""
+    arrays = []
+    for field in DATASET_SCHEMA:
+        if field.name in table.column_names:
+            arrays.append(table.column(field.name).cast(field.type))
+        else:
+            arrays.append(pa.nulls(table.num_rows, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=DATASET_SCHEMA)
+
+def _fsync_write_json(path, payload):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def partition_sequence(entry):
+    """Nomor urut commit partisi, dari nama filenya (part-<urutan>-<acak>.parquet)."""
+    return int(entry["path"].split("-")[1])
+
+class _ColumnStats:
+    """Akumulasi min/max/null per kolom selama partisi ditulis batch demi batch."""
+
+    def __init__(self):
+        self.stats = {field.name: {"min": None, "max": None, "nulls": 0} for field in DATASET_SCHEMA}
+
+    def update(self, table):
+        for name, entry in self.stats.items():
+            column = table.column(name)
+            entry["nulls"] += column.null_count
+            if column.null_count == len(column):
+                continue
+            result = pc.min_max(column).as_py()
+            if entry["min"] is None or result["min"] < entry["min"]:
+                entry["min"] = result["min"]
+            if entry["max"] is None or result["max"] > entry["max"]:
+                entry["max"] = result["max"]
+
+class DatasetStore:
+    """
+    Dataset training append-only yang dipartisi menjadi file Parquet. manifest.json adalah satu-satunya
+    sumber kebenaran: partisi baru ditulis ke file sementara lalu baru terlihat setelah manifest diganti
+    secara atomik, sehingga crash di tengah penulisan tidak pernah merusak data yang sudah ada.
+    Menambah data hanya menulis baris baru; partisi lama tidak pernah dibaca ulang atau ditulis ulang.
+    """
+
+    def __init__(self, root=DATASET_DIR):
+        self.root = root
+
+    def _empty_manifest(self):
+        return {
+            "format_version": 1,
+            "schema": [{"name": field.name, "type": str(field.type)} for field in DATASET_SCHEMA],
+            "partitions": [],
+            "total_rows": 0,
+            "next_sequence": 1,
+        }
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.root, MANIFEST_FILE))
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self._empty_manifest()
+
+    def has_source(self, source):
+        return any(p["source"] == source for p in self.manifest()["partitions"])
+
+    def _locked(self):
+        """Lock eksklusif antar proses agar dua penulis tidak menimpa manifest satu sama lain."""
+        os.makedirs(self.root, exist_ok=True)
+        lock = open(os.path.join(self.root, LOCK_FILE), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def append(self, batches, source):
+        """
+        Menulis iterable berisi DataFrame/RecordBatch/Table sebagai satu partisi baru dan meng-commit-nya.
+        Mengembalikan entri manifest partisi tersebut, atau None jika tidak ada baris.
+        """
+        with self._locked():
+            manifest = self.manifest()
+            sequence = manifest["next_sequence"]
+            filename = f"part-{sequence:06d}-{uuid.uuid4().hex[:8]}.parquet"
+            path = os.path.join(self.root, filename)
+            tmp_path = path + ".tmp"
+            stats = _ColumnStats()
+            rows = 0
+            writer = None
+            try:
+                for batch in batches:
+                    if isinstance(batch, pd.DataFrame):
+                        batch = pa.Table.from_pandas(batch, preserve_index=False)
+                    elif isinstance(batch, pa.RecordBatch):
+                        batch = pa.Table.from_batches([batch])
+                    table = _conform(batch)
+                    if table.num_rows == 0:
+                        continue
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, DATASET_SCHEMA)
+                    writer.write_table(table)
+                    stats.update(table)
+                    rows += table.num_rows
+                if writer is None:
+                    return None
+                writer.close()
+                writer = None
+                with open(tmp_path, "rb") as f:
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except Exception:
+                if writer is not None:
+                    writer.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            entry = {
+                "path": filename,
+                "source": source,
+                "rows": rows,
+                "bytes": os.path.getsize(path),
+                "created_at": time.time(),
+                "stats": stats.stats,
+            }
+            manifest["partitions"].append(entry)
+            manifest["total_rows"] += rows
+            manifest["next_sequence"] = sequence + 1
+            # Titik commit: sebelum baris ini partisi baru hanyalah file yatim yang tidak pernah dibaca
+            _fsync_write_json(os.path.join(self.root, MANIFEST_FILE), manifest)
+        logger.info(f"Partisi {filename} ditambahkan dari {source} ({rows} baris).")
+        return entry
+
+    def append_csv(self, csv_path, source=None, block_size=1 << 20):
+        """Mengimpor CSV secara streaming (per blok), tanpa memuat seluruh file ke memori."""
+        header = pacsv.open_csv(csv_path, read_options=pacsv.ReadOptions(block_size=block_size)).schema.names
+        column_types = {field.name: field.type for field in DATASET_SCHEMA if field.name in header}
+        reader = pacsv.open_csv(csv_path, read_options=pacsv.ReadOptions(block_size=block_size),
+                                convert_options=pacsv.ConvertOptions(column_types=column_types))
+        return self.append(reader, source or os.path.basename(csv_path))
+
+    def append_segments(self, segment_paths, source=None):
+        """Mengimpor segmen log prediksi Parquet (row group demi row group) sebagai satu partisi."""
+        def batches():
+            for path in segment_paths:
+                yield from pq.ParquetFile(path).iter_batches()
+        return self.append(batches(), source or f"prediction_logs:{len(segment_paths)}_segments")
+
+    def scan(self, columns=None, batch_size=65_536):
+        """Membaca partisi secara lazy sesuai urutan commit, menghasilkan DataFrame per chunk."""
+        for partition in self.manifest()["partitions"]:
+            parquet_file = pq.ParquetFile(os.path.join(self.root, partition["path"]))
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+
+    def last_sequence(self):
+        """Nomor urut partisi terakhir yang sudah di-commit (0 untuk store kosong)."""
+        return max((partition_sequence(p) for p in self.manifest()["partitions"]), default=0)
+
+    def read(self, columns=None, since_sequence=None, until_sequence=None):
+        """
+        Seluruh dataset (atau kolom tertentu) sebagai satu DataFrame. since_sequence/until_sequence
+        membatasi ke partisi dengan nomor urut > since dan <= until (mis. hanya data baru untuk retraining inkremental).
+        """
+        tables = [pq.read_table(os.path.join(self.root, p["path"]), columns=columns)
+                  for p in self.manifest()["partitions"]
+                  if (since_sequence is None or partition_sequence(p) > since_sequence)
+                  and (until_sequence is None or partition_sequence(p) <= until_sequence)]
+        if not tables:
+            schema = DATASET_SCHEMA if columns is None else pa.schema([DATASET_SCHEMA.field(c) for c in columns])
+            return schema.empty_table().to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def export_csv(self, csv_path):
+        """Menulis dataset ke satu CSV secara streaming (mis. untuk alat yang masih membutuhkan CSV)."""
+        tmp_path = f"{csv_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", newline="") as f:
+            for i, chunk in enumerate(self.scan()):
+                chunk.to_csv(f, index=False, header=(i == 0))
+        os.replace(tmp_path, csv_path)
+
+    def vacuum(self):
+        """Menghapus file partisi yatim (sisa crash sebelum commit) yang tidak tercatat di manifest."""
+        with self._locked():
+            committed = {p["path"] for p in self.manifest()["partitions"]}
+            for filename in os.listdir(self.root):
+                if filename.startswith("part-") and filename not in committed:
+                    os.remove(os.path.join(self.root, filename))
+                    logger.info(f"File partisi yatim dihapus: {filename}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    store = DatasetStore(os.getenv("DATASET_DIR", DATASET_DIR))
+    if command == "info":
+        manifest = store.manifest()
+        print(f"{store.root}: {len(manifest['partitions'])} partisi, {manifest['total_rows']} baris")
+        for p in manifest["partitions"]:
+            print(f"  {p['path']}  {p['rows']:>8} baris  {p['bytes'] / 1024:.0f} KB  sumber={p['source']}")
+    elif command == "import" and len(sys.argv) == 3:
+        store.append_csv(sys.argv[2])
+    elif command == "export" and len(sys.argv) == 3:
+        store.export_csv(sys.argv[2])
+    elif command == "vacuum":
+        store.vacuum()
+    else:
+        print("Penggunaan: python dataset_store.py [info | import <csv> | export <csv> | vacuum]")
+        sys.exit(1)
@@ -0,0 +1,358 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# drift.py
+import json
+import time
+import threading
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+
+# Fitur numerik yang paling mungkin mengalami drift
+FEATURES_TO_MONITOR = ['Age', 'BP', 'Cholesterol', 'Max HR', 'ST depression']
+CATEGORICAL_FEATURES = ['Sex', 'Chest pain type', 'FBS over 120', 'EKG results', 'Exercise angina',
+                        'Slope of ST', 'Number of vessels fluro', 'Thallium']
+
+# Artefak baseline drift yang dicatat train.py di run MLflow yang sama dengan model
+DRIFT_BASELINE_FILE = "drift_baseline.json"
+
+class ReferenceDistribution:
+    """
+    Distribusi referensi satu fitur dalam bentuk histogram bin tetap + CDF yang dihitung sekali.
+    Rentang bin diperlebar dari rentang data referensi agar nilai baru di luar rentang tetap terlihat.
+    """
+
+    def __init__(self, edges, counts):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.n = self.counts.sum()
+        self.cdf = np.cumsum(self.counts) / self.n
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        self.center_gaps = np.diff(centers)
+        self._edge_list = self.edges.tolist() # Untuk bin_index_one: bisect pada list tanpa array sementara
+
+    @classmethod
+    def from_values(cls, values, max_bins=1024, float_bins=256, padding=0.5):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        lo, hi = values.min(), values.max()
+        span = max(hi - lo, 1.0)
+        lo, hi = lo - padding * span, hi + padding * span
+        if np.all(values == np.round(values)) and hi - lo <= max_bins:
+            # Fitur bernilai bulat: satu bin per nilai sehingga Wasserstein/KS eksak untuk data bulat
+            edges = np.arange(np.floor(lo) - 0.5, np.ceil(hi) + 1.0)
+        else:
+            edges = np.linspace(lo, hi, float_bins + 1)
+        return cls(edges, np.histogram(values, edges)[0])
+
+    def to_dict(self):
+        # Semua tepi bin berjarak sama, cukup disimpan sebagai (awal, akhir, jumlah bin)
+        return {"edges": {"start": float(self.edges[0]), "stop": float(self.edges[-1]), "bins": len(self.counts)},
+                "counts": self.counts.astype(np.int64).tolist()}
+
+    @classmethod
+    def from_dict(cls, payload):
+        edges = payload["edges"]
+        return cls(np.linspace(edges["start"], edges["stop"], edges["bins"] + 1), payload["counts"])
+
+    def bin_index(self, values):
+        """Indeks bin untuk nilai-nilai baru (nilai di luar rentang masuk ke bin ujung)."""
+        idx = np.searchsorted(self.edges, values, side='right') - 1
+        return np.clip(idx, 0, len(self.counts) - 1)
+
+    def bin_index_one(self, value):
+        """Seperti bin_index untuk satu nilai float, tanpa alokasi array NumPy."""
+        return min(max(bisect_right(self._edge_list, value) - 1, 0), len(self._edge_list) - 2)
+
+    def compare(self, window_counts):
+        """Mengembalikan (wasserstein, ks_statistic, ks_p_value) antara referensi dan histogram jendela."""
+        m = window_counts.sum()
+        cdf_diff = np.abs(self.cdf - np.cumsum(window_counts) / m)
+        wasserstein = float(np.dot(cdf_diff[:-1], self.center_gaps))
+        ks_stat = float(cdf_diff.max())
+        # p-value asimtotik seperti ks_2samp mode 'asymp'
+        en = np.sqrt(self.n * m / (self.n + m))
+        from scipy.stats import kstwobign # Import scipy.stats mahal (~0.3 detik); hanya dibutuhkan di tick drift
+        ks_p_value = float(min(1.0, kstwobign.sf(en * ks_stat)))
+        return wasserstein, ks_stat, ks_p_value
+
+class SlidingWindowHistogram:
+    """Histogram yang diperbarui inkremental untuk jendela N observasi terakhir dan/atau umur maksimum."""
+
+    def __init__(self, n_bins, max_count, max_age_seconds=None):
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.max_count = max_count
+        self.max_age_seconds = max_age_seconds
+        self._items = deque()
+
+    def add(self, bin_indices, timestamp):
+        for bin_idx in bin_indices:
+            self._items.append((timestamp, bin_idx))
+        np.add.at(self.counts, bin_indices, 1)
+        self.expire(timestamp)
+
+    def add_one(self, bin_idx, timestamp):
+        self._items.append((timestamp, bin_idx))
+        self.counts[bin_idx] += 1
+        self.expire(timestamp)
+
+    def expire(self, now):
+        while len(self._items) > self.max_count:
+            self.counts[self._items.popleft()[1]] -= 1
+        if self.max_age_seconds is not None:
+            cutoff = now - self.max_age_seconds
+            while self._items and self._items[0][0] < cutoff:
+                self.counts[self._items.popleft()[1]] -= 1
+
+    def __len__(self):
+        return len(self._items)
+
+class TimeBucketedHistogram:
+    """
+    Histogram jendela waktu dari n_buckets sub-interval berisi jumlah per bin (ring buffer), bukan satu entri
+    per observasi: memori O(n_bins * n_buckets) berapa pun lalu lintasnya. Bucket paling lama dibuang utuh,
+    sehingga cakupan jendela bergeser per max_age_seconds / n_buckets detik.
+    """
+
+    def __init__(self, n_bins, max_age_seconds, n_buckets=60):
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.max_age_seconds = max_age_seconds
+        self.bucket_seconds = max_age_seconds / n_buckets
+        self._buckets = np.zeros((n_buckets, n_bins), dtype=np.int64)
+        self._bucket_totals = [0] * n_buckets
+        self._epoch = None # Indeks sub-interval terbaru (timestamp // bucket_seconds)
+        self._total = 0
+
+    def _slot(self, timestamp):
+        """Slot ring untuk timestamp, atau None jika sudah di luar jendela."""
+        epoch = int(timestamp // self.bucket_seconds)
+        self.expire(timestamp)
+        if epoch <= self._epoch - len(self._buckets):
+            return None
+        return epoch % len(self._buckets)
+
+    def add(self, bin_indices, timestamp):
+        slot = self._slot(timestamp)
+        if slot is None:
+            return
+        counts = np.bincount(bin_indices, minlength=len(self.counts))
+        self._buckets[slot] += counts
+        self.counts += counts
+        self._bucket_totals[slot] += len(bin_indices)
+        self._total += len(bin_indices)
+
+    def add_one(self, bin_idx, timestamp):
+        slot = self._slot(timestamp)
+        if slot is None:
+            return
+        self._buckets[slot, bin_idx] += 1
+        self.counts[bin_idx] += 1
+        self._bucket_totals[slot] += 1
+        self._total += 1
+
+    def expire(self, now):
+        epoch = int(now // self.bucket_seconds)
+        if self._epoch is None:
+            self._epoch = epoch
+        if epoch <= self._epoch:
+            return
+        # Slot yang dipakai ulang oleh sub-interval baru masih berisi data n_buckets sub-interval lalu
+        n_buckets = len(self._buckets)
+        for e in range(max(self._epoch + 1, epoch - n_buckets + 1), epoch + 1):
+            slot = e % n_buckets
+            if self._bucket_totals[slot]:
+                self.counts -= self._buckets[slot]
+                self._total -= self._bucket_totals[slot]
+                self._buckets[slot] = 0
+                self._bucket_totals[slot] = 0
+        self._epoch = epoch
+
+    def __len__(self):
+        return self._total
+
+class StreamingDriftMonitor:
+    """
+    Mesin drift streaming: setiap prediksi memperbarui histogram jendela per fitur,
+    dan skor drift dihitung dari histogram tersebut tanpa membaca ulang data mentah.
+    Biaya per tick hanya bergantung pada jumlah bin, bukan ukuran data referensi/log.
+    """
+
+    def __init__(self, references, window_size=1000, window_seconds=3600, window_buckets=60):
+        self.references = references
+        self._lock = threading.Lock()
+        # Jendela "last N" memakai nama metrik lama; jendela waktu memakai sufiks, mis. '_1h'
+        time_suffix = f"_{window_seconds // 3600}h" if window_seconds % 3600 == 0 else f"_{window_seconds}s"
+        self.windows = {
+            feature: {
+                "": SlidingWindowHistogram(len(ref.counts), window_size),
+                time_suffix: TimeBucketedHistogram(len(ref.counts), window_seconds, window_buckets),
+            }
+            for feature, ref in references.items()
+        }
+
+    @classmethod
+    def from_dataframe(cls, reference_df, features=FEATURES_TO_MONITOR, **kwargs):
+        references = {}
+        for feature in features:
+            if feature in reference_df.columns:
+                values = _as_float_array(reference_df[feature])
+                if np.isfinite(values).any():
+                    references[feature] = ReferenceDistribution.from_values(values)
+        return cls(references, **kwargs)
+
+    @classmethod
+    def from_baseline(cls, baseline, **kwargs):
+        """Membangun monitor dari artefak baseline drift (tanpa membaca data referensi mentah)."""
+        references = {feature: ReferenceDistribution.from_dict(entry["histogram"])
+                      for feature, entry in baseline["features"].items() if entry["kind"] == "continuous"}
+        return cls(references, **kwargs)
+
+    def update_batch(self, columns, timestamp=None):
+        """`columns` adalah mapping nama fitur -> nilai-nilai (DataFrame atau dict of arrays)."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for feature, ref in self.references.items():
+                if feature not in columns:
+                    continue
+                values = _as_float_array(columns[feature])
+                values = values[np.isfinite(values)]
+                if values.size:
+                    bins = ref.bin_index(values)
+                    for window in self.windows[feature].values():
+                        window.add(bins, timestamp)
+
+    def update(self, feature_dict, timestamp=None):
+        """Satu prediksi: jalur skalar tanpa array sementara (dipanggil per request di mode drift inline)."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for feature, ref in self.references.items():
+                value = _to_float(feature_dict.get(feature))
+                if not np.isfinite(value):
+                    continue
+                bin_idx = ref.bin_index_one(value)
+                for window in self.windows[feature].values():
+                    window.add_one(bin_idx, timestamp)
+
+    def compute(self, now=None):
+        """Menghasilkan list (fitur, metric_type, nilai) untuk semua jendela yang berisi data."""
+        now = time.time() if now is None else now
+        results = []
+        with self._lock:
+            for feature, ref in self.references.items():
+                for suffix, window in self.windows[feature].items():
+                    window.expire(now)
+                    if len(window) == 0:
+                        continue
+                    wasserstein, ks_stat, ks_p_value = ref.compare(window.counts)
+                    results.append((feature, f"wasserstein_distance{suffix}", wasserstein))
+                    # KS butuh setidaknya 2 sampel di setiap sisi
+                    if len(window) >= 2 and ref.n >= 2:
+                        results.append((feature, f"ks_statistic{suffix}", ks_stat))
+                        results.append((feature, f"ks_p_value{suffix}", ks_p_value))
+        return results
+
+def build_drift_baseline(reference_df, features=FEATURES_TO_MONITOR, categorical_features=CATEGORICAL_FEATURES,
+                         n_quantiles=101):
+    """
+    Ringkasan kompak data training untuk drift: per fitur kontinu histogram (sama dengan yang dipakai
+    StreamingDriftMonitor) dan array kuantil terurut, per fitur kategorikal frekuensi setiap kode.
+    """
+    baseline = {"format_version": 1, "n_rows": int(len(reference_df)), "features": {}}
+    quantile_levels = np.linspace(0, 1, n_quantiles)
+    for feature in features:
+        if feature not in reference_df.columns:
+            continue
+        values = _as_float_array(reference_df[feature])
+        values = values[np.isfinite(values)]
+        if not values.size:
+            continue
+        baseline["features"][feature] = {
+            "kind": "continuous",
+            "n": int(values.size),
+            "histogram": ReferenceDistribution.from_values(values).to_dict(),
+            "quantiles": np.quantile(values, quantile_levels).tolist(),
+        }
+    for feature in categorical_features:
+        if feature not in reference_df.columns:
+            continue
+        values = _as_float_array(reference_df[feature])
+        codes, counts = np.unique(values[np.isfinite(values)], return_counts=True)
+        baseline["features"][feature] = {
+            "kind": "categorical",
+            "n": int(counts.sum()),
+            "frequencies": {str(int(code)) if code == int(code) else str(code): int(count)
+                            for code, count in zip(codes, counts)},
+        }
+    return baseline
+
+def update_drift_baseline(baseline, new_df):
+    """
+    Baseline baru = baseline lama + baris baru, tanpa membaca ulang data lama: jumlah per bin histogram dan
+    frekuensi kode dijumlahkan (nilai di luar rentang masuk bin ujung), kuantil diturunkan dari histogram gabungan.
+    """
+    updated = {"format_version": baseline.get("format_version", 1),
+               "n_rows": int(baseline.get("n_rows", 0)) + int(len(new_df)), "features": {}}
+    for feature, entry in baseline["features"].items():
+        values = _as_float_array(new_df[feature]) if feature in new_df.columns else np.empty(0)
+        values = values[np.isfinite(values)]
+        entry = dict(entry, n=int(entry["n"]) + int(values.size))
+        if entry["kind"] == "continuous":
+            reference = ReferenceDistribution.from_dict(entry["histogram"])
+            counts = reference.counts + np.bincount(reference.bin_index(values), minlength=len(reference.counts))
+            merged = ReferenceDistribution(reference.edges, counts)
+            entry["histogram"] = merged.to_dict()
+            cdf = np.concatenate([[0.0], merged.cdf])
+            # Min/maks dipertahankan tepat; tanpa ini kuantil 0 dan 1 jatuh ke tepi bin yang diperlebar
+            lo = min(entry["quantiles"][0], values.min()) if values.size else entry["quantiles"][0]
+            hi = max(entry["quantiles"][-1], values.max()) if values.size else entry["quantiles"][-1]
+            quantiles = np.interp(np.linspace(0, 1, len(entry["quantiles"])), cdf, merged.edges)
+            entry["quantiles"] = np.clip(quantiles, lo, hi).tolist()
+        else:
+            frequencies = dict(entry["frequencies"])
+            codes, counts = np.unique(values, return_counts=True)
+            for code, count in zip(codes, counts):
+                key = str(int(code)) if code == int(code) else str(code)
+                frequencies[key] = frequencies.get(key, 0) + int(count)
+            entry["frequencies"] = frequencies
+        updated["features"][feature] = entry
+    return updated
+
+def baseline_median(entry):
+    """Median (perkiraan) satu fitur dari baseline: kode tengah untuk kategorikal, titik tengah bin untuk kontinu."""
+    if entry["kind"] == "categorical":
+        codes = sorted(entry["frequencies"], key=float)
+        counts = np.array([entry["frequencies"][code] for code in codes], dtype=np.float64)
+        return float(codes[int(np.searchsorted(np.cumsum(counts), counts.sum() / 2))])
+    reference = ReferenceDistribution.from_dict(entry["histogram"])
+    idx = min(int(np.searchsorted(reference.cdf, 0.5)), len(reference.counts) - 1)
+    if reference.edges[1] - reference.edges[0] == 1.0:
+        # Histogram fitur bulat (satu bin per nilai): median tepat nilai bin tersebut
+        return float((reference.edges[idx] + reference.edges[idx + 1]) / 2)
+    lower_cdf = reference.cdf[idx - 1] if idx > 0 else 0.0
+    fraction = (0.5 - lower_cdf) / max(reference.cdf[idx] - lower_cdf, 1e-12)
+    return float(reference.edges[idx] + fraction * (reference.edges[idx + 1] - reference.edges[idx]))
+
+def save_drift_baseline(baseline, path=DRIFT_BASELINE_FILE):
+    with open(path, "w") as f:
+        json.dump(baseline, f, separators=(",", ":"))
+    return path
+
+def load_drift_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _as_float_array(values):
+    """Konversi ke float64; nilai non-numerik menjadi NaN (setara pd.to_numeric(errors='coerce'))."""
+    try:
+        return np.atleast_1d(np.asarray(values, dtype=np.float64))
+    except (TypeError, ValueError):
+        return np.array([_to_float(v) for v in np.atleast_1d(np.asarray(values, dtype=object))])
@@ -0,0 +1,289 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# drift_report.py
+# Mesin laporan drift offline: statistik referensi (histogram, kuantil, frekuensi kode; format yang sama
+# dengan drift_baseline.json) dihitung sekali lalu di-cache, data saat ini dipecah per (fitur, blok baris)
+# dan dihitung histogramnya di process pool, lalu KS, Wasserstein, PSI, dan chi-square dihitung dari
+# jumlah per bin. Biaya per tugas O(baris blok); agregasi di proses induk hanya O(jumlah bin).
+import os
+import json
+import hashlib
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from drift import (ReferenceDistribution, FEATURES_TO_MONITOR, CATEGORICAL_FEATURES,
+                   build_drift_baseline, save_drift_baseline, load_drift_baseline, _as_float_array)
+
+DRIFT_REPORT_FILE = "drift_summary.json"
+DRIFT_REPORT_HTML_FILE = "data_drift_report.html"
+REFERENCE_CACHE_DIR = os.getenv("DRIFT_REFERENCE_CACHE_DIR", os.path.join(
+    os.path.expanduser("~"), ".cache", "heart-disease-drift"))
+# Blok baris per tugas pool; jumlah per bin bersifat aditif sehingga blok dijumlahkan kembali per jendela
+BLOCK_ROWS = int(os.getenv("DRIFT_REPORT_BLOCK_ROWS", "250000"))
+# Seperti Evidently: uji statistik (KS / chi-square) untuk sampel kecil; untuk sampel besar p-value selalu
+# mendekati nol, jadi keputusan drift memakai PSI
+STAT_TEST_MAX_ROWS = 1000
+P_VALUE_THRESHOLD = 0.05
+PSI_THRESHOLD = 0.2
+PSI_EPSILON = 1e-4
+REFERENCE_FORMAT_VERSION = 1
+
+# --- Statistik referensi ---
+def _source_fingerprint(path):
+    """sha256 isi file (atau semua file di direktori) agar cache tidak dipakai untuk data yang sudah berubah."""
+    digest = hashlib.sha256(f"v{REFERENCE_FORMAT_VERSION}".encode())
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    for file_path in paths:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def load_reference_stats(source, cache_dir=REFERENCE_CACHE_DIR):
+    """
+    Statistik referensi dari drift_baseline.json (mis. artefak run model Production) atau dari data mentah
+    (CSV, direktori parquet, dataset bertipe). Hasil dari data mentah di-cache per sidik jari isi file.
+    Mengembalikan (baseline, cache_hit).
+    """
+    if source.endswith(".json"):
+        return load_drift_baseline(source), True
+    cache_path = os.path.join(cache_dir, f"{_source_fingerprint(source)}.json")
+    if os.path.exists(cache_path):
+        return load_drift_baseline(cache_path), True
+    baseline = build_drift_baseline(read_current(source)[0])
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    save_drift_baseline(baseline, tmp_path)
+    os.replace(tmp_path, cache_path)
+    return baseline, False
+
+class _PreparedFeature:
+    """Objek referensi satu fitur yang dibangun sekali per proses (bukan per tugas)."""
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.kind = entry["kind"]
+        if self.kind == "continuous":
+            self.histogram = ReferenceDistribution.from_dict(entry["histogram"])
+            # Bin PSI = desil referensi; bin histogram dikelompokkan ke desil lewat titik tengahnya
+            inner_edges = np.unique(np.asarray(entry["quantiles"])[10:100:10])
+            centers = (self.histogram.edges[:-1] + self.histogram.edges[1:]) / 2
+            self.psi_groups = np.searchsorted(inner_edges, centers, side="right")
+            self.n_psi_bins = len(inner_edges) + 1
+        else:
+            self.frequencies = {float(code): count for code, count in entry["frequencies"].items()}
+
+    def counts(self, values):
+        """Jumlah per bin untuk satu blok nilai: histogram referensi (kontinu) atau {kode: jumlah} (kategorikal)."""
+        values = values[np.isfinite(values)]
+        if self.kind == "continuous":
+            return np.bincount(self.histogram.bin_index(values), minlength=len(self.histogram.counts))
+        codes, counts = np.unique(values, return_counts=True)
+        return dict(zip(codes.tolist(), counts.tolist()))
+
+# --- Tugas process pool ---
+_COLUMNS = {}
+_PREPARED = {}
+
+def _init_worker(columns, baseline):
+    """Initializer pool: dengan fork kolom diwarisi copy-on-write tanpa pickle, dengan spawn dikirim sekali per proses."""
+    global _COLUMNS, _PREPARED
+    _COLUMNS = columns
+    _PREPARED = {name: _PreparedFeature(name, entry) for name, entry in baseline["features"].items()}
+
+def _block_counts(task):
+    feature, window_idx, start, stop = task
+    values = _COLUMNS[feature][start:stop]
+    return feature, window_idx, stop - start, _PREPARED[feature].counts(values)
+
+def _merge_counts(total, counts):
+    if total is None:
+        return counts.copy()
+    if isinstance(total, dict):
+        for code, count in counts.items():
+            total[code] = total.get(code, 0) + count
+        return total
+    return total + counts
+
+# --- Statistik per fitur ---
+def _psi(reference_counts, current_counts):
+    p = np.maximum(reference_counts / max(reference_counts.sum(), 1), PSI_EPSILON)
+    q = np.maximum(current_counts / max(current_counts.sum(), 1), PSI_EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+def feature_statistics(prepared, counts, n_rows):
+    """Statistik drift satu fitur dari jumlah per bin data saat ini (None jika tidak ada nilai valid)."""
+    if prepared.kind == "continuous":
+        n = int(counts.sum())
+        if n == 0:
+            return None
+        reference = prepared.histogram
+        wasserstein, ks_stat, ks_p_value = reference.compare(counts)
+        psi = _psi(np.bincount(prepared.psi_groups, weights=reference.counts, minlength=prepared.n_psi_bins),
+                   np.bincount(prepared.psi_groups, weights=counts, minlength=prepared.n_psi_bins))
+        stats = {"n": n, "missing": n_rows - n, "ks_statistic": ks_stat, "ks_p_value": ks_p_value,
+                 "wasserstein_distance": wasserstein, "psi": psi}
+        p_value = ks_p_value
+    else:
+        n = int(sum(counts.values()))
+        if n == 0:
+            return None
+        codes = sorted(set(prepared.frequencies) | set(counts))
+        reference = np.array([prepared.frequencies.get(code, 0) for code in codes], dtype=np.float64)
+        current = np.array([counts.get(code, 0) for code in codes], dtype=np.float64)
+        from scipy.stats import chi2_contingency # Import scipy.stats mahal; hanya di proses induk
+        table = np.vstack([reference, current])
+        if table.shape[1] < 2:
+            chi_square, p_value = 0.0, 1.0
+        else:
+            chi_square, p_value = (float(value) for value in chi2_contingency(table, correction=False)[:2])
+        stats = {"n": n, "missing": n_rows - n, "chi_square": chi_square, "chi_square_p_value": p_value,
+                 "psi": _psi(reference, current),
+                 "new_codes": [code for code in codes if code not in prepared.frequencies]}
+    stats["method"] = ("ks" if prepared.kind == "continuous" else "chi_square") if n <= STAT_TEST_MAX_ROWS else "psi"
+    stats["drifted"] = bool(p_value < P_VALUE_THRESHOLD if n <= STAT_TEST_MAX_ROWS else stats["psi"] >= PSI_THRESHOLD)
+    return stats
+
+# --- Data saat ini dan jendela ---
+def read_current(source, features=None):
+    """
+    Kolom fitur (float32, NaN = hilang) dari CSV, file/direktori parquet (log prediksi), atau dataset bertipe,
+    beserta kolom Timestamp jika ada. Mengembalikan (DataFrame fitur, array timestamp atau None).
+    """
+    from dataset_format import is_typed_dataset, load_dataframe
+    features = features or FEATURES_TO_MONITOR + CATEGORICAL_FEATURES
+    if os.path.isdir(source) and is_typed_dataset(source):
+        return load_dataframe(source, columns=features), None
+    if source.endswith(".csv"):
+        header = pd.read_csv(source, nrows=0).columns
+        usecols = [name for name in features + ["Timestamp"] if name in header]
+        frame = pd.read_csv(source, usecols=usecols)
+    else:
+        frame = pd.read_parquet(source)
+    timestamps = frame["Timestamp"].to_numpy(dtype=np.float64) if "Timestamp" in frame.columns else None
+    columns = {name: _as_float_array(pd.to_numeric(frame[name], errors="coerce")).astype(np.float32)
+               for name in features if name in frame.columns}
+    return pd.DataFrame(columns), timestamps
+
+def make_windows(n_rows, window_rows=None, timestamps=None, window_seconds=None):
+    """
+    Jendela (label, awal, akhir) atas baris yang sudah berurutan: per window_seconds berdasarkan Timestamp,
+    per window_rows baris, atau satu jendela untuk seluruh data.
+    """
+    if window_seconds and timestamps is not None and n_rows:
+        buckets = np.floor(timestamps / window_seconds).astype(np.int64)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+        stops = np.append(starts[1:], n_rows)
+        labels = pd.to_datetime(buckets[starts] * window_seconds, unit="s").strftime("%Y-%m-%d %H:%M:%S")
+        return [(label, int(start), int(stop)) for label, start, stop in zip(labels, starts, stops)]
+    if window_rows:
+        return [(f"rows {start}-{min(start + window_rows, n_rows) - 1}", start, min(start + window_rows, n_rows))
+                for start in range(0, n_rows, window_rows)]
+    return [("all", 0, n_rows)]
+
+def _make_tasks(features, windows, block_rows):
+    return [(feature, window_idx, block_start, min(block_start + block_rows, stop))
+            for feature in features
+            for window_idx, (_, start, stop) in enumerate(windows)
+            for block_start in range(start, stop, block_rows)]
+
+def compute_drift_report(baseline, current, windows, workers=None, block_rows=BLOCK_ROWS):
+    """
+    Statistik drift per fitur untuk setiap jendela dan gabungannya. Jumlah per bin setiap blok dihitung
+    paralel di `workers` proses (1 = tanpa pool), lalu dijumlahkan per jendela di proses induk.
+    """
+    features = [name for name in baseline["features"] if name in current.columns]
+    columns = {name: np.ascontiguousarray(current[name].to_numpy()) for name in features}
+    tasks = _make_tasks(features, windows, block_rows)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(columns, baseline)
+        results = map(_block_counts, tasks)
+        pool = None
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context(method),
+                                   initializer=_init_worker, initargs=(columns, baseline))
+        results = pool.map(_block_counts, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    try:
+        window_counts = {}
+        for feature, window_idx, n_rows, counts in results:
+            key = (feature, window_idx)
+            rows, total = window_counts.get(key, (0, None))
+            window_counts[key] = (rows + n_rows, _merge_counts(total, counts))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    prepared = {name: _PreparedFeature(name, baseline["features"][name]) for name in features}
+    report = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for feature in features:
+            overall_rows, overall_counts, per_window = 0, None, []
+            for window_idx, (label, _, _) in enumerate(windows):
+                n_rows, counts = window_counts.get((feature, window_idx), (0, None))
+                if counts is None:
+                    continue
+                overall_rows += n_rows
+                overall_counts = _merge_counts(overall_counts, counts)
+                if len(windows) > 1:
+                    per_window.append({"window": label, **(feature_statistics(prepared[feature], counts, n_rows) or {})})
+            entry = {"kind": prepared[feature].kind,
+                     **(feature_statistics(prepared[feature], overall_counts, overall_rows) or {})}
+            if per_window:
+                entry["windows"] = per_window
+            report[feature] = entry
+    return report
+
+def summarize(report, reference_info, current_info, windows, timings):
+    """Ringkasan JSON kompak: statistik per fitur, jumlah fitur yang drift, dan waktu setiap tahap."""
+    drifted = [feature for feature, stats in report.items() if stats.get("drifted")]
+    share = len(drifted) / len(report) if report else 0.0
+    return {
+        "format_version": 1,
+        "reference": reference_info,
+        "current": current_info,
+        "windows": [{"window": label, "n_rows": stop - start} for label, start, stop in windows],
+        "n_features": len(report),
+        "n_drifted_features": len(drifted),
+        "share_drifted_features": share,
+        # Seperti DataDriftPreset: dataset dianggap drift jika setidaknya separuh fitur drift
+        "dataset_drift": share >= 0.5,
+        "drifted_features": drifted,
+        "thresholds": {"stat_test_max_rows": STAT_TEST_MAX_ROWS, "p_value": P_VALUE_THRESHOLD, "psi": PSI_THRESHOLD},
+        "features": report,
+        "timings_seconds": timings,
+    }
+
+def save_summary(summary, path=DRIFT_REPORT_FILE):
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=1)
+    return path
+
+def render_html(summary, path=DRIFT_REPORT_HTML_FILE):
+    """Laporan HTML sederhana (tabel per fitur dan PSI per jendela); hanya dibuat jika diminta."""
+    columns = ["kind", "method", "drifted", "n", "missing", "psi", "ks_statistic", "ks_p_value",
+               "wasserstein_distance", "chi_square", "chi_square_p_value"]
+    overall = pd.DataFrame({feature: {key: stats.get(key) for key in columns}
+                            for feature, stats in summary["features"].items()}).T
+    sections = [f"<h2>Ringkasan</h2><p>{summary['n_drifted_features']} dari {summary['n_features']} fitur drift "
+                f"(dataset drift: {summary['dataset_drift']}). Referensi: {summary['reference']['source']}, "
+                f"data saat ini: {summary['current']['source']} ({summary['current']['n_rows']} baris).</p>",
+                overall.to_html(float_format=lambda value: f"{value:.4f}", na_rep="")]
+    if len(summary["windows"]) > 1:
+        psi = pd.DataFrame({feature: {window["window"]: window.get("psi") for window in stats.get("windows", [])}
+                            for feature, stats in summary["features"].items()})
+        sections += ["<h2>PSI per jendela</h2>", psi.to_html(float_format=lambda value: f"{value:.4f}", na_rep="")]
+    with open(path, "w") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Laporan Data Drift</title></head><body>"
+                "<h1>Laporan Data Drift</h1>" + "".join(sections) + "</body></html>")
+    return path
@@ -0,0 +1,289 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# drift_worker.py
+# Proses drift terpisah dari serving: membaca segmen log prediksi yang sudah ditutup, menghitung skor
+# drift di core-nya sendiri, mengekspor metrik ke Prometheus, dan memicu retraining (repository_dispatch
+# 'trigger-retraining') jika ambang batas dilanggar terus-menerus selama jendela tertentu.
+#   python drift_worker.py run                  : worker drift (metrik di port 8001)
+#   python drift_worker.py webhook-stub         : pengganti lokal endpoint repository_dispatch untuk uji coba
+import os
+# Worker punya registry dan port metrik sendiri; jangan ikut menulis ke direktori multiprocess milik app.py
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+import json
+import time
+import logging
+import argparse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from prometheus_client import Gauge, Counter, Histogram, start_http_server
+from drift import StreamingDriftMonitor, DRIFT_BASELINE_FILE, load_drift_baseline
+from prediction_log import LOG_DIR, list_closed_segments, read_segments
+from model_cache import ArtifactCache
+
+logger = logging.getLogger(__name__)
+
+DRIFT_WORKER_METRICS_PORT = int(os.getenv("DRIFT_WORKER_METRICS_PORT", "8001"))
+DRIFT_INTERVAL_SECONDS = float(os.getenv("DRIFT_INTERVAL_SECONDS", "15"))
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "1000"))
+DRIFT_WINDOW_SECONDS = int(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+# Aturan pelanggaran "metric_type<ambang" atau "metric_type>ambang", dipisah koma (metric_type seperti di data_drift_score)
+DRIFT_TRIGGER_RULES = os.getenv("DRIFT_TRIGGER_RULES", "ks_statistic>0.2")
+DRIFT_SUSTAINED_SECONDS = float(os.getenv("DRIFT_SUSTAINED_SECONDS", "900"))
+DRIFT_TRIGGER_COOLDOWN_SECONDS = float(os.getenv("DRIFT_TRIGGER_COOLDOWN_SECONDS", "21600"))
+# Contoh GitHub: https://api.github.com/repos/<owner>/<repo>/dispatches (token dengan izin repo)
+RETRAIN_WEBHOOK_URL = os.getenv("RETRAIN_WEBHOOK_URL", "")
+RETRAIN_WEBHOOK_TOKEN = os.getenv("RETRAIN_WEBHOOK_TOKEN", "")
+RETRAIN_EVENT_TYPE = "trigger-retraining" # Sama dengan retraining_pipeline.yml
+# Daftar CPU untuk worker (mis. "2,3"), agar perhitungan drift tidak berebut core dengan worker serving
+DRIFT_WORKER_CPUS = os.getenv("DRIFT_WORKER_CPUS", "")
+
+# Nama metrik skor sama dengan app.py (mode inline) sehingga dashboard dan alert Grafana tetap berlaku
+DATA_DRIFT_GAUGE = Gauge('data_drift_score', 'Data drift score for a feature', ['feature_name', 'metric_type'])
+SEGMENTS_COUNTER = Counter('drift_worker_segments_processed_total', 'Closed prediction-log segments consumed')
+ROWS_COUNTER = Counter('drift_worker_rows_processed_total', 'Prediction rows added to the drift windows')
+SEGMENT_ERRORS_COUNTER = Counter('drift_worker_segment_errors_total', 'Segments that could not be read')
+COMPUTE_HISTOGRAM = Histogram('drift_worker_compute_duration_seconds', 'Duration of one drift tick (read segments + scores)',
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LAG_GAUGE = Gauge('drift_worker_lag_seconds', 'Age of the newest prediction row included in the drift windows')
+BREACH_GAUGE = Gauge('drift_breach_seconds', 'How long a drift rule has been continuously breached (absent if not breached)',
+                     ['feature_name', 'metric_type'])
+TRIGGER_COUNTER = Counter('drift_retraining_triggers_total', 'Retraining triggers fired by the drift worker', ['result'])
+
+def parse_trigger_rules(spec):
+    """'ks_statistic>0.2,ks_p_value_1h<0.001' -> [('ks_statistic', '>', 0.2), ('ks_p_value_1h', '<', 0.001)]"""
+    rules = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        op = ">" if ">" in part else "<" if "<" in part else None
+        if op is None:
+            raise ValueError(f"Aturan drift tidak valid (butuh '<' atau '>'): {part!r}")
+        metric_type, threshold = part.split(op, 1)
+        rules.append((metric_type.strip(), op, float(threshold)))
+    return rules
+
+class BreachTracker:
+    """
+    Melacak sejak kapan setiap pasangan (fitur, metric_type) melanggar aturannya. Trigger hanya dihasilkan
+    jika pelanggaran berlangsung tanpa putus selama `sustained_seconds`, dan paling sering sekali per `cooldown_seconds`.
+    """
+
+    def __init__(self, rules, sustained_seconds, cooldown_seconds):
+        self.rules = {metric_type: (op, threshold) for metric_type, op, threshold in rules}
+        self.sustained_seconds = sustained_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.breached_since = {}
+        self.last_trigger_at = None
+
+    def reset(self):
+        self.breached_since.clear()
+
+    def update(self, results, now):
+        """`results` dari StreamingDriftMonitor.compute(). Mengembalikan pelanggaran terlama yang sudah berkelanjutan, atau None."""
+        breaching = {}
+        for feature, metric_type, value in results:
+            if metric_type not in self.rules:
+                continue
+            op, threshold = self.rules[metric_type]
+            if (value > threshold) if op == ">" else (value < threshold):
+                breaching[(feature, metric_type)] = value
+
+        # Pelanggaran yang terputus dimulai ulang dari nol
+        self.breached_since = {key: self.breached_since.get(key, now) for key in breaching}
+        sustained = [(since, key) for key, since in self.breached_since.items() if now - since >= self.sustained_seconds]
+        if not sustained:
+            return None
+        if self.last_trigger_at is not None and now - self.last_trigger_at < self.cooldown_seconds:
+            return None
+        since, (feature, metric_type) = min(sustained)
+        self.last_trigger_at = now
+        op, threshold = self.rules[metric_type]
+        return {"feature_name": feature, "metric_type": metric_type, "value": breaching[(feature, metric_type)],
+                "rule": f"{metric_type}{op}{threshold}", "breached_seconds": now - since}
+
+def send_retraining_trigger(breach, url=RETRAIN_WEBHOOK_URL, token=RETRAIN_WEBHOOK_TOKEN):
+    """
+    Mengirim event repository_dispatch. client_payload memakai kunci yang sama dengan alert Grafana,
+    sehingga retraining_pipeline.yml tidak perlu membedakan sumber trigger.
+    """
+    body = {"event_type": RETRAIN_EVENT_TYPE, "client_payload": {
+        "grafana_alert_status": "firing",
+        "grafana_alert_name": f"drift_worker: {breach['rule']} selama {breach['breached_seconds']:.0f} detik",
+        "grafana_feature_name": breach["feature_name"],
+        "grafana_metric_type": breach["metric_type"],
+        "grafana_value": round(float(breach["value"]), 6),
+    }}
+    headers = {"Content-Type": "application/json", "Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST", headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            logger.info(f"Trigger retraining terkirim ke {url}: HTTP {response.status} ({breach['rule']}, fitur {breach['feature_name']})")
+            return True
+    except Exception as e:
+        logger.error(f"Gagal mengirim trigger retraining ke {url}: {e}")
+        return False
+
+class SegmentConsumer:
+    """Mengambil segmen tertutup yang belum pernah dibaca. Segmen yang dihapus update_dataset.py dilewati saja."""
+
+    def __init__(self, log_dir=LOG_DIR, columns=None):
+        self.log_dir = log_dir
+        self.columns = columns
+        self._seen = set()
+
+    def poll(self):
+        """Menghasilkan (path, DataFrame) untuk setiap segmen baru, dari yang paling lama."""
+        segments = list_closed_segments(self.log_dir)
+        # Nama segmen diurutkan per waktu dibuka, bukan ditutup, sehingga dilacak per nama, bukan "nama terakhir"
+        self._seen &= set(segments)
+        for path in segments:
+            if path in self._seen:
+                continue
+            self._seen.add(path)
+            try:
+                yield path, read_segments([path], columns=self.columns)
+            except (FileNotFoundError, OSError) as e:
+                SEGMENT_ERRORS_COUNTER.inc()
+                logger.warning(f"Segmen {path} tidak dapat dibaca: {e}")
+
+class DriftWorker:
+    """Loop worker: ikuti baseline model Production, konsumsi segmen baru, hitung skor, evaluasi trigger."""
+
+    def __init__(self, cache=None, baseline_path=None, log_dir=LOG_DIR, tracker=None, webhook_url=RETRAIN_WEBHOOK_URL):
+        self.cache = cache or ArtifactCache()
+        self.baseline_path = baseline_path
+        self.log_dir = log_dir
+        self.tracker = tracker or BreachTracker(parse_trigger_rules(DRIFT_TRIGGER_RULES),
+                                                DRIFT_SUSTAINED_SECONDS, DRIFT_TRIGGER_COOLDOWN_SECONDS)
+        self.webhook_url = webhook_url
+        self.monitor = None
+        self.baseline_source = None
+        self.consumer = None
+        self._missing_path = None
+
+    def refresh_baseline(self):
+        """Baseline dari --baseline, atau dari artefak run Production di cache model yang sama dengan app.py."""
+        if self.baseline_path:
+            source, path = self.baseline_path, self.baseline_path
+        else:
+            production = self.cache.get_production()
+            if production is None:
+                return False
+            source, path = production["run_id"], os.path.join(self.cache.entry_dir(production["run_id"]), DRIFT_BASELINE_FILE)
+        if source == self.baseline_source:
+            return True
+        if not os.path.exists(path):
+            if path != self._missing_path:
+                logger.warning(f"Baseline drift tidak ditemukan di {path}. Menunggu model dengan baseline drift.")
+                self._missing_path = path
+            return False
+        self.monitor = StreamingDriftMonitor.from_baseline(load_drift_baseline(path), window_size=DRIFT_WINDOW_SIZE,
+                                                           window_seconds=DRIFT_WINDOW_SECONDS)
+        # Model baru: jendela, pelanggaran, dan skor lama tidak lagi sebanding dengan baseline ini
+        self.consumer = SegmentConsumer(self.log_dir, columns=list(self.monitor.references) + ["Timestamp"])
+        self.tracker.reset()
+        DATA_DRIFT_GAUGE.clear()
+        BREACH_GAUGE.clear()
+        self.baseline_source = source
+        logger.info(f"Baseline drift dimuat dari {path} ({len(self.monitor.references)} fitur).")
+        return True
+
+    def consume(self):
+        newest = None
+        for path, df in self.consumer.poll():
+            if df.empty:
+                SEGMENTS_COUNTER.inc()
+                continue
+            timestamps = df["Timestamp"].to_numpy(dtype=np.float64)
+            # Jendela waktu cukup memakai waktu baris terbaru per segmen (segmen dirotasi paling lama tiap LOG_SEGMENT_MAX_AGE_SECONDS)
+            segment_time = float(np.nanmax(timestamps)) if np.isfinite(timestamps).any() else time.time()
+            self.monitor.update_batch(df, segment_time)
+            SEGMENTS_COUNTER.inc()
+            ROWS_COUNTER.inc(len(df))
+            newest = segment_time if newest is None else max(newest, segment_time)
+        if newest is not None:
+            LAG_GAUGE.set(max(0.0, time.time() - newest))
+
+    def tick(self):
+        if not self.refresh_baseline():
+            return None
+        start = time.perf_counter()
+        self.consume()
+        now = time.time()
+        results = self.monitor.compute(now)
+        for feature, metric_type, value in results:
+            DATA_DRIFT_GAUGE.labels(feature_name=feature, metric_type=metric_type).set(value)
+        COMPUTE_HISTOGRAM.observe(time.perf_counter() - start)
+
+        breach = self.tracker.update(results, now)
+        BREACH_GAUGE.clear()
+        for (feature, metric_type), since in self.tracker.breached_since.items():
+            BREACH_GAUGE.labels(feature_name=feature, metric_type=metric_type).set(now - since)
+        if breach is not None:
+            logger.warning(f"Drift berkelanjutan: {breach}")
+            if not self.webhook_url:
+                TRIGGER_COUNTER.labels(result="disabled").inc()
+                logger.warning("RETRAIN_WEBHOOK_URL kosong; trigger retraining tidak dikirim.")
+            else:
+                sent = send_retraining_trigger(breach, self.webhook_url)
+                TRIGGER_COUNTER.labels(result="sent" if sent else "failed").inc()
+        return breach
+
+    def run(self, interval_seconds=DRIFT_INTERVAL_SECONDS):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error saat menghitung data drift: {e}")
+            time.sleep(interval_seconds)
+
+def pin_to_cpus(spec=DRIFT_WORKER_CPUS):
+    if spec and hasattr(os, "sched_setaffinity"):
+        cpus = {int(cpu) for cpu in spec.split(",") if cpu.strip()}
+        os.sched_setaffinity(0, cpus)
+        logger.info(f"Worker drift dijalankan di CPU {sorted(cpus)}.")
+
+def run_webhook_stub(port, output):
+    """Pengganti lokal endpoint repository_dispatch: setiap POST dicatat sebagai satu baris JSON di `output`."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            with open(output, "a") as f:
+                f.write(json.dumps({"received_at": time.time(), "path": self.path, "payload": payload}) + "\n")
+            logger.info(f"Trigger diterima: {payload.get('event_type')} {payload.get('client_payload')}")
+            self.send_response(204) # Sama dengan respons GitHub untuk /dispatches
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    logger.info(f"Webhook stub berjalan di http://localhost:{port}/dispatches, mencatat ke {output}.")
+    ThreadingHTTPServer(("0.0.0.0", port), Handler).serve_forever()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["run", "webhook-stub"])
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="File drift_baseline.json; default: baseline model Production di cache model")
+    parser.add_argument("--log-dir", type=str, default=LOG_DIR)
+    parser.add_argument("--port", type=int, default=None, help="Port metrik (run, default 8001) atau port stub (default 9000)")
+    parser.add_argument("--output", type=str, default="retraining_triggers.jsonl", help="File catatan trigger (webhook-stub)")
+    args = parser.parse_args()
+
+    if args.command == "webhook-stub":
+        run_webhook_stub(args.port or 9000, args.output)
+    else:
+        pin_to_cpus()
+        start_http_server(args.port or DRIFT_WORKER_METRICS_PORT)
+        logger.info(f"Worker drift berjalan: log {args.log_dir}, metrik di port {args.port or DRIFT_WORKER_METRICS_PORT}, "
+                    f"aturan {DRIFT_TRIGGER_RULES} selama {DRIFT_SUSTAINED_SECONDS:.0f} detik.")
+        DriftWorker(baseline_path=args.baseline, log_dir=args.log_dir).run()
@@ -0,0 +1,234 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# fast_inference.py
+# Modul ini sengaja hanya bergantung pada NumPy agar jalur inferensi tidak memuat sklearn/mlflow.
+import numpy as np
+
+COMPILED_MODEL_FILE = "compiled_model.npz"
+TREE_LEAF = -1
+
+def _breadth_first_order(children_left, children_right):
+    """Urutan node BFS sehingga anak kanan selalu berada tepat setelah anak kiri."""
+    order = [0]
+    for node in order:  # list bertambah selama iterasi, seperti antrean
+        if children_left[node] != TREE_LEAF:
+            order.append(children_left[node])
+            order.append(children_right[node])
+    return np.asarray(order)
+
+def _float32_floor(threshold):
+    """
+    Threshold float32 terbesar yang <= threshold float64. Untuk x float32,
+    `x <= t` (float64) setara persis dengan `x <= floor32(t)` sehingga
+    traversal bisa sepenuhnya memakai float32 tanpa mengubah hasil.
+    """
+    rounded = threshold.astype(np.float32)
+    too_big = rounded.astype(np.float64) > threshold
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+def _positive_index(classes):
+    """Kolom kelas 1 di array nilai (kolom terakhir jika kelas 1 tidak ada), sama seperti predict_batch."""
+    classes = np.asarray(classes)
+    return int(np.flatnonzero(classes == 1)[0]) if (classes == 1).any() else -1
+
+def node_contributions(left, right, value, roots, classes):
+    """
+    Nilai harapan probabilitas kelas 1 di setiap node dikurangi nilai induknya (root: nilainya sendiri).
+    Atribusi Saabas satu baris = jumlah selisih ini di sepanjang jalurnya, dikelompokkan per fitur split.
+    """
+    expected = np.asarray(value[:, _positive_index(classes)], dtype=np.float64)
+    contribution = expected.copy()
+    split = np.flatnonzero(left != np.arange(len(left)))
+    contribution[left[split]] -= expected[split]
+    contribution[right[split]] -= expected[split]
+    return contribution
+
+def compile_pipeline(model, imputer, scaler, value_dtype=np.float64):
+    """
+    Melipat SimpleImputer(median) + StandardScaler menjadi satu transformasi affine
+    (nilai pengisi, pergeseran, skala) dan meratakan semua pohon RandomForest menjadi
+    array node yang bersebelahan (feature, threshold, left, right, value).
+    value_dtype=np.float32 memperkecil array nilai daun (hasil bisa berbeda di digit ke-7).
+    """
+    n_features = len(imputer.statistics_)
+    shift = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(n_features)
+
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        order = _breadth_first_order(tree.children_left, tree.children_right)
+        new_ids = np.empty(tree.node_count, dtype=np.int64)
+        new_ids[order] = np.arange(len(order))
+        is_leaf = tree.children_left[order] == TREE_LEAF
+
+        # Node daun menunjuk ke dirinya sendiri; anak kanan = left + 1
+        left = np.where(is_leaf, np.arange(len(order)), new_ids[np.maximum(tree.children_left[order], 0)])
+        lefts.append(left + offset)
+        features.append(np.where(is_leaf, 0, tree.feature[order]))
+        thresholds.append(np.where(is_leaf, np.float32(np.inf), _float32_floor(tree.threshold[order])))
+
+        # Normalisasi persis seperti DecisionTreeClassifier.predict_proba
+        value = tree.value[order, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += len(order)
+
+    left = np.concatenate(lefts).astype(np.int32)
+    right = np.where(left == np.arange(len(left)), left, left + 1).astype(np.int32)
+    value = np.concatenate(values).astype(value_dtype)
+    roots = np.asarray(roots, dtype=np.int32)
+    return {
+        "fill_values": np.asarray(imputer.statistics_, dtype=np.float64),
+        "shift": np.asarray(shift, dtype=np.float64),
+        "scale": np.asarray(scale, dtype=np.float64),
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float32),
+        "left": left,
+        "right": right,
+        "value": value,
+        "roots": roots,
+        "classes": np.asarray(model.classes_),
+        # Dihitung sekali saat training agar penjelasan per request hanya berupa satu gather per langkah traversal
+        "contribution": node_contributions(left, right, value, roots, model.classes_).astype(value_dtype),
+    }
+
+def export_compiled_model(model, imputer, scaler, path=COMPILED_MODEL_FILE, value_dtype=np.float64):
+    """Menyimpan hasil compile_pipeline ke file .npz dan mengembalikan path-nya."""
+    np.savez(path, **compile_pipeline(model, imputer, scaler, value_dtype=value_dtype))
+    return path
+
+class CompiledForest:
+    """Inferensi RandomForest + preprocessing menggunakan traversal pohon NumPy tervektorisasi."""
+
+    def __init__(self, arrays):
+        self.fill_values = arrays["fill_values"]
+        self.shift = arrays["shift"]
+        self.scale = arrays["scale"]
+        # Indeks disimpan int32 di file, tetapi dipakai sebagai intp agar fancy indexing tidak mengonversi ulang.
+        # Array yang sudah intp (mis. hasil to_arrays() di memori bersama) dipakai apa adanya tanpa salinan.
+        self.feature = np.asarray(arrays["feature"], dtype=np.intp)
+        self.threshold = arrays["threshold"]
+        self.left = np.asarray(arrays["left"], dtype=np.intp)
+        self.right = np.asarray(arrays["right"], dtype=np.intp)
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"], dtype=np.intp)
+        self.classes_ = arrays["classes"]
+        self.is_leaf = arrays["is_leaf"] if "is_leaf" in arrays else self.left == np.arange(len(self.left))
+        self.n_features = len(self.fill_values)
+        # File dari versi sebelumnya belum menyimpan kontribusi node; diturunkan dari nilai node saat dimuat
+        self.contribution = arrays["contribution"] if "contribution" in arrays else node_contributions(
+            self.left, self.right, self.value, self.roots, self.classes_)
+
+    def to_arrays(self):
+        """Semua array dalam bentuk siap pakai (indeks intp, is_leaf), untuk dibagikan tanpa konversi ulang."""
+        return {"fill_values": self.fill_values, "shift": self.shift, "scale": self.scale,
+                "feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+                "value": self.value, "roots": self.roots, "classes": self.classes_, "is_leaf": self.is_leaf,
+                "contribution": self.contribution}
+
+    @classmethod
+    def load(cls, path=COMPILED_MODEL_FILE):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def transform(self, X):
+        """Imputasi median lalu standardisasi, identik dengan imputer.transform -> scaler.transform."""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.fill_values, X)
+        return (X - self.shift) / self.scale
+
+    def apply(self, X_scaled):
+        """Mengembalikan indeks node daun (global) berbentuk (n_samples, n_trees)."""
+        # sklearn mengubah fitur ke float32; threshold sudah dibulatkan ke bawah saat ekspor
+        X_flat = np.ascontiguousarray(X_scaled, dtype=np.float32).ravel()
+        n_samples = len(X_flat) // self.n_features
+        n_trees = len(self.roots)
+
+        nodes = np.tile(self.roots, n_samples)
+        row_base = np.repeat(np.arange(n_samples) * self.n_features, n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            # Anak kanan selalu left + 1, jadi cukup satu penjumlahan boolean
+            nodes[active] = self.left[current] + (X_flat[row_base[active] + self.feature[current]] > self.threshold[current])
+            active = active[~self.is_leaf[nodes[active]]]
+        return nodes.reshape(n_samples, n_trees)
+
+    def apply_with_contributions(self, X_scaled):
+        """
+        Traversal yang sama seperti apply, sekaligus menjumlahkan kontribusi node yang dilewati ke fitur split
+        induknya. Mengembalikan (indeks daun (n_samples, n_trees), kontribusi (n_samples, n_features)) dengan
+        kontribusi sudah dirata-rata atas pohon.
+        """
+        X_flat = np.ascontiguousarray(X_scaled, dtype=np.float32).ravel()
+        n_samples = len(X_flat) // self.n_features
+        n_trees = len(self.roots)
+
+        nodes = np.tile(self.roots, n_samples)
+        row_base = np.repeat(np.arange(n_samples) * self.n_features, n_trees)
+        contributions = np.zeros(n_samples * self.n_features)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            cell = row_base[active] + self.feature[current]
+            nodes[active] = self.left[current] + (X_flat[cell] > self.threshold[current])
+            # Satu bincount per kedalaman: semua pasangan (baris, pohon) yang aktif sekaligus
+            contributions += np.bincount(cell, weights=self.contribution[nodes[active]], minlength=len(contributions))
+            active = active[~self.is_leaf[nodes[active]]]
+        return nodes.reshape(n_samples, n_trees), contributions.reshape(n_samples, self.n_features) / n_trees
+
+    def base_value(self):
+        """Rata-rata nilai harapan root semua pohon: probabilitas kelas 1 sebelum melihat fitur apa pun."""
+        return float(np.mean(self.contribution[self.roots]))
+
+    def predict_proba(self, X):
+        """Probabilitas semua kelas, dengan urutan penjumlahan yang sama seperti RandomForestClassifier."""
+        return self.predict_proba_scaled(self.transform(X))
+
+    def predict_proba_scaled(self, X_scaled):
+        return self._proba_from_leaves(self.apply(X_scaled))
+
+    def _proba_from_leaves(self, leaves):
+        proba = np.zeros((leaves.shape[0], self.value.shape[1]))
+        for t in range(leaves.shape[1]):
+            proba += self.value[leaves[:, t]]
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_batch(self, X):
+        """Antarmuka yang sama dengan inference.predict_batch: (prediksi, probabilitas kelas 1)."""
+        return self.predict_batch_scaled(self.transform(X))
+
+    def predict_batch_scaled(self, X_scaled):
+        proba = self.predict_proba_scaled(X_scaled)
+        predictions = self.classes_.take(np.argmax(proba, axis=1))
+        return predictions.astype(int), proba[:, _positive_index(self.classes_)]
+
+    def explain_batch(self, X):
+        """predict_batch ditambah atribusi fitur, lihat explain_batch_scaled."""
+        return self.explain_batch_scaled(self.transform(X))
+
+    def explain_batch_scaled(self, X_scaled):
+        """
+        Prediksi dan atribusi fitur Saabas dari satu traversal: (prediksi, probabilitas kelas 1, base_value,
+        kontribusi (n_samples, n_features)). base_value + jumlah kontribusi satu baris = probabilitasnya
+        (hingga pembulatan), dan prediksi/probabilitas identik dengan predict_batch_scaled.
+        """
+        leaves, contributions = self.apply_with_contributions(X_scaled)
+        proba = self._proba_from_leaves(leaves)
+        predictions = self.classes_.take(np.argmax(proba, axis=1))
+        return predictions.astype(int), proba[:, _positive_index(self.classes_)], self.base_value(), contributions
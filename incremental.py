@@ -0,0 +1,103 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# incremental.py
+# Retraining inkremental dari model Production: hanya partisi dataset store yang belum dilihat model
+# yang dibaca. Median imputer diperbarui lewat histogram/frekuensi baseline drift, mean/varian scaler
+# lewat StandardScaler.partial_fit, threshold pohon lama dipetakan ke skala baru, lalu pohon baru dilatih
+# pada data terbaru dengan warm_start dan pohon tertua dibuang agar jumlah pohon tetap dalam anggaran.
+import copy
+import numpy as np
+import pandas as pd
+from drift import update_drift_baseline, baseline_median
+
+FLOAT32_TOLERANCE = 4 * float(np.finfo(np.float32).eps)
+
+def update_imputer(imputer, baseline):
+    """Salinan SimpleImputer(median) dengan median perkiraan dari baseline gabungan (fitur tanpa baseline tidak berubah)."""
+    updated = copy.deepcopy(imputer)
+    names = list(getattr(imputer, "feature_names_in_", []))
+    for i, name in enumerate(names):
+        entry = baseline["features"].get(name)
+        if entry is not None and entry["n"] > 0:
+            updated.statistics_[i] = baseline_median(entry)
+    return updated
+
+def update_scaler(scaler, X_new_imputed):
+    """Salinan StandardScaler dengan mean/varian gabungan (n lama + n baru, rumus paralel Chan di partial_fit)."""
+    updated = copy.deepcopy(scaler)
+    return updated.partial_fit(X_new_imputed)
+
+def remap_thresholds(forest, old_scaler, new_scaler):
+    """
+    Salinan forest yang split-nya tetap sama dalam skala mentah setelah scaler berubah:
+    (x - m0) / s0 <= t  <=>  (x - m1) / s1 <= (t * s0 + m0 - m1) / s1.
+    """
+    remapped = copy.deepcopy(forest)
+    m0, s0 = old_scaler.mean_, old_scaler.scale_
+    m1, s1 = new_scaler.mean_, new_scaler.scale_
+    for estimator in remapped.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = state["nodes"]
+        split = nodes["left_child"] != -1
+        feature = nodes["feature"][split]
+        threshold = (nodes["threshold"][split] * s0[feature] + m0[feature] - m1[feature]) / s1[feature]
+        # Pohon membandingkan X sebagai float32; threshold yang tepat sama dengan nilai training (x <= t) bisa
+        # bergeser 1 ulp setelah skala berubah, jadi diberi toleransi beberapa ulp float32 ke atas
+        nodes["threshold"][split] = threshold + FLOAT32_TOLERANCE * np.maximum(np.abs(threshold), 1.0)
+        estimator.tree_.__setstate__(state)
+    return remapped
+
+def proportional_tree_count(n_seen_rows, n_new_rows, max_trees, minimum=5):
+    """Jumlah pohon baru sebanding dengan porsi data baru di seluruh data, agar forest mendekati model dari gabungan data."""
+    share = n_new_rows / max(n_seen_rows + n_new_rows, 1)
+    return int(min(max_trees, max(minimum, round(share * max_trees))))
+
+def grow_forest(forest, X_recent, y_recent, n_new_trees, max_trees, random_state=None):
+    """
+    Menambahkan n_new_trees pohon yang dilatih pada data terbaru (warm_start) lalu membuang pohon tertua
+    hingga jumlahnya paling banyak max_trees. Mengembalikan (forest, jumlah pohon dibuang).
+    """
+    grown = copy.copy(forest)
+    grown.estimators_ = list(forest.estimators_)
+    grown.set_params(warm_start=True, n_estimators=len(grown.estimators_) + n_new_trees)
+    if random_state is not None:
+        # Seed berbeda per retraining; tanpa ini pohon baru mendapat seed yang sama dengan run sebelumnya
+        grown.set_params(random_state=random_state)
+    grown.fit(X_recent, y_recent)
+    dropped = max(0, len(grown.estimators_) - max_trees)
+    grown.estimators_ = grown.estimators_[dropped:]
+    grown.set_params(warm_start=False, n_estimators=len(grown.estimators_))
+    for attribute in ("oob_score_", "oob_decision_function_"):
+        grown.__dict__.pop(attribute, None)
+    return grown, dropped
+
+def incremental_update(forest, imputer, scaler, baseline, X_new_raw, y_new, n_new_trees, max_trees,
+                       random_state=None):
+    """
+    Satu langkah retraining inkremental dari data baru saja. n_new_trees=None memakai proportional_tree_count
+    dengan jumlah baris dari baseline. Mengembalikan dict berisi model, imputer, scaler, dan baseline drift baru
+    beserta ringkasan perubahan (untuk dicatat di MLflow).
+    """
+    if n_new_trees is None:
+        n_new_trees = proportional_tree_count(int(baseline.get("n_rows", 0)), len(X_new_raw), max_trees)
+    new_baseline = update_drift_baseline(baseline, X_new_raw)
+    new_imputer = update_imputer(imputer, new_baseline)
+    X_new_imputed = new_imputer.transform(X_new_raw)
+    new_scaler = update_scaler(scaler, X_new_imputed)
+    X_recent = pd.DataFrame(new_scaler.transform(X_new_imputed), columns=X_new_raw.columns)
+    model = remap_thresholds(forest, scaler, new_scaler)
+    # Hanya nilai yang jatuh tepat di titik tengah split yang bisa berpindah sisi karena pembulatan float32
+    old_classes = forest.predict(pd.DataFrame(scaler.transform(X_new_imputed), columns=X_new_raw.columns))
+    remap_disagreement = float(np.mean(model.predict(X_recent) != old_classes)) if len(X_recent) else 0.0
+    model, dropped = grow_forest(model, X_recent, np.asarray(y_new).astype(int), n_new_trees, max_trees,
+                                 random_state=random_state)
+    return {
+        "model": model, "imputer": new_imputer, "scaler": new_scaler, "drift_baseline": new_baseline,
+        "X_recent": X_recent,
+        "summary": {"n_new_rows": int(len(X_new_raw)), "n_trees_added": int(n_new_trees), "n_trees_dropped": int(dropped),
+                    "n_trees": int(len(model.estimators_)), "remap_disagreement": remap_disagreement,
+                    "max_mean_shift": float(np.max(np.abs(new_scaler.mean_ - scaler.mean_) / scaler.scale_))},
+    }
@@ -0,0 +1,171 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# inference.py
+import io
+import json
+import time
+import numpy as np
+import pandas as pd
+from fast_inference import CompiledForest
+
+# Urutan 13 fitur yang dipakai saat training (tanpa kolom target)
+FEATURE_NAMES = ['Age', 'Sex', 'Chest pain type', 'BP', 'Cholesterol', 'FBS over 120',
+                 'EKG results', 'Max HR', 'Exercise angina', 'ST depression', 'Slope of ST',
+                 'Number of vessels fluro', 'Thallium']
+
+DEFAULT_CHUNK_SIZE = 5000
+# Kolom atribusi fitur pada hasil batch (lihat explain_batch)
+BASE_VALUE_COLUMN = 'Base value'
+CONTRIBUTION_COLUMNS = [f'{name} contribution' for name in FEATURE_NAMES]
+
+def label_prediction(prediction):
+    """Mengubah kode prediksi (0/1) menjadi label yang dipakai di log."""
+    return "Presence" if prediction == 1 else "Absence"
+
+def get_classifier(model):
+    """
+    Mengambil estimator sklearn mentah dari model pyfunc MLflow agar
+    predict_proba bisa dipanggil. Jika tidak bisa, kembalikan model apa adanya.
+    """
+    get_raw_model = getattr(model, "get_raw_model", None)
+    if callable(get_raw_model):
+        try:
+            return get_raw_model()
+        except Exception:
+            pass
+    # mlflow 2.13: flavor sklearn dibungkus _SklearnModelWrapper di dalam _model_impl
+    sklearn_model = getattr(getattr(model, "_model_impl", None), "sklearn_model", None)
+    return sklearn_model if sklearn_model is not None else model
+
+def _records_frame(records):
+    """JSON yang sudah di-parse (list objek/list, atau {"instances": [...]}) menjadi DataFrame."""
+    if isinstance(records, dict):
+        records = records.get("instances", [records])
+    if not isinstance(records, list):
+        raise ValueError("JSON batch harus berupa array atau objek dengan 'instances'.")
+    if records and not isinstance(records[0], dict):
+        return pd.DataFrame(records, columns=FEATURE_NAMES)
+    return pd.DataFrame.from_records(records)
+
+def _feature_frame(df):
+    missing_cols = [col for col in FEATURE_NAMES if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Kolom fitur tidak ditemukan pada input batch: {missing_cols}")
+
+    # Kolom lain (misalnya 'Heart Disease') diabaikan, nilai non-numerik jadi NaN lalu diimputasi
+    return df[FEATURE_NAMES].apply(pd.to_numeric, errors='coerce')
+
+def read_batch_input(path):
+    """
+    Membaca file input batch lokal (CSV, atau JSON array of objects/arrays untuk *.json) menjadi DataFrame
+    dengan 13 kolom fitur sesuai FEATURE_NAMES. Hanya untuk CLI; body HTTP memakai read_batch_body.
+    """
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            return _feature_frame(_records_frame(json.load(f)))
+    return _feature_frame(pd.read_csv(path))
+
+def read_batch_body(body, content_type=None):
+    """
+    Membaca body request batch (bytes/str berisi CSV atau JSON) menjadi DataFrame 13 kolom fitur.
+    Isi body selalu di-parse dari memori, tidak pernah diperlakukan sebagai path atau URL.
+    Body kosong atau tidak bisa di-parse menjadi ValueError (400 di endpoint).
+    """
+    try:
+        text = body.decode("utf-8") if isinstance(body, bytes) else body
+        if not text or not text.strip():
+            raise ValueError("Body request kosong.")
+        is_json = "json" in content_type if content_type else text.lstrip()[:1] in ("[", "{")
+        if is_json:
+            return _feature_frame(_records_frame(json.loads(text)))
+        return _feature_frame(pd.read_csv(io.StringIO(text)))
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Body batch tidak bisa dibaca: {e}")
+
+def _observe_stage(stage_metrics, stage, start):
+    """Mencatat durasi satu tahap (jika stage_metrics diberikan) dan mengembalikan waktu sekarang."""
+    now = time.perf_counter()
+    if stage_metrics is not None:
+        stage_metrics[stage].observe(now - start)
+    return now
+
+def predict_batch(model, imputer, scaler, features_df, stage_metrics=None):
+    """
+    Menjalankan imputasi, scaling, dan prediksi sekali jalan untuk seluruh baris.
+    Untuk model terkompilasi (CompiledForest), imputer/scaler diabaikan dan input boleh
+    berupa array NumPy. Mengembalikan tuple (prediksi, probabilitas kelas 1). Probabilitas bernilai NaN
+    jika model tidak menyediakan predict_proba. `stage_metrics` (opsional) adalah mapping nama tahap
+    ('impute', 'scale', 'transform', 'predict') -> histogram untuk mengukur durasi tiap tahap.
+    """
+    start = time.perf_counter()
+    if isinstance(model, CompiledForest):
+        # Jalur cepat: imputasi + scaling dilipat menjadi satu tahap 'transform' di model terkompilasi
+        if isinstance(features_df, pd.DataFrame):
+            features_df = features_df[FEATURE_NAMES].to_numpy(dtype=np.float64)
+        X_scaled = model.transform(features_df)
+        start = _observe_stage(stage_metrics, "transform", start)
+        result = model.predict_batch_scaled(X_scaled)
+        _observe_stage(stage_metrics, "predict", start)
+        return result
+
+    # Imputer di-fit dengan DataFrame (punya nama kolom), scaler dengan array hasil imputer
+    X_imputed = imputer.transform(features_df[FEATURE_NAMES])
+    start = _observe_stage(stage_metrics, "impute", start)
+    X_scaled = scaler.transform(X_imputed)
+    input_processed = pd.DataFrame(X_scaled, columns=FEATURE_NAMES)
+    start = _observe_stage(stage_metrics, "scale", start)
+
+    classifier = get_classifier(model)
+    if hasattr(classifier, "predict_proba"):
+        # Satu kali evaluasi forest: kelas diturunkan dari probabilitas (sama seperti predict sklearn)
+        proba = classifier.predict_proba(input_processed)
+        predictions = classifier.classes_.take(np.argmax(proba, axis=1))
+        positive_idx = list(classifier.classes_).index(1) if 1 in classifier.classes_ else -1
+        probabilities = proba[:, positive_idx]
+    else:
+        predictions = np.asarray(model.predict(input_processed))
+        probabilities = np.full(len(predictions), np.nan)
+    _observe_stage(stage_metrics, "predict", start)
+    return predictions.astype(int), probabilities
+
+def explain_batch(explainer, features_df, stage_metrics=None):
+    """
+    Seperti predict_batch untuk model terkompilasi, ditambah atribusi fitur dari traversal yang sama:
+    (prediksi, probabilitas kelas 1, base_value, kontribusi (n_baris, 13)). Kontribusi menjelaskan
+    probabilitas mentah (sebelum kalibrasi); base_value + jumlah kontribusi satu baris = probabilitasnya.
+    """
+    start = time.perf_counter()
+    if isinstance(features_df, pd.DataFrame):
+        features_df = features_df[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    X_scaled = explainer.transform(features_df)
+    start = _observe_stage(stage_metrics, "transform", start)
+    result = explainer.explain_batch_scaled(X_scaled)
+    # Tahap terpisah dari 'predict' agar overhead penjelasan terlihat di histogram tahap
+    _observe_stage(stage_metrics, "explain", start)
+    return result
+
+def iter_batch_predictions(model, imputer, scaler, features_df, chunk_size=DEFAULT_CHUNK_SIZE, explainer=None):
+    """
+    Generator yang memproses DataFrame per potongan (chunk) berukuran `chunk_size`
+    dan menghasilkan DataFrame fitur + kolom 'Prediction' dan 'Probability' per chunk.
+    Dengan `explainer` (CompiledForest), prediksi diambil dari explain_batch dan chunk ikut berisi
+    BASE_VALUE_COLUMN serta CONTRIBUTION_COLUMNS.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size harus lebih besar dari 0.")
+    for start in range(0, len(features_df), chunk_size):
+        chunk = features_df.iloc[start:start + chunk_size]
+        if explainer is not None:
+            predictions, probabilities, base_value, contributions = explain_batch(explainer, chunk)
+        else:
+            predictions, probabilities = predict_batch(model, imputer, scaler, chunk)
+        result = chunk.copy()
+        result['Prediction'] = np.where(predictions == 1, "Presence", "Absence")
+        result['Probability'] = probabilities
+        if explainer is not None:
+            result[BASE_VALUE_COLUMN] = base_value
+            result[CONTRIBUTION_COLUMNS] = contributions
+        yield result
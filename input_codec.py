@@ -0,0 +1,97 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# input_codec.py
+import os
+import math
+import numpy as np
+from inference import FEATURE_NAMES
+
+# Pilihan UI -> kode numerik (urutan dict = urutan pilihan di Gradio)
+UI_CHOICES = {
+    "Sex": {"Wanita": 0, "Pria": 1},
+    "Chest pain type": {"Typical Angina": 1, "Atypical Angina": 2, "Non-anginal Pain": 3, "Asymptomatic": 4},
+    "FBS over 120": {"Tidak": 0, "Ya": 1},
+    "EKG results": {"Normal": 0, "Abnormalitas ST-T": 1, "Hipertrofi Ventrikel Kiri": 2},
+    "Exercise angina": {"Tidak": 0, "Ya": 1},
+    "Slope of ST": {"Upsloping": 1, "Flat": 2, "Downsloping": 3},
+    "Thallium": {"Normal": 3, "Fixed Defect": 6, "Reversible Defect": 7},
+}
+# Batas slider UI (min, maks); fitur lain adalah kode kategori dan tidak dibatasi di sini
+SLIDER_BOUNDS = {
+    "Age": (29, 77),
+    "BP": (94, 200),
+    "Cholesterol": (126, 564),
+    "Max HR": (71, 202),
+    "ST depression": (0.0, 6.2),
+}
+# INPUT_RANGE_CHECK=0 mematikan validasi rentang (mis. untuk klien API yang sengaja mengirim nilai di luar slider)
+INPUT_RANGE_CHECK = os.getenv("INPUT_RANGE_CHECK", "1") != "0"
+
+class InputCodec:
+    """
+    Mengubah argumen UI (label teks) atau payload API (angka) langsung menjadi satu baris fitur
+    float32 berurutan FEATURE_NAMES. Tabel lookup dan batas dibangun sekali; per request hanya
+    satu array 13 elemen yang dialokasikan dan diisi di tempat, tanpa dict/list/DataFrame perantara.
+    """
+
+    def __init__(self, check_ranges=INPUT_RANGE_CHECK):
+        self.check_ranges = check_ranges
+        n = len(FEATURE_NAMES)
+        self._ui_tables = tuple(UI_CHOICES.get(name) for name in FEATURE_NAMES)
+        self._bounds = tuple(SLIDER_BOUNDS.get(name) if check_ranges else None for name in FEATURE_NAMES)
+        self._positions = tuple(zip(range(n), FEATURE_NAMES, self._bounds))
+        self._n = n
+
+    def _store(self, row, i, name, bounds, value):
+        if value is None:
+            value = math.nan # Nilai kosong diimputasi seperti pada prediksi batch
+        elif isinstance(value, str):
+            raise ValueError(f"Nilai fitur '{name}' bukan angka: {value!r}")
+        else:
+            try:
+                value = float(value) + 0.0 # +0.0 menormalkan -0.0, agar baris identik punya byte yang sama
+            except (TypeError, ValueError):
+                raise ValueError(f"Nilai fitur '{name}' bukan angka: {value!r}")
+        if bounds is not None and not math.isnan(value) and not (bounds[0] <= value <= bounds[1]):
+            raise ValueError(f"Nilai fitur '{name}' di luar rentang {bounds[0]}-{bounds[1]}: {value!r}")
+        row[i] = value
+
+    def encode_values(self, values):
+        """13 nilai numerik (list/tuple) -> baris float32. None menjadi NaN."""
+        if len(values) != self._n:
+            raise ValueError(f"Instance harus berupa objek dengan {self._n} fitur atau list {self._n} angka.")
+        row = np.empty(self._n, dtype=np.float32)
+        for (i, name, bounds), value in zip(self._positions, values):
+            self._store(row, i, name, bounds, value)
+        return row
+
+    def encode_ui(self, args):
+        """13 argumen komponen Gradio (label teks untuk Radio/Dropdown) -> baris float32."""
+        if len(args) != self._n:
+            raise ValueError(f"Dibutuhkan {self._n} input, diterima {len(args)}.")
+        row = np.empty(self._n, dtype=np.float32)
+        for (i, name, bounds), table, value in zip(self._positions, self._ui_tables, args):
+            if table is not None:
+                try:
+                    value = table[value]
+                except KeyError:
+                    raise ValueError(f"Pilihan '{value}' tidak dikenal untuk '{name}'.")
+            self._store(row, i, name, bounds, value)
+        return row
+
+    def encode_instance(self, instance):
+        """Satu instance JSON API: dict nama fitur -> nilai, atau list 13 angka."""
+        if isinstance(instance, dict):
+            missing = [name for name in FEATURE_NAMES if name not in instance]
+            if missing:
+                raise ValueError(f"Kolom fitur tidak ditemukan: {missing}")
+            row = np.empty(self._n, dtype=np.float32)
+            for i, name, bounds in self._positions:
+                self._store(row, i, name, bounds, instance[name])
+            return row
+        if isinstance(instance, (list, tuple)):
+            return self.encode_values(instance)
+        raise ValueError(f"Instance harus berupa objek dengan {self._n} fitur atau list {self._n} angka.")
@@ -0,0 +1,140 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# model_bundle.py
+import os
+import time
+import numpy as np
+import pandas as pd
+from fast_inference import CompiledForest, COMPILED_MODEL_FILE, compile_pipeline
+from inference import FEATURE_NAMES, predict_batch, explain_batch, get_classifier
+from drift import DRIFT_BASELINE_FILE, load_drift_baseline
+from calibration import CALIBRATION_FILE, load_calibration
+
+def _load_sklearn_model(model_dir):
+    """
+    Estimator sklearn langsung dari pickle flavor sklearn model MLflow. Prediksi selalu memakai estimator
+    mentah (lihat inference.get_classifier), jadi import + load pyfunc (~1,5 detik) hanya dipakai sebagai
+    cadangan untuk model tanpa flavor sklearn.
+    """
+    import yaml
+    with open(os.path.join(model_dir, "MLmodel")) as f:
+        flavor = (yaml.safe_load(f).get("flavors") or {}).get("sklearn")
+    if flavor and flavor.get("serialization_format") in ("cloudpickle", "pickle"):
+        import pickle
+        with open(os.path.join(model_dir, flavor["pickled_model"]), "rb") as f:
+            return pickle.load(f)
+    import mlflow.pyfunc
+    return mlflow.pyfunc.load_model(model_dir)
+
+def _load_explainer(entry_dir, model, imputer, scaler):
+    """
+    Explainer untuk bundle mode sklearn: compiled_model.npz yang dikirim bersama run (kontribusi node dihitung
+    saat training), atau dikompilasi dari RandomForest untuk run lama. None jika model bukan RandomForest.
+    """
+    compiled_path = os.path.join(entry_dir, COMPILED_MODEL_FILE)
+    if os.path.exists(compiled_path):
+        return CompiledForest.load(compiled_path)
+    from sklearn.ensemble import RandomForestClassifier
+    classifier = get_classifier(model)
+    if isinstance(classifier, RandomForestClassifier):
+        return CompiledForest(compile_pipeline(classifier, imputer, scaler))
+    return None
+
+class ModelBundle:
+    """
+    Satu versi model yang lengkap dan tidak diubah setelah dibuat: model, scaler, imputer,
+    serta run_id/versi asalnya. Server hanya memegang satu referensi ke bundle aktif,
+    sehingga pergantian model bersifat atomik dan request tidak pernah mencampur versi.
+    """
+
+    def __init__(self, model, scaler, imputer, run_id, version, mode="sklearn", drift_baseline=None, calibrator=None,
+                 explainer=None):
+        self.model = model
+        self.scaler = scaler
+        self.imputer = imputer
+        self.run_id = run_id
+        self.version = version
+        self.mode = mode
+        # Baseline drift dari data training versi ini (None untuk run lama tanpa artefak)
+        self.drift_baseline = drift_baseline
+        # Pemetaan probabilitas -> skor risiko terkalibrasi (None: skor risiko = probabilitas mentah)
+        self.calibrator = calibrator
+        # CompiledForest untuk atribusi fitur; model terkompilasi menjelaskan dirinya sendiri
+        self.explainer = model if isinstance(model, CompiledForest) else explainer
+
+    @classmethod
+    def load(cls, entry_dir, run_id, version, mode="sklearn"):
+        """Memuat bundle dari direktori artefak (entri cache) sesuai mode inferensi."""
+        baseline_path = os.path.join(entry_dir, DRIFT_BASELINE_FILE)
+        drift_baseline = load_drift_baseline(baseline_path) if os.path.exists(baseline_path) else None
+        calibration_path = os.path.join(entry_dir, CALIBRATION_FILE)
+        calibrator = load_calibration(calibration_path) if os.path.exists(calibration_path) else None
+        if mode == "compiled":
+            # Model terkompilasi sudah memuat imputer + scaler, tidak perlu sklearn/mlflow saat prediksi
+            return cls(CompiledForest.load(os.path.join(entry_dir, COMPILED_MODEL_FILE)), None, None,
+                       run_id, version, mode, drift_baseline, calibrator)
+
+        import joblib
+        model = _load_sklearn_model(os.path.join(entry_dir, "model"))
+        scaler = joblib.load(os.path.join(entry_dir, "scaler.joblib"))
+        imputer = joblib.load(os.path.join(entry_dir, "imputer.joblib"))
+        return cls(model, scaler, imputer, run_id, version, mode, drift_baseline, calibrator,
+                   _load_explainer(entry_dir, model, imputer, scaler))
+
+    def is_ready(self):
+        if isinstance(self.model, CompiledForest):
+            return True
+        return self.model is not None and self.scaler is not None and self.imputer is not None
+
+    def make_input(self, rows):
+        """Membentuk input untuk predict_batch dari list baris mentah (13 nilai per baris)."""
+        if isinstance(self.model, CompiledForest):
+            return np.asarray(rows, dtype=np.float64)
+        return pd.DataFrame(rows, columns=FEATURE_NAMES)
+
+    def predict_batch(self, features, stage_metrics=None):
+        """(prediksi, probabilitas kelas 1) untuk DataFrame/array fitur mentah."""
+        return predict_batch(self.model, self.imputer, self.scaler, features, stage_metrics)
+
+    def explain_batch(self, features, stage_metrics=None):
+        """(prediksi, probabilitas kelas 1, base_value, kontribusi per fitur) dari satu traversal explainer."""
+        return explain_batch(self.explainer, features, stage_metrics)
+
+    def risk_scores(self, probabilities):
+        """Skor risiko dari probabilitas yang sudah dihitung predict_batch (terkalibrasi jika ada artefak kalibrasi)."""
+        if self.calibrator is None:
+            return np.asarray(probabilities, dtype=np.float64)
+        return self.calibrator.transform(probabilities)
+
+    def __repr__(self):
+        return f"ModelBundle(version={self.version}, run_id={self.run_id}, mode={self.mode})"
+
+def warm_up_and_compare(candidate, current, replay_rows, latency_metric=None):
+    """
+    Menghangatkan bundle kandidat dengan memutar ulang request terbaru satu per satu (bentuk
+    trafik sebenarnya), lalu membandingkan keluarannya dengan bundle aktif dalam satu batch.
+    Mengembalikan dict berisi jumlah request, latensi p50/p99 (ms), dan tingkat ketidaksesuaian.
+    """
+    latencies = []
+    for row in replay_rows:
+        start = time.perf_counter()
+        candidate.predict_batch(candidate.make_input([row]))
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        if latency_metric is not None:
+            latency_metric.observe(elapsed)
+
+    report = {
+        "requests": len(replay_rows),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies else 0.0,
+        "disagreement": 0.0,
+    }
+    if current is not None and replay_rows:
+        new_predictions, _ = candidate.predict_batch(candidate.make_input(replay_rows))
+        old_predictions, _ = current.predict_batch(current.make_input(replay_rows))
+        report["disagreement"] = float(np.mean(new_predictions != old_predictions))
+    return report
@@ -0,0 +1,191 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# model_cache.py
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "HeartDiseaseClassifier"
+MODEL_STAGE = "Production"
+CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "heart-disease-models"))
+CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Artefak per run: direktori model MLflow + kedua preprocessor; model terkompilasi, baseline drift, dan kalibrasi opsional (run lama tidak punya)
+REQUIRED_ARTIFACTS = ["model", "scaler.joblib", "imputer.joblib"]
+OPTIONAL_ARTIFACTS = ["compiled_model.npz", "drift_baseline.json", "calibration.json"]
+MANIFEST_FILE = "manifest.json"
+PRODUCTION_POINTER = "production.json"
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _checksums(root):
+    """Checksum sha256 untuk setiap file di bawah root (path relatif -> digest)."""
+    checksums = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            # Termasuk manifest.json.tmp-<pid> milik proses lain yang sedang memperbarui last_used
+            if filename.startswith(MANIFEST_FILE):
+                continue
+            path = os.path.join(dirpath, filename)
+            checksums[os.path.relpath(path, root)] = _sha256(path)
+    return checksums
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+class ArtifactCache:
+    """
+    Cache artefak model di disk lokal, dikunci dengan run_id dan diverifikasi dengan checksum sha256.
+    Entri lama dihapus (LRU berdasarkan waktu pemakaian terakhir) jika total ukuran melebihi batas.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.runs_dir = os.path.join(cache_dir, "runs")
+
+    def entry_dir(self, run_id):
+        return os.path.join(self.runs_dir, run_id)
+
+    def _read_manifest(self, run_id):
+        try:
+            with open(os.path.join(self.entry_dir(run_id), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, run_id, verify=True):
+        """Mengembalikan manifest entri jika ada dan utuh, atau None (entri rusak dihapus)."""
+        manifest = self._read_manifest(run_id)
+        if manifest is None:
+            return None
+        if verify and _checksums(self.entry_dir(run_id)) != manifest["checksums"]:
+            logger.warning(f"Checksum cache untuk run {run_id} tidak cocok. Entri dihapus.")
+            shutil.rmtree(self.entry_dir(run_id), ignore_errors=True)
+            return None
+        manifest["last_used"] = time.time()
+        _write_json_atomic(os.path.join(self.entry_dir(run_id), MANIFEST_FILE), manifest)
+        return manifest
+
+    def fetch(self, client, run_id, version=None):
+        """Mengunduh artefak run ke direktori sementara lalu memindahkannya secara atomik ke cache."""
+        os.makedirs(self.runs_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{run_id}-", dir=self.runs_dir)
+        try:
+            for artifact in REQUIRED_ARTIFACTS:
+                client.download_artifacts(run_id=run_id, path=artifact, dst_path=tmp_dir)
+            for artifact in OPTIONAL_ARTIFACTS:
+                try:
+                    client.download_artifacts(run_id=run_id, path=artifact, dst_path=tmp_dir)
+                except Exception:
+                    logger.info(f"Artefak opsional {artifact} tidak ada di run {run_id}.")
+
+            checksums = _checksums(tmp_dir)
+            manifest = {
+                "run_id": run_id,
+                "version": version,
+                "checksums": checksums,
+                "size_bytes": sum(os.path.getsize(os.path.join(tmp_dir, p)) for p in checksums),
+                "created_at": time.time(),
+                "last_used": time.time(),
+            }
+            _write_json_atomic(os.path.join(tmp_dir, MANIFEST_FILE), manifest)
+
+            shutil.rmtree(self.entry_dir(run_id), ignore_errors=True)
+            os.replace(tmp_dir, self.entry_dir(run_id))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.evict(keep={run_id})
+        return manifest
+
+    def ensure(self, client, run_id, version=None):
+        """
+        Mengembalikan (manifest, cache_hit). Mengunduh hanya jika entri belum ada/rusak.
+        `client` boleh berupa fungsi pembuat MlflowClient, yang hanya dipanggil saat cache miss.
+        """
+        manifest = self.get(run_id)
+        if manifest is not None:
+            return manifest, True
+        # Beberapa worker di host yang sama bisa meminta run yang sama bersamaan: hanya satu yang mengunduh,
+        # sisanya menunggu lock lalu memakai entri yang sudah jadi (tanpa rmtree/replace yang saling tabrak)
+        import fcntl
+        os.makedirs(self.runs_dir, exist_ok=True)
+        with open(os.path.join(self.runs_dir, f".{run_id}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            manifest = self.get(run_id)
+            if manifest is not None:
+                return manifest, True
+            if callable(client):
+                client = client()
+            return self.fetch(client, run_id, version), False
+
+    def evict(self, keep=()):
+        """Menghapus entri yang paling lama tidak dipakai sampai total ukuran <= max_bytes."""
+        if not os.path.isdir(self.runs_dir):
+            return
+        production = self.get_production()
+        keep = set(keep) | ({production["run_id"]} if production else set())
+        manifests = [m for m in (self._read_manifest(r) for r in os.listdir(self.runs_dir)
+                                 if not r.startswith(".")) if m is not None]
+        total = sum(m["size_bytes"] for m in manifests)
+        for manifest in sorted(manifests, key=lambda m: m["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if manifest["run_id"] in keep:
+                continue
+            shutil.rmtree(self.entry_dir(manifest["run_id"]), ignore_errors=True)
+            total -= manifest["size_bytes"]
+            logger.info(f"Entri cache run {manifest['run_id']} dihapus (eviction).")
+
+    def set_production(self, run_id, version):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _write_json_atomic(os.path.join(self.cache_dir, PRODUCTION_POINTER),
+                           {"model_name": MODEL_NAME, "stage": MODEL_STAGE, "run_id": run_id, "version": version})
+
+    def get_production(self):
+        """Run Production terakhir yang diketahui, agar startup bisa berjalan tanpa registry."""
+        try:
+            with open(os.path.join(self.cache_dir, PRODUCTION_POINTER)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+def prefetch_production(cache=None):
+    """Mengunduh model Production terbaru ke cache (dipakai saat build image agar cache sudah hangat)."""
+    import mlflow
+    cache = cache or ArtifactCache()
+    client = mlflow.tracking.MlflowClient()
+    latest_version = client.get_latest_versions(name=MODEL_NAME, stages=[MODEL_STAGE])[0]
+    manifest, cache_hit = cache.ensure(client, latest_version.run_id, latest_version.version)
+    cache.set_production(latest_version.run_id, latest_version.version)
+    status = "sudah ada di cache" if cache_hit else "berhasil diunduh"
+    print(f"Model versi {latest_version.version} (run {latest_version.run_id}) {status}: "
+          f"{manifest['size_bytes'] / 1024 ** 2:.1f} MB di {cache.entry_dir(latest_version.run_id)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "prefetch":
+        print("Penggunaan: python model_cache.py prefetch")
+        sys.exit(1)
+    from train import setup_mlflow_tracking
+    setup_mlflow_tracking()
+    prefetch_production()
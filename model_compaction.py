@@ -0,0 +1,169 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# model_compaction.py
+# Tahap kompaksi setelah training: membuat varian RandomForest yang lebih kecil, mengukur
+# recall/F1, ukuran serialisasi, waktu muat, dan latensi predict setiap varian, lalu memilih
+# varian terkecil yang penurunan recall-nya masih di bawah batas.
+import io
+import copy
+import time
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import recall_score, f1_score
+from fast_inference import CompiledForest, compile_pipeline
+
+COMPACTION_REPORT_FILE = "compaction_report.json"
+DEFAULT_TREE_COUNTS = (10, 25, 50)
+DEFAULT_MAX_DEPTHS = (4, 6, 8, 12)
+
+def _unsampled_indices(estimator, n_samples, max_samples):
+    """Indeks out-of-bag satu pohon (bootstrap diulang dari random_state pohon, seperti oob_score_ sklearn)."""
+    from sklearn.ensemble import _forest
+    try:
+        n_bootstrap = _forest._get_n_samples_bootstrap(n_samples, max_samples, None)
+        return _forest._generate_unsampled_indices(estimator.random_state, n_samples, n_bootstrap, None)
+    except TypeError:
+        # sklearn < 1.7 tanpa argumen sample_weight
+        n_bootstrap = _forest._get_n_samples_bootstrap(n_samples, max_samples)
+        return _forest._generate_unsampled_indices(estimator.random_state, n_samples, n_bootstrap)
+
+def oob_tree_probabilities(model, X_train):
+    """Matriks (n_pohon, n_sampel) probabilitas kelas 1 dari setiap pohon; NaN jika sampel ikut bootstrap pohon itu."""
+    X = np.asarray(X_train, dtype=np.float32)
+    positive_idx = int(np.flatnonzero(model.classes_ == 1)[0])
+    proba = np.full((len(model.estimators_), len(X)), np.nan)
+    for t, estimator in enumerate(model.estimators_):
+        oob = _unsampled_indices(estimator, len(X), model.max_samples)
+        proba[t, oob] = estimator.predict_proba(X[oob])[:, positive_idx]
+    return proba
+
+def select_trees_by_oob(model, X_train, y_train, n_trees):
+    """
+    Seleksi maju serakah: setiap langkah menambahkan pohon yang paling menaikkan F1 out-of-bag
+    ensemble terpilih (kontribusi marjinal), sehingga tidak butuh data validasi terpisah.
+    Mengembalikan indeks pohon dalam urutan dipilih.
+    """
+    if not model.bootstrap:
+        raise ValueError("Seleksi OOB membutuhkan RandomForest dengan bootstrap=True.")
+    proba = oob_tree_probabilities(model, X_train)
+    y = np.asarray(y_train).astype(int)
+    has_vote = ~np.isnan(proba)
+    votes = np.where(has_vote, proba, 0.0)
+
+    selected, remaining = [], list(range(len(proba)))
+    vote_sum = np.zeros(proba.shape[1])
+    vote_count = np.zeros(proba.shape[1])
+    for _ in range(min(n_trees, len(proba))):
+        # Skor semua kandidat sekaligus: (kandidat, sampel)
+        cand_sum = vote_sum + votes[remaining]
+        cand_count = vote_count + has_vote[remaining]
+        covered = cand_count > 0
+        predicted = (cand_sum > 0.5 * cand_count) & covered
+        actual = (y == 1) & covered
+        tp = (predicted & actual).sum(axis=1)
+        fp = (predicted & ~actual & covered).sum(axis=1)
+        fn = (~predicted & actual).sum(axis=1)
+        f1 = 2 * tp / np.maximum(2 * tp + fp + fn, 1)
+        best = remaining[int(np.argmax(f1))]
+        selected.append(best)
+        remaining.remove(best)
+        vote_sum += votes[best]
+        vote_count += has_vote[best]
+    return selected
+
+def forest_subset(model, tree_indices):
+    """Salinan RandomForest yang hanya berisi pohon terpilih (predict_proba tetap rata-rata antar pohon)."""
+    subset = copy.copy(model)
+    subset.estimators_ = [model.estimators_[i] for i in tree_indices]
+    subset.n_estimators = len(subset.estimators_)
+    for attribute in ("oob_score_", "oob_decision_function_"):
+        subset.__dict__.pop(attribute, None)
+    return subset
+
+def build_variants(model, X_train, y_train, tree_counts=DEFAULT_TREE_COUNTS, max_depths=DEFAULT_MAX_DEPTHS):
+    """Model asli, subset pohon hasil seleksi OOB, dan retrain dengan kedalaman terbatas."""
+    variants = {"baseline": model}
+    order = select_trees_by_oob(model, X_train, y_train, max(tree_counts))
+    for n_trees in sorted(tree_counts):
+        if n_trees < len(model.estimators_):
+            variants[f"oob_top{n_trees}"] = forest_subset(model, order[:n_trees])
+    for depth in sorted(max_depths):
+        retrained = clone(model).set_params(max_depth=depth)
+        variants[f"depth{depth}"] = retrained.fit(X_train, y_train)
+    return variants
+
+def _latency_ms(predict, rows):
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    timings = np.asarray(timings) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+def evaluate_variant(model, imputer, scaler, X_test, y_test, n_latency_rows=200):
+    """Metrik satu varian: kualitas pada y_test, ukuran pickle/terkompilasi, waktu muat, latensi satu baris."""
+    y_test = np.asarray(y_test).astype(int)
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(payload)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Format terkompilasi: threshold float32 (sudah bawaan), nilai daun float32 untuk varian ringkas
+    compiled = {}
+    for name, value_dtype in (("compiled", np.float64), ("compiled_f32", np.float32)):
+        arrays = compile_pipeline(model, imputer, scaler, value_dtype=value_dtype)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        compiled[name] = (CompiledForest(arrays), buffer.tell())
+
+    X_array = np.asarray(X_test, dtype=np.float64)
+    # Baris DataFrame satu-satu seperti jalur serving sklearn (nama kolom ikut, tanpa peringatan feature names)
+    X_frame = pd.DataFrame(X_array, columns=getattr(model, "feature_names_in_", None))
+    rows = [X_frame.iloc[i:i + 1] for i in range(min(n_latency_rows, len(X_frame)))]
+    y_pred = model.predict(X_test)
+    # X_test sudah di-impute/scale; forest terkompilasi menerima data mentah, jadi dikembalikan ke skala asli
+    X_raw = scaler.inverse_transform(X_array)
+    f32_forest, f32_bytes = compiled["compiled_f32"]
+    y_pred_f32, _ = f32_forest.predict_batch(X_raw)
+    sklearn_p50, sklearn_p99 = _latency_ms(model.predict_proba, rows)
+    compiled_p50, compiled_p99 = _latency_ms(lambda row: f32_forest.predict_batch(row.reshape(1, -1)),
+                                             X_raw[:n_latency_rows])
+    return {
+        "n_trees": len(model.estimators_),
+        "n_nodes": int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+        "max_depth": int(max(estimator.tree_.max_depth for estimator in model.estimators_)),
+        "recall": float(recall_score(y_test, y_pred)),
+        "f1_score": float(f1_score(y_test, y_pred)),
+        "recall_compiled_f32": float(recall_score(y_test, y_pred_f32)),
+        "pickle_kb": len(payload) / 1024,
+        "compiled_kb": compiled["compiled"][1] / 1024,
+        "compiled_f32_kb": f32_bytes / 1024,
+        "load_ms": load_ms,
+        "p50_ms": sklearn_p50,
+        "p99_ms": sklearn_p99,
+        "compiled_p50_ms": compiled_p50,
+        "compiled_p99_ms": compiled_p99,
+    }
+
+def compact_model(model, imputer, scaler, X_train, y_train, X_test, y_test, max_recall_loss=0.01,
+                  tree_counts=DEFAULT_TREE_COUNTS, max_depths=DEFAULT_MAX_DEPTHS):
+    """
+    Membangun dan mengevaluasi semua varian, lalu memilih varian dengan pickle terkecil yang recall-nya
+    paling banyak `max_recall_loss` di bawah model asli (recall paling penting secara klinis).
+    Mengembalikan (nama varian terpilih, model terpilih, laporan DataFrame per varian).
+    """
+    variants = build_variants(model, X_train, y_train, tree_counts, max_depths)
+    report = pd.DataFrame({name: evaluate_variant(variant, imputer, scaler, X_test, y_test)
+                           for name, variant in variants.items()}).T
+    report.index.name = "variant"
+    baseline_recall = report.loc["baseline", "recall"]
+    report["recall_loss"] = baseline_recall - report["recall"]
+    report["eligible"] = report["recall_loss"] <= max_recall_loss + 1e-12
+    chosen = report[report["eligible"]].sort_values(["pickle_kb", "p50_ms"]).index[0]
+    return chosen, variants[chosen], report
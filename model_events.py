@@ -0,0 +1,90 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# model_events.py
+import os
+import json
+import time
+import threading
+import logging
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# File event lokal (pengganti pub/sub ringan) dan daftar endpoint reload replika
+MODEL_EVENT_FILE = os.getenv("MODEL_EVENT_FILE", "")
+MODEL_RELOAD_URLS = [url.strip() for url in os.getenv("MODEL_RELOAD_URLS", "").split(",") if url.strip()]
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN", "")
+
+def make_promotion_event(model_name, version, run_id):
+    return {"event": "model_promoted", "model_name": model_name, "version": str(version),
+            "run_id": run_id, "promoted_at": time.time()}
+
+def publish_promotion_event(event, event_file=MODEL_EVENT_FILE, reload_urls=MODEL_RELOAD_URLS, token=MODEL_RELOAD_TOKEN):
+    """
+    Menyebarkan event promosi model: ditulis atomik ke file event (untuk watcher lokal)
+    dan dikirim ke endpoint /admin/reload setiap replika. Kegagalan satu tujuan tidak
+    menghentikan tujuan lain; polling di replika tetap menjadi cadangan.
+    """
+    delivered = 0
+    if event_file:
+        os.makedirs(os.path.dirname(os.path.abspath(event_file)), exist_ok=True)
+        tmp_path = f"{event_file}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(event, f)
+        os.replace(tmp_path, event_file)
+        delivered += 1
+
+    for url in reload_urls:
+        req = urllib.request.Request(url, data=json.dumps(event).encode("utf-8"), method="POST",
+                                     headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                logger.info(f"Event promosi terkirim ke {url}: HTTP {response.status}")
+                delivered += 1
+        except Exception as e:
+            logger.warning(f"Gagal mengirim event promosi ke {url}: {e}")
+    return delivered
+
+def read_event(event_file):
+    try:
+        with open(event_file) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+class ModelEventWatcher:
+    """Memantau file event (berdasarkan mtime) dan memanggil callback untuk setiap event baru."""
+
+    def __init__(self, event_file, callback, poll_seconds=1.0):
+        self.event_file = event_file
+        self.callback = callback
+        self.poll_seconds = poll_seconds
+        # Event yang sudah ada saat start dianggap sudah diproses (model diambil dari registry/cache)
+        self._last_mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.event_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def run(self):
+        while True:
+            mtime = self._mtime()
+            if mtime is not None and mtime != self._last_mtime:
+                self._last_mtime = mtime
+                event = read_event(self.event_file)
+                if event is not None:
+                    try:
+                        self.callback(event)
+                    except Exception as e:
+                        logger.error(f"Gagal memproses event model: {e}")
+            time.sleep(self.poll_seconds)
+
+    def start(self):
+        thread = threading.Thread(target=self.run, name="model-event-watcher", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,85 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# prediction_cache.py
+import math
+import time
+import threading
+from collections import OrderedDict
+
+def canonical_features(values):
+    """Tuple fitur kanonik: semua angka sebagai float (54 == 54.0), NaN/None sebagai None, -0.0 sebagai 0.0."""
+    key = []
+    for value in values:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = None
+        if value is not None and math.isnan(value):
+            value = None
+        key.append(value + 0.0 if value is not None else None)
+    return tuple(key)
+
+class PredictionCache:
+    """
+    Cache hasil prediksi di memori proses, dikunci dengan (run_id, tuple fitur kanonik).
+    Ukuran dibatasi (LRU) dan setiap entri kedaluwarsa setelah ttl_seconds. max_size=0 menonaktifkan cache.
+    """
+
+    def __init__(self, max_size=10_000, ttl_seconds=600.0, hit_metric=None, miss_metric=None, eviction_metric=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hit_metric = hit_metric
+        self.miss_metric = miss_metric
+        self.eviction_metric = eviction_metric
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evicted(self, reason, count=1):
+        if self.eviction_metric is not None and count:
+            self.eviction_metric.labels(reason=reason).inc(count)
+
+    def get(self, run_id, features):
+        """Hasil yang tersimpan, atau None jika tidak ada/kedaluwarsa."""
+        if self.max_size <= 0:
+            return None
+        key = (run_id, canonical_features(features))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self._evicted("ttl")
+                entry = None
+            if entry is None:
+                if self.miss_metric is not None:
+                    self.miss_metric.inc()
+                return None
+            self._entries.move_to_end(key)
+        if self.hit_metric is not None:
+            self.hit_metric.inc()
+        return entry[1]
+
+    def put(self, run_id, features, result):
+        if self.max_size <= 0:
+            return
+        key = (run_id, canonical_features(features))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._evicted("lru", evicted)
+
+    def clear(self):
+        """Mengosongkan seluruh cache (dipanggil setiap kali model aktif berganti)."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        self._evicted("invalidate", count)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,269 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# prediction_log.py
+import os
+import glob
+import time
+import threading
+import logging
+from collections import deque
+import pyarrow as pa
+import pyarrow.parquet as pq
+from inference import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = os.path.join('data', 'prediction_logs')
+LOG_COLUMNS = FEATURE_NAMES + ['Prediction', 'Timestamp']
+LOG_SCHEMA = pa.schema([(name, pa.float64()) for name in FEATURE_NAMES] +
+                       [('Prediction', pa.string()), ('Timestamp', pa.float64())])
+
+# Segmen yang masih ditulis berakhiran .open; hanya file .parquet yang boleh dibaca/dihapus
+OPEN_SUFFIX = '.parquet.open'
+CLOSED_SUFFIX = '.parquet'
+# Jumlah baris yang sudah ditulis ke segmen terbuka (file tersembunyi agar dilewati pembaca direktori parquet);
+# segmen .open tanpa footer tidak bisa dibaca, jadi hanya dari sini baris yang hilang saat crash bisa dihitung
+ROWS_SUFFIX = '.rows'
+
+def _rows_path(segment_path):
+    directory, name = os.path.split(segment_path)
+    return os.path.join(directory, '.' + name + ROWS_SUFFIX)
+
+def _segment_pid(segment_path):
+    """PID penulis dari nama segment-<ns>-<pid>-<urutan>, atau None jika nama tidak dikenal."""
+    parts = os.path.basename(segment_path).split('-')
+    return int(parts[2]) if len(parts) == 4 and parts[2].isdigit() else None
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class PredictionLogWriter:
+    """
+    Penulis log prediksi asinkron. Request hanya menambahkan baris ke ring buffer di memori;
+    thread latar belakang menulisnya sebagai row group Parquet ke segmen yang sedang terbuka,
+    lalu merotasi segmen (rename atomik .open -> .parquet) berdasarkan jumlah baris/umur segmen.
+    Jika buffer penuh, baris terlama dibuang dan dihitung di dropped_metric (Counter Prometheus, opsional).
+    """
+
+    def __init__(self, log_dir=LOG_DIR, buffer_capacity=100_000, flush_rows=1000, flush_interval_seconds=5.0,
+                 segment_max_rows=50_000, segment_max_age_seconds=60.0, recent_capacity=1000, dropped_metric=None):
+        self.log_dir = log_dir
+        self.flush_rows = flush_rows
+        self.flush_interval_seconds = flush_interval_seconds
+        self.segment_max_rows = segment_max_rows
+        self.segment_max_age_seconds = segment_max_age_seconds
+        self.dropped_rows = 0
+        self.dropped_metric = dropped_metric
+
+        self._buffer = deque(maxlen=buffer_capacity)
+        # Salinan baris terbaru yang tidak ikut di-flush, untuk replay saat warm-up model baru
+        self._recent = deque(maxlen=recent_capacity)
+        self._wakeup = threading.Event()
+        self._file_lock = threading.Lock()
+        self._writer = None
+        self._segment_path = None
+        self._segment_rows = 0
+        self._segment_opened_at = None
+        self._sequence = 0
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.recover_orphaned_segments()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+            self._thread.start()
+
+    def recover_orphaned_segments(self):
+        """
+        Membereskan segmen .open milik proses yang sudah mati (crash/SIGKILL sebelum rotasi). Segmen yang
+        footer-nya sudah tertulis dipublikasikan; sisanya dihapus dan barisnya dihitung sebagai terbuang.
+        PID sendiri juga dianggap mati kecuali segmennya sedang dibuka (PID dipakai ulang setelah restart container).
+        """
+        for path in glob.glob(os.path.join(self.log_dir, '*' + OPEN_SUFFIX)):
+            segment_path = path[:-len(OPEN_SUFFIX)]
+            pid = _segment_pid(segment_path)
+            if segment_path == self._segment_path or pid is None or (pid != os.getpid() and _pid_alive(pid)):
+                continue
+            try:
+                n_rows = pq.ParquetFile(path).metadata.num_rows
+            except Exception:
+                n_rows = None # Footer belum tertulis (atau file sudah dibereskan proses lain)
+            try:
+                if n_rows is not None:
+                    os.replace(path, segment_path + CLOSED_SUFFIX)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue # Sudah dibereskan proses lain
+            if n_rows is not None:
+                logger.warning(f"Segmen log prediksi yatim dipulihkan: {segment_path + CLOSED_SUFFIX} ({n_rows} baris)")
+            else:
+                lost = self._read_rows_file(segment_path)
+                self.dropped_rows += lost
+                if self.dropped_metric is not None:
+                    self.dropped_metric.inc(lost)
+                logger.warning(f"Segmen log prediksi yatim tidak lengkap dihapus: {path} ({lost} baris hilang)")
+            try:
+                os.remove(_rows_path(segment_path))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _read_rows_file(segment_path):
+        try:
+            with open(_rows_path(segment_path)) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _enqueue(self, rows):
+        if self._thread is None:
+            self.start()
+        dropped = 0
+        for row in rows:
+            if len(self._buffer) == self._buffer.maxlen:
+                dropped += 1
+            self._buffer.append(row)
+            self._recent.append(row)
+        if dropped:
+            self.dropped_rows += dropped
+            if self.dropped_metric is not None:
+                self.dropped_metric.inc(dropped)
+        if len(self._buffer) >= self.flush_rows:
+            self._wakeup.set()
+
+    def append(self, feature_dict):
+        """Menambahkan satu baris (dict fitur + 'Prediction') ke buffer. Tidak menyentuh disk."""
+        row = tuple(feature_dict.get(name) for name in LOG_COLUMNS[:-1]) + (feature_dict.get('Timestamp', time.time()),)
+        self._enqueue((row,))
+
+    def append_values(self, values, prediction, timestamp=None):
+        """Seperti append, tetapi dari nilai fitur berurutan FEATURE_NAMES tanpa dict perantara."""
+        self._enqueue(((*values, prediction, time.time() if timestamp is None else timestamp),))
+
+    def append_batch(self, df):
+        """Menambahkan banyak baris sekaligus dari DataFrame berkolom FEATURE_NAMES + 'Prediction'."""
+        now = time.time()
+        columns = [df[name].to_numpy() for name in FEATURE_NAMES + ['Prediction']]
+        timestamps = df['Timestamp'].to_numpy() if 'Timestamp' in df.columns else [now] * len(df)
+        self._enqueue(zip(*columns, timestamps))
+
+    def recent_rows(self, n=None):
+        """Nilai fitur (13 kolom) dari maksimal n prediksi terakhir yang dicatat proses ini."""
+        rows = list(self._recent)
+        if n is not None:
+            rows = rows[-n:]
+        return [list(row[:len(FEATURE_NAMES)]) for row in rows]
+
+    def _next_segment_name(self):
+        self._sequence += 1
+        return os.path.join(self.log_dir, f"segment-{time.time_ns()}-{os.getpid()}-{self._sequence:06d}")
+
+    def flush(self):
+        """Menulis isi buffer sebagai satu row group ke segmen terbuka (dipanggil dari thread writer)."""
+        with self._file_lock:
+            n_rows = len(self._buffer)
+            if n_rows:
+                rows = [self._buffer.popleft() for _ in range(n_rows)]
+                columns = list(zip(*rows))
+                arrays = [pa.array([None if v is None else float(v) for v in col], type=pa.float64())
+                          for col in columns[:len(FEATURE_NAMES)]]
+                arrays.append(pa.array([None if v is None else str(v) for v in columns[len(FEATURE_NAMES)]], type=pa.string()))
+                arrays.append(pa.array(columns[-1], type=pa.float64()))
+                table = pa.Table.from_arrays(arrays, schema=LOG_SCHEMA)
+
+                if self._writer is None:
+                    os.makedirs(self.log_dir, exist_ok=True)
+                    self._segment_path = self._next_segment_name()
+                    self._writer = pq.ParquetWriter(self._segment_path + OPEN_SUFFIX, LOG_SCHEMA)
+                    self._segment_rows = 0
+                    self._segment_opened_at = time.monotonic()
+                self._writer.write_table(table)
+                self._segment_rows += n_rows
+                with open(_rows_path(self._segment_path), 'w') as f:
+                    f.write(str(self._segment_rows))
+
+            if self._writer is not None and (
+                    self._segment_rows >= self.segment_max_rows or
+                    time.monotonic() - self._segment_opened_at >= self.segment_max_age_seconds):
+                self._rotate_locked()
+
+    def _rotate_locked(self):
+        # Footer Parquet ditulis saat close, baru setelah itu segmen dipublikasikan dengan rename atomik
+        self._writer.close()
+        os.replace(self._segment_path + OPEN_SUFFIX, self._segment_path + CLOSED_SUFFIX)
+        os.remove(_rows_path(self._segment_path))
+        logger.info(f"Segmen log prediksi ditutup: {self._segment_path + CLOSED_SUFFIX} ({self._segment_rows} baris)")
+        self._writer = None
+        self._segment_path = None
+        self._segment_rows = 0
+
+    def rotate(self):
+        """Menulis sisa buffer lalu menutup segmen terbuka agar langsung terlihat oleh pembaca."""
+        self.flush()
+        with self._file_lock:
+            if self._writer is not None:
+                self._rotate_locked()
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds * 2)
+        self.rotate()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Gagal menulis log prediksi: {e}")
+        if self.dropped_rows:
+            logger.warning(f"{self.dropped_rows} baris log prediksi terbuang karena buffer penuh.")
+
+# --- Sisi pembaca: hanya segmen yang sudah ditutup ---
+def list_closed_segments(log_dir=LOG_DIR):
+    """Daftar segmen tertutup, diurutkan dari yang paling lama."""
+    return sorted(glob.glob(os.path.join(log_dir, '*' + CLOSED_SUFFIX)))
+
+def read_segments(segment_paths, columns=None):
+    """Membaca segmen tertentu menjadi satu DataFrame (kosong jika tidak ada segmen)."""
+    if not segment_paths:
+        return LOG_SCHEMA.empty_table().to_pandas()
+    tables = [pq.read_table(path, columns=columns) for path in segment_paths]
+    return pa.concat_tables(tables).to_pandas()
+
+def read_recent_rows(n, log_dir=LOG_DIR):
+    """Nilai fitur dari maksimal n baris terakhir di segmen tertutup terbaru."""
+    tables, total = [], 0
+    for path in reversed(list_closed_segments(log_dir)):
+        table = pq.read_table(path, columns=FEATURE_NAMES)
+        tables.insert(0, table)
+        total += table.num_rows
+        if total >= n:
+            break
+    if not tables:
+        return []
+    table = pa.concat_tables(tables)
+    return table.slice(max(0, table.num_rows - n)).to_pandas().values.tolist()
+
+def delete_segments(segment_paths):
+    """Menghapus tepat segmen yang sudah dibaca. Segmen baru yang muncul setelahnya tidak tersentuh."""
+    for path in segment_paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
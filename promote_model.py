@@ -7,6 +7,7 @@
 import mlflow
 import os
 from mlflow.tracking import MlflowClient
+from model_events import make_promotion_event, publish_promotion_event
 
 def promote_latest_model():
     """
@@ -39,6 +40,7 @@ def promote_latest_model():
             return
 
         new_model_version = latest_versions[0].version
+        new_run_id = latest_versions[0].run_id
         print(f"Mempromosikan Version {new_model_version} dari model '{model_name}' ke Production...")
 
         # 2. Pindahkan versi baru ke Production dan arsipkan versi lama
@@ -51,6 +53,10 @@ def promote_latest_model():
         print("✅ Model berhasil dipromosikan ke Production.")
         print(f"Versi lama dari '{model_name}' di stage Production telah diarsipkan.")
 
+        # 3. Beri tahu replika agar langsung memuat versi baru (polling hanya cadangan)
+        delivered = publish_promotion_event(make_promotion_event(model_name, new_model_version, new_run_id))
+        print(f"Event promosi dikirim ke {delivered} tujuan.")
+
     except Exception as e:
         print(f"Gagal mempromosikan model: {e}")
         exit(1)
@@ -0,0 +1,167 @@
+# 225150207111001_1 MUHAMMAD NADHIF_1
+# 225150201111002_2 NALENDRA MARCHELO_2
+# 225150200111005_3 NARENDRA ATHA ABHINAYA_3
+# 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
+
+# shared_bundle.py
+# Mode loader "shared" untuk serving multi-worker: proses supervisor memuat bundle Production sekali,
+# lalu menerbitkan array forest terkompilasi + vektor preprocessing sebagai file .npy di memori bersama
+# (/dev/shm). Worker memetakan file tersebut read-only (mmap) sehingga halaman memorinya dipakai bersama
+# tanpa salinan, dan berpindah versi saat penghitung generasi (di memori bersama) berubah.
+import os
+import json
+import time
+import shutil
+import ctypes
+import logging
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+from fast_inference import CompiledForest, compile_pipeline
+from model_bundle import ModelBundle
+from drift import DRIFT_BASELINE_FILE, save_drift_baseline, load_drift_baseline
+from calibration import CALIBRATION_FILE, save_calibration, load_calibration
+from inference import get_classifier
+
+logger = logging.getLogger(__name__)
+
+# tmpfs (/dev/shm) berarti file langsung berada di RAM; di luar Linux jatuh ke direktori temp biasa
+SHARED_MODEL_DIR = os.getenv("SHARED_MODEL_DIR", os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "heart-disease-model"))
+BUNDLE_META_FILE = "bundle.json"
+
+def compiled_arrays(bundle):
+    """Array CompiledForest dari bundle (mode compiled atau RandomForest sklearn), atau None jika tidak didukung."""
+    if isinstance(bundle.model, CompiledForest):
+        return bundle.model.to_arrays()
+    from sklearn.ensemble import RandomForestClassifier
+    classifier = get_classifier(bundle.model)
+    if not isinstance(classifier, RandomForestClassifier):
+        return None
+    return CompiledForest(compile_pipeline(classifier, bundle.imputer, bundle.scaler)).to_arrays()
+
+def memory_usage(pid="self"):
+    """
+    Pemakaian memori proses dalam byte: rss, pss (halaman bersama dibagi rata antar proses pemakainya),
+    shared, dan private. PSS adalah angka yang adil untuk worker yang berbagi halaman model.
+    """
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    usage[key] = int(rest.split()[0]) * 1024
+    except OSError:
+        return {}
+    return {"rss": usage.get("Rss", 0), "pss": usage.get("Pss", 0),
+            "shared": usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0),
+            "private": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)}
+
+class SharedModelStore:
+    """
+    Direktori generasi bundle di memori bersama. Setiap publish() menulis satu direktori
+    gen-<n> secara atomik lalu menaikkan penghitung generasi; attach() memetakan array
+    generasi tersebut read-only. Harus dibuat di supervisor sebelum fork agar penghitungnya ikut dibagi.
+    """
+
+    def __init__(self, root=SHARED_MODEL_DIR):
+        self.owner_pid = os.getpid()
+        self.root = os.path.join(root, str(self.owner_pid))
+        os.makedirs(self.root, exist_ok=True)
+        # Penghitung di memori bersama (anonim, diwarisi lewat fork); tulis 8 byte sejajar bersifat atomik
+        self.generation = multiprocessing.RawValue(ctypes.c_uint64, 0)
+
+    def generation_dir(self, generation):
+        return os.path.join(self.root, f"gen-{generation:06d}")
+
+    def is_owner(self):
+        return os.getpid() == self.owner_pid
+
+    def publish(self, bundle, drift_baseline=None):
+        """
+        Menerbitkan bundle sebagai generasi baru dan mengembalikan nomornya, atau None jika model
+        tidak bisa dikompilasi (bukan RandomForest). `drift_baseline` dipakai jika bundle tidak punya.
+        """
+        if not self.is_owner():
+            raise RuntimeError("Hanya proses supervisor yang boleh menerbitkan bundle bersama.")
+        arrays = compiled_arrays(bundle)
+        if arrays is None:
+            return None
+        generation = self.generation.value + 1
+        tmp_dir = tempfile.mkdtemp(prefix=".gen-", dir=self.root)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+            baseline = bundle.drift_baseline if bundle.drift_baseline is not None else drift_baseline
+            if baseline is not None:
+                save_drift_baseline(baseline, os.path.join(tmp_dir, DRIFT_BASELINE_FILE))
+            if bundle.calibrator is not None:
+                save_calibration(bundle.calibrator, os.path.join(tmp_dir, CALIBRATION_FILE))
+            with open(os.path.join(tmp_dir, BUNDLE_META_FILE), "w") as f:
+                json.dump({"generation": generation, "run_id": bundle.run_id, "version": bundle.version,
+                           "arrays": sorted(arrays), "published_at": time.time()}, f)
+            os.replace(tmp_dir, self.generation_dir(generation))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.generation.value = generation
+        # Generasi sebelumnya disimpan sebagai cadangan untuk worker yang sedang menempel; yang lebih lama
+        # boleh dihapus karena pemetaan mmap yang masih aktif tetap valid setelah file di-unlink
+        for entry in os.listdir(self.root):
+            if entry.startswith("gen-") and int(entry[4:]) < generation - 1:
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+        return generation
+
+    def attach(self, generation=None):
+        """ModelBundle dengan CompiledForest di atas array mmap read-only (tanpa salinan) untuk satu generasi."""
+        generation = self.generation.value if generation is None else generation
+        gen_dir = self.generation_dir(generation)
+        with open(os.path.join(gen_dir, BUNDLE_META_FILE)) as f:
+            meta = json.load(f)
+        # np.asarray melepas subclass memmap (operasi NumPy tetap ndarray biasa) tanpa menyalin data
+        arrays = {name: np.asarray(np.load(os.path.join(gen_dir, f"{name}.npy"), mmap_mode="r"))
+                  for name in meta["arrays"]}
+        baseline_path = os.path.join(gen_dir, DRIFT_BASELINE_FILE)
+        drift_baseline = load_drift_baseline(baseline_path) if os.path.exists(baseline_path) else None
+        calibration_path = os.path.join(gen_dir, CALIBRATION_FILE)
+        calibrator = load_calibration(calibration_path) if os.path.exists(calibration_path) else None
+        return ModelBundle(CompiledForest(arrays), None, None, meta["run_id"], meta["version"], "shared",
+                           drift_baseline, calibrator)
+
+    def close(self):
+        if self.is_owner():
+            shutil.rmtree(self.root, ignore_errors=True)
+
+class SharedBundleWatcher:
+    """Memantau penghitung generasi di worker dan memanggil callback(bundle, generation) untuk setiap generasi baru."""
+
+    def __init__(self, store, callback, poll_seconds=0.5):
+        self.store = store
+        self.callback = callback
+        self.poll_seconds = poll_seconds
+        self.attached = 0
+
+    def check(self):
+        generation = self.store.generation.value
+        if generation == self.attached:
+            return False
+        bundle = self.store.attach(generation)
+        self.attached = generation
+        self.callback(bundle, generation)
+        return True
+
+    def run(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                # Mis. generasi sudah dihapus karena supervisor menerbitkan dua kali berturut-turut; dicoba lagi
+                logger.error(f"Gagal menempel ke bundle bersama: {e}")
+            time.sleep(self.poll_seconds)
+
+    def start(self):
+        thread = threading.Thread(target=self.run, name="shared-bundle-watcher", daemon=True)
+        thread.start()
+        return thread
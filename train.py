@@ -4,24 +4,47 @@
 # 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
 
 import pandas as pd
+import numpy as np
 import argparse
 import mlflow
 import mlflow.sklearn
 import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+import sys
+import time
+import resource
+from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV, RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.pipeline import Pipeline
+from scipy.stats import randint, uniform
 from sklearn.metrics import accuracy_score, recall_score, precision_score, f1_score
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
 from mlflow.models import infer_signature
 import os
+from fast_inference import export_compiled_model
+from inference import FEATURE_NAMES
+from drift import build_drift_baseline, save_drift_baseline
+from calibration import CALIBRATION_METHODS, ProbabilityCalibrator, save_calibration
+from dataset_format import is_typed_dataset, load_dataframe, normalize_target, read_schema
 
 # --- 1. FUNGSI-FUNGSI (load_data, preprocess_data) ---
 def load_data(file_path):
     print(f"Memuat data dari: {file_path}")
-    df = pd.read_csv(file_path)
-    if 'Heart Disease' in df.columns and df['Heart Disease'].dtype == 'object':
-        df['Heart Disease'] = df['Heart Disease'].map({'Presence': 1, 'Absence': 0})
+    if is_typed_dataset(file_path):
+        # Dataset bertipe (hasil dataset_format.py ingest): target sudah 0/1, duplikat sudah dibuang
+        return load_dataframe(file_path)
+    if os.path.isdir(file_path):
+        # Direktori dataset store: partisi dibaca chunk demi chunk, kolom 'Prediction' (log) tidak ikut
+        from dataset_store import DatasetStore, TARGET_COLUMN
+        chunks = list(DatasetStore(file_path).scan(columns=FEATURE_NAMES + [TARGET_COLUMN]))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=FEATURE_NAMES + [TARGET_COLUMN])
+    else:
+        df = pd.read_csv(file_path)
+    if 'Heart Disease' in df.columns:
+        # 'Presence'/'Absence' maupun 0/1 dinormalkan ke 0/1; label tidak dikenal menjadi NaN
+        df['Heart Disease'] = pd.Series(normalize_target(df['Heart Disease']), index=df.index).replace(-1, np.nan)
     return df
 
 def preprocess_data(df):
@@ -38,6 +61,127 @@ def preprocess_data(df):
         X_preprocessed, y, test_size=0.2, random_state=42, stratify=y)
     return X_train, X_test, y_train, y_test, scaler, imputer
 
+def split_raw_data(df):
+    """Split 80/20 yang sama dengan preprocess_data, tetapi sebelum imputasi/scaling (untuk mode search)."""
+    TARGET_COLUMN = 'Heart Disease'
+    df.dropna(subset=[TARGET_COLUMN], inplace=True)
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN].astype(int)
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+# --- 2a. HYPER-PARAMETER SEARCH ---
+# Ruang pencarian untuk grid/halving (diskret) dan random (distribusi)
+RF_PARAM_GRID = {
+    "model": [RandomForestClassifier(random_state=42)],
+    "model__n_estimators": [100, 200, 400],
+    "model__max_depth": [None, 8, 16],
+    "model__min_samples_leaf": [1, 2, 4],
+    "model__max_features": ["sqrt", 0.5],
+}
+GB_PARAM_GRID = {
+    "model": [GradientBoostingClassifier(random_state=42)],
+    "model__n_estimators": [100, 200],
+    "model__learning_rate": [0.05, 0.1],
+    "model__max_depth": [2, 3],
+}
+RF_PARAM_DISTRIBUTIONS = {
+    "model": [RandomForestClassifier(random_state=42)],
+    "model__n_estimators": randint(50, 500),
+    "model__max_depth": [None, 4, 8, 12, 16, 24],
+    "model__min_samples_leaf": randint(1, 8),
+    "model__max_features": ["sqrt", "log2", 0.3, 0.5, 0.8],
+}
+GB_PARAM_DISTRIBUTIONS = {
+    "model": [GradientBoostingClassifier(random_state=42)],
+    "model__n_estimators": randint(50, 400),
+    "model__learning_rate": uniform(0.01, 0.19),
+    "model__max_depth": randint(2, 5),
+    "model__subsample": uniform(0.6, 0.4),
+}
+
+def build_search(search, cv_folds=5, n_iter=20, include_gb=False, scoring="f1", n_jobs=-1):
+    """
+    Membuat objek search sklearn di atas Pipeline imputer -> scaler -> model, sehingga
+    preprocessing di-fit ulang di setiap fold (tanpa kebocoran dari fold validasi).
+    """
+    pipeline = Pipeline([
+        ("imputer", SimpleImputer(strategy='median')),
+        ("scaler", StandardScaler()),
+        ("model", RandomForestClassifier(random_state=42)),
+    ])
+    cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    if search == "grid":
+        grid = [RF_PARAM_GRID] + ([GB_PARAM_GRID] if include_gb else [])
+        return GridSearchCV(pipeline, grid, scoring=scoring, cv=cv, n_jobs=n_jobs, refit=True)
+    if search == "random":
+        distributions = [RF_PARAM_DISTRIBUTIONS] + ([GB_PARAM_DISTRIBUTIONS] if include_gb else [])
+        return RandomizedSearchCV(pipeline, distributions, n_iter=n_iter, scoring=scoring, cv=cv,
+                                  n_jobs=n_jobs, refit=True, random_state=42)
+    if search == "halving":
+        grid = [RF_PARAM_GRID] + ([GB_PARAM_GRID] if include_gb else [])
+        return HalvingGridSearchCV(pipeline, grid, scoring=scoring, cv=cv, n_jobs=n_jobs,
+                                   refit=True, random_state=42)
+    raise ValueError(f"Mode search tidak dikenal: {search}")
+
+def _peak_memory_mb():
+    """Puncak RSS proses ini dan proses worker (joblib/loky) yang sudah selesai, dalam MB."""
+    # ru_maxrss dalam KB di Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+def run_search(X_train_raw, y_train, search, **search_kwargs):
+    """Menjalankan search dengan CV dan mengembalikan (objek search yang sudah di-fit, laporan sumber daya)."""
+    search_cv = build_search(search, **search_kwargs)
+    print(f"Memulai hyper-parameter search '{search}' ({search_cv.cv.get_n_splits()} fold, n_jobs={search_cv.n_jobs})...")
+    start = time.perf_counter()
+    search_cv.fit(X_train_raw, y_train)
+    wall_time = time.perf_counter() - start
+
+    from joblib.externals.loky import get_reusable_executor
+    # Worker loky dimatikan agar puncak memorinya ikut tercatat di RUSAGE_CHILDREN
+    get_reusable_executor().shutdown(wait=True)
+    peak_self_mb, peak_workers_mb = _peak_memory_mb()
+
+    fit_times = search_cv.cv_results_["mean_fit_time"]
+    report = {
+        "search_wall_time_seconds": wall_time,
+        "search_n_trials": len(fit_times),
+        "search_mean_trial_fit_seconds": float(fit_times.mean()),
+        "search_max_trial_fit_seconds": float(fit_times.max()),
+        "search_peak_memory_mb": peak_self_mb,
+        "search_peak_worker_memory_mb": peak_workers_mb,
+        "search_best_cv_score": float(search_cv.best_score_),
+    }
+    print(f"Search selesai dalam {wall_time:.1f} detik untuk {len(fit_times)} trial "
+          f"(rata-rata fit per fold {fit_times.mean():.2f} detik, puncak memori {peak_self_mb:.0f} MB "
+          f"+ worker {peak_workers_mb:.0f} MB).")
+    print(f"Konfigurasi terbaik (CV {search_cv.scoring}={search_cv.best_score_:.4f}): {_format_params(search_cv.best_params_)}")
+    return search_cv, report
+
+def _format_params(params):
+    """Parameter pipeline dalam bentuk yang bisa dicatat MLflow (estimator -> nama kelasnya)."""
+    formatted = {}
+    for key, value in params.items():
+        key = key.replace("model__", "")
+        formatted["model_class" if key == "model" else key] = type(value).__name__ if key == "model" else value
+    return formatted
+
+def log_search_trials(search_cv):
+    """Mencatat setiap trial sebagai nested run di bawah run yang sedang aktif."""
+    results = search_cv.cv_results_
+    score_keys = [key for key in results if key.startswith(("mean_test_", "std_test_"))]
+    for i, params in enumerate(results["params"]):
+        with mlflow.start_run(run_name=f"trial-{i:03d}", nested=True):
+            mlflow.log_params(_format_params(params))
+            metrics = {key: float(results[key][i]) for key in score_keys}
+            metrics["mean_fit_time"] = float(results["mean_fit_time"][i])
+            metrics["mean_score_time"] = float(results["mean_score_time"][i])
+            metrics["rank"] = int(results["rank_test_score"][i])
+            if "n_resources" in results:
+                metrics["n_resources"] = int(results["n_resources"][i])
+            mlflow.log_metrics(metrics)
+
 # --- 2. KONFIGURASI DAN FUNGSI TRAINING ---
 def setup_mlflow_tracking():
     """Mengatur koneksi ke MLflow Tracking Server (DagsHub atau lokal)."""
@@ -58,24 +202,66 @@ def setup_mlflow_tracking():
         print("Menggunakan MLflow Tracking Server lokal...")
         mlflow.set_tracking_uri("http://localhost:5000")
 
-def train_and_log_model(X_train, y_train, X_test, y_test, scaler, imputer, experiment_name, run_name):
-    """Melatih model dan mencatat semuanya dengan MLflow."""
+def build_default_model():
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+def run_compaction(model, scaler, imputer, X_train, y_train, X_test, y_test, max_recall_loss):
+    """Membuat varian model yang lebih kecil dan memilih yang terkecil dengan penurunan recall <= max_recall_loss."""
+    from model_compaction import compact_model
+    print(f"Memulai kompaksi model (batas penurunan recall {max_recall_loss})...")
+    variant, compact, report = compact_model(model, imputer, scaler, X_train, y_train, X_test, y_test,
+                                             max_recall_loss=max_recall_loss)
+    columns = ["n_trees", "max_depth", "recall", "f1_score", "pickle_kb", "compiled_f32_kb",
+               "load_ms", "p50_ms", "p99_ms", "compiled_p50_ms", "compiled_p99_ms", "eligible"]
+    print(report[columns].to_string(float_format=lambda value: f"{value:.3f}"))
+    print(f"Varian terpilih: {variant}")
+    return compact, (variant, report)
+
+def log_compaction_report(variant, report):
+    """Mencatat varian terpilih, metrik ukuran/latensinya, dan laporan semua varian di run aktif."""
+    from model_compaction import COMPACTION_REPORT_FILE
+    chosen = report.loc[variant]
+    mlflow.log_param("compaction_variant", variant)
+    mlflow.log_metrics({f"compaction_{key}": float(chosen[key])
+                        for key in ("pickle_kb", "compiled_f32_kb", "load_ms", "p50_ms", "p99_ms", "recall_loss")})
+    report.reset_index().to_json(COMPACTION_REPORT_FILE, orient="records", indent=2)
+    mlflow.log_artifact(COMPACTION_REPORT_FILE)
+
+def classification_metrics(y_true, y_pred):
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "recall": recall_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred),
+        "f1_score": f1_score(y_true, y_pred)
+    }
+
+def train_and_log_model(X_train, y_train, X_test, y_test, scaler, imputer, experiment_name, run_name,
+                        model=None, search_cv=None, search_report=None, compaction=None, incremental=None):
+    """
+    Melatih model dan mencatat semuanya dengan MLflow. Jika hasil search diberikan, setiap
+    trial dicatat sebagai nested run dan hanya model terbaik (run induk) yang diregistrasi.
+    compaction=(nama varian, laporan) mencatat hasil run_compaction untuk model yang diberikan;
+    incremental=laporan run_incremental ({"params": ..., "metrics": ...}).
+    """
     setup_mlflow_tracking()
     mlflow.set_experiment(experiment_name)
     
     with mlflow.start_run(run_name=run_name) as run:
         print(f"Memulai run: {run_name}")
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
-        
-        y_pred = model.predict(X_test)
+        if search_cv is not None:
+            log_search_trials(search_cv)
+            mlflow.log_params(_format_params(search_cv.best_params_))
+            mlflow.log_metrics(search_report)
+        if compaction is not None:
+            log_compaction_report(*compaction)
+        if incremental is not None:
+            mlflow.log_params(incremental["params"])
+            mlflow.log_metrics(incremental["metrics"])
+        if model is None:
+            model = build_default_model()
+            model.fit(X_train, y_train)
         
-        metrics = {
-            "accuracy": accuracy_score(y_test, y_pred),
-            "recall": recall_score(y_test, y_pred),
-            "precision": precision_score(y_test, y_pred),
-            "f1_score": f1_score(y_test, y_pred)
-        }
+        metrics = classification_metrics(y_test, model.predict(X_test))
         mlflow.log_metrics(metrics)
         print(f"Metrik dievaluasi: {metrics}")
 
@@ -92,6 +278,209 @@ def train_and_log_model(X_train, y_train, X_test, y_test, scaler, imputer, exper
         mlflow.log_artifact("scaler.joblib")
         mlflow.log_artifact("imputer.joblib")
         print("Scaler dan Imputer berhasil dicatat.")
+    return model, run_id
+
+def export_and_log_compiled_model(model, scaler, imputer, run_id, value_dtype=np.float64):
+    """Mengekspor model + preprocessor ke format array NumPy datar dan mencatatnya di run yang sama."""
+    if not isinstance(model, RandomForestClassifier):
+        # Format terkompilasi hanya mendukung RandomForest; server memakai mode sklearn untuk model lain
+        print(f"Model {type(model).__name__} tidak didukung format terkompilasi, ekspor dilewati.")
+        return
+    compiled_path = export_compiled_model(model, imputer, scaler, value_dtype=value_dtype)
+    mlflow.tracking.MlflowClient().log_artifact(run_id, compiled_path)
+    print(f"Model terkompilasi ({compiled_path}) berhasil dicatat.")
+
+def export_and_log_drift_baseline(X_train_raw, run_id, baseline=None):
+    """
+    Menyimpan baseline drift dari data training (sebelum imputasi/scaling) dan mencatatnya di run yang sama.
+    `baseline` yang sudah jadi (mis. hasil update inkremental) dipakai apa adanya.
+    """
+    baseline_path = save_drift_baseline(baseline if baseline is not None else build_drift_baseline(X_train_raw))
+    mlflow.tracking.MlflowClient().log_artifact(run_id, baseline_path)
+    print(f"Baseline drift ({baseline_path}, {os.path.getsize(baseline_path) / 1024:.1f} KB) berhasil dicatat.")
+
+def out_of_sample_probabilities(model, X_train, y_train, cv_folds=5):
+    """
+    Probabilitas kelas 1 untuk data train yang tidak dilihat model pembuatnya: rata-rata suara pohon
+    out-of-bag untuk RandomForest (tanpa training ulang), selain itu cross_val_predict stratified.
+    Sampel tanpa satu pun pohon OOB bernilai NaN.
+    """
+    if isinstance(model, RandomForestClassifier) and model.bootstrap:
+        from model_compaction import oob_tree_probabilities
+        import warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning) # nanmean kolom tanpa suara OOB
+            return np.nanmean(oob_tree_probabilities(model, X_train), axis=0)
+    from sklearn.base import clone
+    from sklearn.model_selection import cross_val_predict
+    cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    return cross_val_predict(clone(model), X_train, y_train, cv=cv, method="predict_proba")[:, 1]
+
+def fit_calibration(model, X_train, y_train, X_test, y_test, method):
+    """Fit kalibrasi dari probabilitas out-of-sample train dan bandingkan Brier/log-loss mentah vs terkalibrasi di test."""
+    from sklearn.metrics import brier_score_loss, log_loss
+    scores = out_of_sample_probabilities(model, X_train, y_train)
+    covered = ~np.isnan(scores)
+    calibrator = ProbabilityCalibrator.fit(scores[covered], np.asarray(y_train)[covered], method)
+    raw = model.predict_proba(X_test)[:, 1]
+    calibrated = calibrator.transform(raw)
+    metrics = {
+        "calibration_brier_raw": brier_score_loss(y_test, raw),
+        "calibration_brier": brier_score_loss(y_test, calibrated),
+        "calibration_log_loss_raw": log_loss(y_test, np.clip(raw, 1e-6, 1 - 1e-6)),
+        "calibration_log_loss": log_loss(y_test, np.clip(calibrated, 1e-6, 1 - 1e-6)),
+    }
+    print(f"Kalibrasi {method} ({covered.sum()} sampel out-of-sample): {metrics}")
+    return calibrator, metrics
+
+def export_and_log_calibration(calibrator, metrics, run_id):
+    """Mencatat artefak kalibrasi dan metrik Brier/log-loss-nya di run yang sama."""
+    calibration_path = save_calibration(calibrator)
+    client = mlflow.tracking.MlflowClient()
+    client.log_artifact(run_id, calibration_path)
+    client.log_param(run_id, "calibration", calibrator.method)
+    for key, value in metrics.items():
+        client.log_metric(run_id, key, float(value))
+    print(f"Kalibrasi ({calibration_path}) berhasil dicatat.")
+
+# --- 2c. RETRAINING INKREMENTAL ---
+def dataset_sequence(path):
+    """Nomor urut partisi terakhir dataset store sumber data training (juga lewat dataset bertipe), atau None."""
+    from dataset_store import DatasetStore
+    if is_typed_dataset(path):
+        path = str(read_schema(path).get("source", ""))
+    if os.path.isdir(path) and DatasetStore(path).exists():
+        return DatasetStore(path).last_sequence()
+    return None
+
+def log_dataset_sequence(path, run_id):
+    """Mencatat partisi terakhir yang dilihat model agar retraining inkremental berikutnya hanya membaca partisi setelahnya."""
+    sequence = dataset_sequence(path)
+    if sequence is not None:
+        mlflow.tracking.MlflowClient().log_param(run_id, "dataset_sequence", sequence)
+
+def load_production_bundle():
+    """
+    Bundle versi Production dari registry (lewat cache artefak yang sama dengan app.py) dan parameter run-nya.
+    LookupError jika belum ada versi Production.
+    """
+    from model_cache import ArtifactCache
+    from model_bundle import ModelBundle
+    client = mlflow.tracking.MlflowClient()
+    versions = client.get_latest_versions(name="HeartDiseaseClassifier", stages=["Production"])
+    if not versions:
+        raise LookupError("Belum ada versi model Production.")
+    version = versions[0]
+    cache = ArtifactCache()
+    cache.ensure(client, version.run_id, version.version)
+    bundle = ModelBundle.load(cache.entry_dir(version.run_id), version.run_id, version.version)
+    return bundle, client.get_run(version.run_id).data.params
+
+def read_labeled_rows(store, since_sequence=None, until_sequence=None):
+    """Baris berlabel dari partisi store dalam rentang nomor urut, dengan aturan yang sama seperti ingest (tanpa duplikat)."""
+    from dataset_store import TARGET_COLUMN
+    df = store.read(columns=FEATURE_NAMES + [TARGET_COLUMN], since_sequence=since_sequence, until_sequence=until_sequence)
+    df[TARGET_COLUMN] = normalize_target(df[TARGET_COLUMN])
+    df = df[df[TARGET_COLUMN] >= 0].drop_duplicates().reset_index(drop=True)
+    return df.drop(TARGET_COLUMN, axis=1).astype(np.float64), df[TARGET_COLUMN].astype(int)
+
+def full_retrain_comparison(store, since_sequence, X_new_train, y_new_train, X_test_raw, y_test, base_model, n_trees):
+    """Retrain penuh pada data yang sama (riwayat + data baru) untuk dibandingkan waktu dan metriknya."""
+    from sklearn.base import clone
+    start = time.perf_counter()
+    X_history, y_history = read_labeled_rows(store, until_sequence=since_sequence)
+    X_train_raw = pd.concat([X_history, X_new_train], ignore_index=True)
+    y_train = pd.concat([y_history, y_new_train], ignore_index=True)
+    imputer = SimpleImputer(strategy='median')
+    scaler = StandardScaler()
+    X_train = pd.DataFrame(scaler.fit_transform(imputer.fit_transform(X_train_raw)), columns=X_train_raw.columns)
+    model = clone(base_model).set_params(n_estimators=n_trees, warm_start=False).fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+    X_test = pd.DataFrame(scaler.transform(imputer.transform(X_test_raw)), columns=X_test_raw.columns)
+    return seconds, len(X_train_raw), classification_metrics(y_test, model.predict(X_test))
+
+def run_incremental(args):
+    """
+    Retraining inkremental: model Production + partisi dataset store setelah dataset_sequence run-nya.
+    Dievaluasi pada 20% data baru; dengan --compare_full juga dibandingkan dengan retrain penuh.
+    Mengembalikan False jika mode inkremental tidak bisa dipakai (pemanggil jatuh ke retrain penuh).
+    """
+    from dataset_store import DatasetStore
+    from incremental import incremental_update
+    from inference import get_classifier
+    setup_mlflow_tracking()
+    start = time.perf_counter()
+    try:
+        bundle, base_params = load_production_bundle()
+    except Exception as e:
+        # Registry kosong/tidak terjangkau atau artefak rusak: pemanggil jatuh ke retrain penuh (kode keluar 2)
+        print(f"Model Production tidak bisa dimuat untuk mode inkremental: {e}")
+        return False
+    load_seconds = time.perf_counter() - start
+    since = args.since_sequence if args.since_sequence is not None else base_params.get("dataset_sequence")
+    base_model = get_classifier(bundle.model)
+    store = DatasetStore(args.dataset)
+    if not isinstance(base_model, RandomForestClassifier):
+        print(f"Mode inkremental hanya untuk RandomForest, model Production adalah {type(base_model).__name__}.")
+        return False
+    if bundle.drift_baseline is None or since is None or not store.exists():
+        print("Run Production tidak punya baseline drift/dataset_sequence, atau --dataset bukan dataset store.")
+        return False
+
+    start = time.perf_counter()
+    until = store.last_sequence()
+    X_new, y_new = read_labeled_rows(store, since_sequence=int(since))
+    if len(X_new) < args.min_new_rows or y_new.nunique() < 2:
+        print(f"Data baru berlabel tidak cukup ({len(X_new)} baris setelah partisi {since}).")
+        return False
+    X_new_train, X_test_raw, y_new_train, y_test = train_test_split(X_new, y_new, test_size=0.2, random_state=42,
+                                                                    stratify=y_new)
+    max_trees = args.max_trees or len(base_model.estimators_)
+    result = incremental_update(base_model, bundle.imputer, bundle.scaler, bundle.drift_baseline, X_new_train,
+                                y_new_train, args.new_trees, max_trees, random_state=until)
+    incremental_seconds = time.perf_counter() - start
+
+    scaler, imputer = result["scaler"], result["imputer"]
+    X_test = pd.DataFrame(scaler.transform(imputer.transform(X_test_raw)), columns=X_test_raw.columns)
+    base_metrics = classification_metrics(y_test, base_model.predict(
+        pd.DataFrame(bundle.scaler.transform(bundle.imputer.transform(X_test_raw)), columns=X_test_raw.columns)))
+    summary = result["summary"]
+    params = {"training_mode": "incremental", "base_run_id": bundle.run_id, "base_version": bundle.version,
+              "dataset_since_sequence": since, "tree_budget": max_trees,
+              # Varian kompaksi tetap berlaku: jumlah pohon (anggaran) dan max_depth ikut parameter forest Production
+              **({"base_compaction_variant": base_params["compaction_variant"]}
+                 if "compaction_variant" in base_params else {}),
+              **{key: summary[key] for key in ("n_new_rows", "n_trees_added", "n_trees_dropped", "n_trees")}}
+    metrics = {"incremental_seconds": incremental_seconds, "load_base_seconds": load_seconds,
+               "remap_disagreement": summary["remap_disagreement"], "max_mean_shift": summary["max_mean_shift"],
+               **{f"base_{key}": value for key, value in base_metrics.items()}}
+    if args.compare_full:
+        full_seconds, full_rows, full_metrics = full_retrain_comparison(
+            store, int(since), X_new_train, y_new_train, X_test_raw, y_test, base_model, max_trees)
+        params["full_retrain_rows"] = full_rows
+        metrics.update({"full_retrain_seconds": full_seconds, "full_retrain_speedup": full_seconds / incremental_seconds,
+                        **{f"full_{key}": value for key, value in full_metrics.items()}})
+
+    model, run_id = train_and_log_model(result["X_recent"], y_new_train, X_test, y_test, scaler, imputer,
+                                        args.experiment_name, args.run_name, model=result["model"],
+                                        incremental={"params": params, "metrics": metrics})
+    print(f"Inkremental: {summary['n_new_rows']} baris baru, +{summary['n_trees_added']}/-{summary['n_trees_dropped']} "
+          f"pohon, {incremental_seconds:.2f} s (memuat model Production {load_seconds:.2f} s)")
+    for label, prefix in (("Production lama", "base_"), ("Retrain penuh", "full_")):
+        if f"{prefix}f1_score" in metrics:
+            print(f"{label}: " + ", ".join(f"{key}={metrics[prefix + key]:.3f}" for key in base_metrics)
+                  + (f", {metrics['full_retrain_seconds']:.2f} s" if prefix == "full_" else ""))
+    # Nilai daun float32 dari kompaksi dipertahankan (dtype model terkompilasi Production)
+    value_dtype = bundle.explainer.value.dtype if bundle.explainer is not None else np.float64
+    export_and_log_compiled_model(model, scaler, imputer, run_id, value_dtype=value_dtype)
+    export_and_log_drift_baseline(None, run_id, baseline=result["drift_baseline"])
+    mlflow.tracking.MlflowClient().log_param(run_id, "dataset_sequence", until)
+    if bundle.calibrator is not None:
+        # Kalibrasi Production tidak berlaku untuk forest baru; di-fit ulang dengan metode yang sama dari
+        # probabilitas out-of-bag data baru (pohon lama tidak pernah melihat data baru)
+        export_and_log_calibration(*fit_calibration(model, result["X_recent"], y_new_train, X_test, y_test,
+                                                    bundle.calibrator.method), run_id)
+    return True
 
 # --- 3. BLOK EKSEKUSI UTAMA ---
 if __name__ == "__main__":
@@ -99,8 +488,70 @@ if __name__ == "__main__":
     parser.add_argument("--dataset", type=str, required=True)
     parser.add_argument("--experiment_name", type=str, default="Prediksi Penyakit Jantung")
     parser.add_argument("--run_name", type=str, default="TrainingRun")
+    parser.add_argument("--search", type=str, choices=["grid", "random", "halving"], default=None,
+                        help="Aktifkan hyper-parameter search dengan stratified k-fold CV")
+    parser.add_argument("--cv_folds", type=int, default=5)
+    parser.add_argument("--n_iter", type=int, default=20, help="Jumlah trial untuk --search random")
+    parser.add_argument("--include_gb", action="store_true", help="Ikut mencari konfigurasi GradientBoosting")
+    parser.add_argument("--scoring", type=str, default="f1")
+    parser.add_argument("--n_jobs", type=int, default=-1)
+    parser.add_argument("--compact", action="store_true",
+                        help="Buat varian RandomForest yang lebih kecil dan registrasi yang terkecil dalam batas recall")
+    parser.add_argument("--max_recall_loss", type=float, default=0.01,
+                        help="Penurunan recall maksimum (absolut) terhadap model penuh untuk --compact")
+    parser.add_argument("--calibration", type=str, choices=CALIBRATION_METHODS, default=None,
+                        help="Kalibrasi skor risiko (isotonic/platt) yang dikirim sebagai artefak calibration.json")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Perbarui model Production dengan partisi dataset store yang belum dilihatnya (--dataset data/dataset)")
+    parser.add_argument("--new_trees", type=int, default=None,
+                        help="Jumlah pohon baru untuk --incremental (default: sebanding porsi data baru dalam anggaran)")
+    parser.add_argument("--max_trees", type=int, default=None,
+                        help="Anggaran pohon untuk --incremental; pohon tertua dibuang (default: jumlah pohon model Production)")
+    parser.add_argument("--min_new_rows", type=int, default=50)
+    parser.add_argument("--since_sequence", type=int, default=None,
+                        help="Override nomor urut partisi terakhir yang sudah dilihat model Production")
+    parser.add_argument("--compare_full", action="store_true",
+                        help="Ikut menjalankan retrain penuh pada data yang sama dan mencatat perbandingannya")
     args = parser.parse_args()
+    if args.incremental:
+        # Kode keluar 2 jika mode inkremental tidak bisa dipakai, agar pipeline bisa jatuh ke retrain penuh
+        sys.exit(0 if run_incremental(args) else 2)
+    compaction, value_dtype = None, np.float64
     
     raw_df = load_data(args.dataset)
-    X_train, X_test, y_train, y_test, scaler, imputer = preprocess_data(raw_df)
-    train_and_log_model(X_train, y_train, X_test, y_test, scaler, imputer, args.experiment_name, args.run_name)
\ No newline at end of file
+    if args.search:
+        X_train_raw, X_test_raw, y_train, y_test = split_raw_data(raw_df)
+        search_cv, search_report = run_search(X_train_raw, y_train, args.search, cv_folds=args.cv_folds,
+                                              n_iter=args.n_iter, include_gb=args.include_gb,
+                                              scoring=args.scoring, n_jobs=args.n_jobs)
+        # Pipeline terbaik sudah di-refit pada seluruh data train; komponennya dipakai apa adanya
+        best = search_cv.best_estimator_
+        imputer, scaler = best.named_steps["imputer"], best.named_steps["scaler"]
+        X_train = pd.DataFrame(scaler.transform(imputer.transform(X_train_raw)), columns=X_train_raw.columns)
+        X_test = pd.DataFrame(scaler.transform(imputer.transform(X_test_raw)), columns=X_test_raw.columns)
+        model = best.named_steps["model"]
+    else:
+        search_cv = search_report = None
+        X_train, X_test, y_train, y_test, scaler, imputer = preprocess_data(raw_df)
+        # Baris mentah yang sama dengan X_train (indeks posisi dari split di preprocess_data)
+        X_train_raw = raw_df.drop('Heart Disease', axis=1).iloc[X_train.index.to_numpy()]
+        model = build_default_model().fit(X_train, y_train) if args.compact else None
+    if args.compact:
+        if isinstance(model, RandomForestClassifier):
+            model, compaction = run_compaction(model, scaler, imputer, X_train, y_train, X_test, y_test,
+                                               args.max_recall_loss)
+            # Nilai daun float32 di model terkompilasi hanya dipakai jika recall-nya tidak turun
+            report = compaction[1]
+            if report.loc[compaction[0], "recall_compiled_f32"] >= report.loc[compaction[0], "recall"]:
+                value_dtype = np.float32
+        else:
+            print(f"Kompaksi hanya untuk RandomForest, model {type(model).__name__} diregistrasi apa adanya.")
+    model, run_id = train_and_log_model(X_train, y_train, X_test, y_test, scaler, imputer, args.experiment_name,
+                                        args.run_name, model=model, search_cv=search_cv,
+                                        search_report=search_report, compaction=compaction)
+    export_and_log_compiled_model(model, scaler, imputer, run_id, value_dtype=value_dtype)
+    export_and_log_drift_baseline(X_train_raw, run_id)
+    log_dataset_sequence(args.dataset, run_id)
+    if args.calibration:
+        export_and_log_calibration(*fit_calibration(model, X_train, y_train, X_test, y_test, args.calibration),
+                                   run_id)
\ No newline at end of file
@@ -4,34 +4,41 @@
 # 225150200111003_4 YOSUA SAMUEL EDLYN SINAGA_4
 
 # update_dataset.py
-import pandas as pd
 import os
+from prediction_log import LOG_DIR, list_closed_segments, delete_segments
+from dataset_store import DatasetStore, DATASET_DIR
 
 data_dir = 'data'
-combined_file = os.path.join(data_dir, 'combined_data.csv')
-logs_file = os.path.join(data_dir, 'new_logs.csv')
+combined_file = os.path.join(data_dir, 'combined_data.csv') # Dataset gabungan lama (CSV)
+logs_file = os.path.join(data_dir, 'new_logs.csv') # Format log lama (CSV)
 old_file = os.path.join(data_dir, 'old_data.csv') # File awal
 
-# Cek apakah file log baru ada
-if not os.path.exists(logs_file):
-    print("Tidak ada log data baru untuk ditambahkan.")
-    exit()
+# Hanya segmen log yang sudah ditutup oleh writer yang diambil
+segments = list_closed_segments(LOG_DIR)
 
-# Gunakan combined_data.csv jika ada, jika tidak mulai dari old_data.csv
-if os.path.exists(combined_file):
-    base_data = pd.read_csv(combined_file)
-else:
-    base_data = pd.read_csv(old_file)
+store = DatasetStore(DATASET_DIR)
 
-new_logs = pd.read_csv(logs_file)
+# Store kosong (mis. checkout baru di CI, data/dataset tidak dilacak git): impor sekali dari combined_data.csv
+# jika ada, jika tidak dari old_data.csv. Dilakukan sebelum cek log agar langkah berikutnya selalu punya store.
+if not store.exists():
+    base_file = combined_file if os.path.exists(combined_file) else old_file
+    store.append_csv(base_file)
+    print(f"Dataset store dibuat dari {base_file}.")
 
-# Gabungkan
-updated_data = pd.concat([base_data, new_logs], ignore_index=True)
+# Cek apakah ada log data baru
+if not segments and not os.path.exists(logs_file):
+    print("Tidak ada log data baru untuk ditambahkan.")
+    exit()
 
-# Timpa file combined_data.csv dengan versi baru
-updated_data.to_csv(combined_file, index=False)
+# Log baru menjadi partisi baru; partisi lama tidak dibaca ataupun ditulis ulang
+if segments:
+    store.append_segments(segments)
+if os.path.exists(logs_file):
+    store.append_csv(logs_file)
 
-# Hapus file log lama setelah digabungkan
-os.remove(logs_file)
+# Hapus log yang sudah di-commit ke store (hanya segmen yang tadi dibaca)
+delete_segments(segments)
+if os.path.exists(logs_file):
+    os.remove(logs_file)
 
-print(f"Dataset berhasil diperbarui. Total baris sekarang: {len(updated_data)}")
\ No newline at end of file
+print(f"Dataset berhasil diperbarui. Total baris sekarang: {store.manifest()['total_rows']}")